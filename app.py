@@ -7,14 +7,20 @@ from dotenv import load_dotenv
 
 from networksecurity.exception.exception import NetworkSecurityException
 from networksecurity.logging.logger import logging
-from networksecurity.pipeline.training_pipeline import TrainingPipeline
-from networksecurity.utils.main_utils.utils import load_object
-from networksecurity.constants.training_pipeline import DATA_INGESTION_COLLECTION_NAME, DATA_INGESTION_DATABASE_NAME
+from networksecurity.serving.batcher import PredictionBatcher
+from networksecurity.serving.executor import ExecutionLayer, ExecutorSaturatedError
+from networksecurity.serving.streaming import iter_csv_chunks, stream_predictions, STREAM_MEDIA_TYPES
+from networksecurity.serving.result_store import PredictionResultStore
+from networksecurity.serving.training_jobs import TrainingJobScheduler
+from networksecurity.serving import tasks
+from networksecurity.constants.training_pipeline import (DATA_INGESTION_COLLECTION_NAME, DATA_INGESTION_DATABASE_NAME,
+                                                         FINAL_MODEL_FILE_PATH, PREDICTION_COLUMN_NAME,
+                                                         PREDICTION_PAGE_SIZE, PREDICTION_MAX_PAGE_SIZE)
 
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import FastAPI, File, UploadFile, Request
 from uvicorn import run as app_run
-from fastapi.responses import Response
+from fastapi.responses import Response, JSONResponse, StreamingResponse, FileResponse
 from starlette.responses import RedirectResponse
 import pandas as pd
 from dagshub import DagsHubClient
@@ -53,6 +59,57 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
+# Parsing, inference and rendering run in worker processes, each holding its own resident,
+# hot-swappable model; file writes go to a thread pool:
+execution_layer = ExecutionLayer(model_file_path=FINAL_MODEL_FILE_PATH)
+
+
+async def predict_batch(df:pd.DataFrame):
+    return await execution_layer.run_cpu(tasks.predict, df)
+
+# Concurrent small requests are coalesced into one vectorized predict call:
+prediction_batcher = PredictionBatcher(predict_fn=predict_batch)
+
+# Every prediction job gets its own result file under prediction_output/<job_id>/:
+result_store = PredictionResultStore()
+
+# Training runs in a background process, one run at a time:
+training_scheduler = TrainingJobScheduler()
+
+
+@app.on_event("startup")
+async def start_serving():
+    execution_layer.start()
+    await prediction_batcher.start()
+
+
+@app.on_event("shutdown")
+async def stop_serving():
+    await prediction_batcher.stop()
+    execution_layer.shutdown()
+
+
+def server_busy_response(e:ExecutorSaturatedError):
+    return JSONResponse(status_code=503, content={"detail": str(e)}, headers={"Retry-After": "1"})
+
+
+def job_not_found_response(job_id:str):
+    return JSONResponse(status_code=404, content={"detail": f"No prediction job with id {job_id}"})
+
+
+async def render_results_page(request:Request, job_id:str, page:int, page_size:int, prediction=None,
+                              wait_for_cpu:bool=False):
+    # wait_for_cpu: render even when the CPU slots are busy (the job's predictions are already made and saved).
+    page_size = max(1, min(page_size, PREDICTION_MAX_PAGE_SIZE))
+    page_df, total_rows = await execution_layer.run_io(result_store.read_page, job_id, page, page_size, prediction)
+    run_cpu = execution_layer.run_cpu_when_free if wait_for_cpu else execution_layer.run_cpu
+    table_html = await run_cpu(tasks.render_table_html, page_df)
+    return templates.TemplateResponse(request=request, name="table.html", context={
+        "table": table_html, "job_id": job_id, "page": page, "page_size": page_size,
+        "total_rows": total_rows, "total_pages": max(1, -(-total_rows // page_size)),
+        "filter_query": "" if prediction is None else f"prediction={prediction}"
+    })
+
 @app.get("/", tags=["authentication"])
 async def index():
     return RedirectResponse(url="/docs")
@@ -60,32 +117,123 @@ async def index():
 @app.get("/train")
 async def train_route():
     try:
-        train_pipeline = TrainingPipeline()
-        train_pipeline.run_pipeline()
-        return Response("Training is successful.")
+        job, coalesced = training_scheduler.submit()
+        return JSONResponse(status_code=202, content={"job_id": job["job_id"], "status": job["status"],
+                                                      "coalesced": coalesced})
     except Exception as e:
         raise NetworkSecurityException(e, sys)
 
 
+@app.get("/train/jobs")
+async def train_jobs_route():
+    return training_scheduler.list_jobs()
+
+
+@app.get("/train/{job_id}")
+async def train_status_route(job_id:str):
+    job = training_scheduler.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"detail": f"No training job with id {job_id}"})
+    return job
+
+
+@app.post("/train/{job_id}/cancel")
+async def train_cancel_route(job_id:str):
+    job = training_scheduler.cancel(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"detail": f"No training job with id {job_id}"})
+    return job
+
+
 
 
 @app.post("/predict")
 async def predict_route(request:Request, file:UploadFile=File(...)):
     try:
-        df = pd.read_csv(file.file)
-        print(df.iloc[0])
-        network_model = load_object("final_model/model.pkl")        
-        y_pred = network_model.predict(df)
-        print(y_pred)
-        df['Prediced_values'] = y_pred
-        df.to_csv("prediction_output/output.csv")
-        print(df['Prediced_values'])
-        table_html = df.to_html(classes="table table-striped")
-        return templates.TemplateResponse("table.html", {"request": request, "table":table_html})
+        data = await file.read()
+        df = await execution_layer.run_cpu(tasks.parse_csv, data)
+        y_pred = await prediction_batcher.predict(df)
+        df[PREDICTION_COLUMN_NAME] = y_pred
+        job_id = result_store.new_job_id()
+        await execution_layer.run_io(result_store.save, job_id, df)
+        return await render_results_page(request, job_id=job_id, page=1, page_size=PREDICTION_PAGE_SIZE, wait_for_cpu=True)
+    except ExecutorSaturatedError as e:
+        return server_busy_response(e)
     except Exception as e:
         raise NetworkSecurityException(e, sys)
 
 
+@app.get("/predictions/{job_id}")
+async def prediction_results_route(job_id:str, page:int=1, page_size:int=PREDICTION_PAGE_SIZE, prediction:int=None):
+    try:
+        if not result_store.exists(job_id):
+            return job_not_found_response(job_id)
+        page_size = max(1, min(page_size, PREDICTION_MAX_PAGE_SIZE))
+        page_df, total_rows = await execution_layer.run_io(result_store.read_page, job_id, max(page, 1), page_size, prediction)
+        return {
+            "job_id": job_id, "page": max(page, 1), "page_size": page_size, "total_rows": total_rows,
+            "rows": page_df.to_dict(orient="records")
+        }
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+@app.get("/predictions/{job_id}/view")
+async def prediction_results_view_route(request:Request, job_id:str, page:int=1, page_size:int=PREDICTION_PAGE_SIZE,
+                                        prediction:int=None):
+    try:
+        if not result_store.exists(job_id):
+            return job_not_found_response(job_id)
+        return await render_results_page(request, job_id=job_id, page=max(page, 1), page_size=page_size, prediction=prediction)
+    except ExecutorSaturatedError as e:
+        return server_busy_response(e)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+@app.get("/predictions/{job_id}/download")
+async def prediction_results_download_route(job_id:str, output_format:str="csv", prediction:int=None):
+    try:
+        if not result_store.exists(job_id):
+            return job_not_found_response(job_id)
+        if output_format == "parquet" and prediction is None:
+            return FileResponse(result_store.result_file_path(job_id), filename=f"{job_id}.parquet")
+        return StreamingResponse(result_store.iter_csv(job_id, prediction=prediction), media_type="text/csv",
+                                 headers={"Content-Disposition": f"attachment; filename={job_id}.csv"})
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+@app.post("/predict/stream")
+async def predict_stream_route(file:UploadFile=File(...), output_format:str="csv"):
+    """
+    Bounded-memory prediction for large uploads: the file is read and predicted in fixed-size
+    chunks and the rows come back as a chunked CSV or NDJSON response.
+    """
+    try:
+        if output_format not in STREAM_MEDIA_TYPES:
+            return JSONResponse(status_code=400, content={"detail": f"output_format must be one of {list(STREAM_MEDIA_TYPES)}"})
+
+        chunks = iter_csv_chunks(file)
+        try:
+            header, body = await chunks.__anext__()
+        except StopAsyncIteration:
+            return JSONResponse(status_code=400, content={"detail": "The uploaded file has no data rows."})
+        first_result = await execution_layer.run_cpu(tasks.predict_csv_chunk, header, body, output_format, True)
+
+        return StreamingResponse(stream_predictions(chunks, execution_layer, output_format, header, first_result),
+                                 media_type=STREAM_MEDIA_TYPES[output_format])
+    except ExecutorSaturatedError as e:
+        return server_busy_response(e)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+@app.get("/predict/stats")
+async def predict_stats_route():
+    return {"batching": prediction_batcher.stats(), "execution": execution_layer.stats()}
+
+
 
 if __name__ == "__main__":
     app_run(app,host="0.0.0.0",port=8000)
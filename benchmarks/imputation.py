@@ -0,0 +1,145 @@
+"""
+Inference imputation benchmark: KNNImputer.transform vs FastPathKNNImputer.
+
+    python -m benchmarks.imputation --train-rows 10000 100000 1000000
+
+With --strategies, compares the imputer strategies (see make_imputer) instead:
+- accuracy on the reference data: known feature values are hidden and imputed, and a
+  RandomForest is trained on the imputed training split (the raw one for passthrough) and
+  scored on the imputed test split,
+- timings of fitting and imputing the training data, and of imputing a batch, on synthetic data.
+
+    python -m benchmarks.imputation --strategies knn knn_approx mode passthrough --train-rows 10000 100000
+"""
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from sklearn.impute import KNNImputer
+from sklearn.pipeline import Pipeline
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import f1_score
+from networksecurity.constants.training_pipeline import DATA_TRANSFORMATION_IMPUTER_PARAMS, TARGET_COLUMN
+from networksecurity.utils.ml_utils.model.imputer import FastPathKNNImputer, make_imputer, IMPUTER_STRATEGIES
+from benchmarks.synthetic_data import generate_feature_frame, REFERENCE_DATA_FILE_PATH
+
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def make_batch(n_rows:int, missing_fraction:float, missing_columns:int, seed:int):
+    batch = generate_feature_frame(n_rows, seed=seed).astype(float)
+    rng = np.random.default_rng(seed)
+    for row in np.flatnonzero(rng.random(n_rows) < missing_fraction):
+        batch.iloc[row, rng.choice(batch.shape[1], missing_columns, replace=False)] = np.nan
+    return batch
+
+
+def run(train_rows:int, batch_rows:int, scenarios:list) -> list:
+    train_df = generate_feature_frame(train_rows, seed=1)
+    preprocessor = Pipeline(steps=[("KNNImputer", KNNImputer(**DATA_TRANSFORMATION_IMPUTER_PARAMS))]).fit(train_df)
+    fast_imputer = FastPathKNNImputer(preprocessor)
+
+    results = []
+    for name, missing_fraction, missing_columns in scenarios:
+        batch = make_batch(batch_rows, missing_fraction, missing_columns, seed=2)
+        expected, sklearn_seconds = timed(preprocessor.transform, batch)
+        _, cold_seconds = timed(fast_imputer.transform, batch)
+        actual, warm_seconds = timed(fast_imputer.transform, batch)
+        results.append({
+            "train_rows": train_rows, "batch_rows": batch_rows, "scenario": name,
+            "rows_with_missing": int(batch.isna().any(axis=1).sum()),
+            "sklearn_s": round(sklearn_seconds, 4), "fast_cold_s": round(cold_seconds, 4),
+            "fast_warm_s": round(warm_seconds, 4),
+            "speedup_warm": round(sklearn_seconds / max(warm_seconds, 1e-9), 1),
+            "identical": bool(np.array_equal(expected, actual)),
+        })
+        print(results[-1])
+    return results
+
+
+def hide_values(X:np.ndarray, missing_fraction:float, seed:int) -> np.ndarray:
+    """
+    A float copy of X with `missing_fraction` of its cells, at random, set to NaN.
+    """
+    X = X.astype(np.float64)
+    X[np.random.default_rng(seed).random(X.shape) < missing_fraction] = np.nan
+    return X
+
+
+def compare_accuracy(strategies:list, missing_fraction:float, reference_file_path:str=REFERENCE_DATA_FILE_PATH) -> list:
+    reference_df = pd.read_csv(reference_file_path)
+    X = reference_df.drop(columns=[TARGET_COLUMN]).to_numpy(dtype=np.float64)
+    y = reference_df[TARGET_COLUMN].replace(-1, 0).to_numpy()
+    n_train = len(X) - len(X) // 5
+    rows = np.random.default_rng(0).permutation(len(X))
+    train_rows, test_rows = rows[:n_train], rows[n_train:]
+    X_missing = hide_values(X, missing_fraction, seed=1)
+    hidden = np.isnan(X_missing)
+
+    results = []
+    for strategy in strategies:
+        imputer = make_imputer(strategy)
+        X_train, fit_seconds = timed(imputer.fit_transform, X_missing[train_rows])
+        X_test, transform_seconds = timed(imputer.transform, X_missing[test_rows])
+        imputed = np.empty_like(X)
+        imputed[train_rows], imputed[test_rows] = X_train, X_test
+        model = RandomForestClassifier(n_estimators=100, random_state=0, n_jobs=-1).fit(X_train, y[train_rows])
+        results.append({
+            "strategy": strategy, "rows": len(X), "missing_fraction": missing_fraction,
+            # Share of the hidden values imputed exactly (rounded to the nearest feature value), and the RMSE:
+            "exact_share": round(float(np.mean(np.round(imputed[hidden]) == X[hidden])), 4) if strategy != "passthrough" else None,
+            "rmse": round(float(np.sqrt(np.mean((imputed[hidden] - X[hidden]) ** 2))), 4) if strategy != "passthrough" else None,
+            "model_f1": round(float(f1_score(y[test_rows], model.predict(X_test))), 4),
+            "fit_transform_s": round(fit_seconds, 4), "transform_test_s": round(transform_seconds, 4),
+        })
+        print(results[-1])
+    return results
+
+
+def compare_timings(strategies:list, train_rows:int, batch_rows:int, missing_fraction:float) -> list:
+    X_train = hide_values(generate_feature_frame(train_rows, seed=1).to_numpy(), missing_fraction, seed=1)
+    batch = hide_values(generate_feature_frame(batch_rows, seed=2).to_numpy(), missing_fraction, seed=2)
+    results = []
+    for strategy in strategies:
+        imputer = make_imputer(strategy)
+        _, fit_seconds = timed(imputer.fit, X_train)
+        _, transform_train_seconds = timed(imputer.transform, X_train)
+        serving_imputer = FastPathKNNImputer(imputer)
+        _, cold_seconds = timed(serving_imputer.transform, batch)
+        _, warm_seconds = timed(serving_imputer.transform, batch)
+        results.append({
+            "strategy": strategy, "train_rows": train_rows, "batch_rows": batch_rows, "missing_fraction": missing_fraction,
+            "fit_s": round(fit_seconds, 4), "transform_train_s": round(transform_train_seconds, 4),
+            "batch_cold_s": round(cold_seconds, 4), "batch_warm_s": round(warm_seconds, 4),
+        })
+        print(results[-1])
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--train-rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--batch-rows", type=int, default=10_000)
+    parser.add_argument("--strategies", nargs="+", choices=IMPUTER_STRATEGIES, default=None)
+    parser.add_argument("--missing-fraction", type=float, default=0.02)
+    args = parser.parse_args()
+
+    if args.strategies:
+        compare_accuracy(args.strategies, args.missing_fraction)
+        for train_rows in args.train_rows:
+            compare_timings(args.strategies, train_rows, args.batch_rows, args.missing_fraction)
+        raise SystemExit
+
+    scenarios = [
+        # (name, fraction of rows with NaNs, NaN columns per such row)
+        ("complete", 0.0, 0),
+        ("1pct_rows_1_missing", 0.01, 1),
+        ("10pct_rows_1_missing", 0.10, 1),
+    ]
+    for train_rows in args.train_rows:
+        run(train_rows, args.batch_rows, scenarios)
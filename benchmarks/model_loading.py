@@ -0,0 +1,123 @@
+"""
+Model loading benchmark: the published model (KNN imputer + random forest, compiled) pickled as before
+against save_obj_to_pkl's format, loaded privately and memory-mapped (load_object's mmap_mode="r").
+For every way it starts --processes processes (as uvicorn workers would), each loads the model and
+predicts a batch, and reports the load time and the memory the model added to the process: RSS, PSS
+(shared pages counted once across the processes) and private pages, from /proc/self/smaps_rollup.
+It also checks every way predicts as the model it was saved from.
+
+    python -m benchmarks.model_loading --rows 100000 --processes 4
+"""
+import os
+import time
+import pickle
+import argparse
+import tempfile
+import multiprocessing
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from networksecurity.constants.training_pipeline import TARGET_COLUMN
+from networksecurity.utils.main_utils.utils import save_obj_to_pkl, load_object
+from networksecurity.utils.ml_utils.model.estimator import NetworkModel
+from networksecurity.utils.ml_utils.model.imputer import make_imputer, IMPUTER_STRATEGY_KNN
+from benchmarks.synthetic_data import generate_dataset
+
+
+LOADERS = {
+    "pickle": lambda file_path: _pickle_load(file_path),
+    "joblib": lambda file_path: load_object(file_path),
+    "joblib_mmap": lambda file_path: load_object(file_path, mmap_mode="r"),
+}
+PREDICT_BATCH_ROWS = 1_000
+# A worker that died (e.g. out of memory) fails the run instead of leaving the others waiting:
+WORKER_TIMEOUT_SECONDS = 300
+
+
+
+def _pickle_load(file_path:str):
+    with open(file_path, "rb") as file_obj:
+        return pickle.load(file_obj)
+
+
+def memory_mb() -> dict:
+    # Linux only: every field in kB.
+    fields = {}
+    with open("/proc/self/smaps_rollup") as file_obj:
+        for line in file_obj:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return {"rss_mb": fields["Rss"] / 1024, "pss_mb": fields["Pss"] / 1024,
+            "private_mb": (fields["Private_Clean"] + fields["Private_Dirty"]) / 1024}
+
+
+def load_in_worker(loader_name:str, file_path:str, X:np.ndarray, barrier, results) -> None:
+    before = memory_mb()
+    start = time.perf_counter()
+    model = LOADERS[loader_name](file_path)
+    load_seconds = time.perf_counter() - start
+    model.predict(X)
+    # Every worker holds its model when the memory is read, so the PSS shares are final.
+    barrier.wait()
+    after = memory_mb()
+    results.put({"load_seconds": load_seconds, **{key: after[key] - before[key] for key in after}})
+    barrier.wait()
+
+
+def build_model(n_rows:int, n_estimators:int, missing_fraction:float) -> tuple:
+    dataframe = generate_dataset(n_rows, missing_fraction=missing_fraction)
+    X = dataframe.drop(columns=[TARGET_COLUMN]).to_numpy(dtype=np.float32, na_value=np.nan)
+    y = dataframe[TARGET_COLUMN].replace(-1, 0).to_numpy()
+    preprocessor = make_imputer(IMPUTER_STRATEGY_KNN).fit(X)
+    model = RandomForestClassifier(n_estimators=n_estimators, n_jobs=-1, random_state=0)
+    network_model = NetworkModel(preprocessor=preprocessor, model=model.fit(np.nan_to_num(X), y))
+    network_model.compile_model(X[:PREDICT_BATCH_ROWS])
+    return network_model, X[:PREDICT_BATCH_ROWS]
+
+
+def run(rows:list, n_estimators:int, processes:int, missing_fraction:float, work_dir:str=None) -> list:
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for n_rows in rows:
+        network_model, X = build_model(n_rows, n_estimators, missing_fraction)
+        with tempfile.TemporaryDirectory(prefix="benchmark_model_loading_", dir=work_dir) as model_dir:
+            pickle_file_path = os.path.join(model_dir, "model_pickle.pkl")
+            with open(pickle_file_path, "wb") as file_obj:
+                pickle.dump(network_model, file_obj)
+            joblib_file_path = os.path.join(model_dir, "model.pkl")
+            save_obj_to_pkl(joblib_file_path, network_model)
+            expected = network_model.predict(X)
+
+            for loader_name in LOADERS:
+                file_path = pickle_file_path if loader_name == "pickle" else joblib_file_path
+                identical = bool(np.array_equal(LOADERS[loader_name](file_path).predict(X), expected))
+                barrier, queue = context.Barrier(processes, timeout=WORKER_TIMEOUT_SECONDS), context.Queue()
+                workers = [context.Process(target=load_in_worker, args=(loader_name, file_path, X, barrier, queue))
+                           for _ in range(processes)]
+                for worker in workers:
+                    worker.start()
+                worker_results = [queue.get(timeout=WORKER_TIMEOUT_SECONDS) for _ in workers]
+                for worker in workers:
+                    worker.join()
+                results.append({
+                    "loader": loader_name, "rows": n_rows, "processes": processes,
+                    "file_mb": round(os.path.getsize(file_path) / 1024 / 1024, 1),
+                    "load_seconds": round(float(np.mean([result["load_seconds"] for result in worker_results])), 4),
+                    "rss_mb_per_process": round(float(np.mean([result["rss_mb"] for result in worker_results])), 1),
+                    "private_mb_per_process": round(float(np.mean([result["private_mb"] for result in worker_results])), 1),
+                    "pss_mb_total": round(sum(result["pss_mb"] for result in worker_results), 1),
+                    "identical": identical,
+                })
+                print(results[-1])
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--n-estimators", type=int, default=20)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--missing-fraction", type=float, default=0.02)
+    parser.add_argument("--work-dir", default=None, help="where the model files are written (default: system temp dir)")
+    args = parser.parse_args()
+    run(args.rows, args.n_estimators, args.processes, args.missing_fraction, work_dir=args.work_dir)
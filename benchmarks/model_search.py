@@ -0,0 +1,116 @@
+"""
+Model search benchmark: the former sequential per-model GridSearchCV loop vs ParallelSearchExecutor.
+
+    python -m benchmarks.model_search --n-jobs 1 2 4 8
+    python -m benchmarks.model_search --full-grid      # parameters/params.yaml instead of a reduced grid
+
+With --strategies, compares full grids against the budgeted `search` section of params.yaml
+(time, number of fits, held-out score of each model's pick and the overall best model):
+
+    python -m benchmarks.model_search --strategies --n-jobs 4
+"""
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import GridSearchCV, train_test_split
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.ensemble import AdaBoostClassifier, GradientBoostingClassifier, RandomForestClassifier
+from networksecurity.constants.training_pipeline import TARGET_COLUMN, MODEL_TRAINER_SEARCH_CV_FOLDS
+from networksecurity.utils.main_utils.utils import read_yaml_file
+from networksecurity.utils.ml_utils.model.search import ParallelSearchExecutor
+from benchmarks.synthetic_data import REFERENCE_DATA_FILE_PATH
+
+
+
+MODELS = {
+    "Decision_Tree": lambda: DecisionTreeClassifier(random_state=0),
+    "Random_Forest": lambda: RandomForestClassifier(random_state=0),
+    "Gradient_Boosting": lambda: GradientBoostingClassifier(random_state=0),
+    "Logistic_Regression": lambda: LogisticRegression(),
+    "Ada_Boost": lambda: AdaBoostClassifier(random_state=0),
+}
+
+REDUCED_PARAMS = {
+    "Decision_Tree": {"criterion": ["gini", "entropy"], "max_features": ["sqrt", "log2"]},
+    "Random_Forest": {"max_features": ["sqrt", "log2"], "n_estimators": [16, 64]},
+    "Gradient_Boosting": {"learning_rate": [.1, .05], "subsample": [0.7, 0.9], "n_estimators": [16, 64]},
+    "Logistic_Regression": {},
+    "Ada_Boost": {"learning_rate": [.1, .01], "n_estimators": [16, 64]},
+}
+
+
+def sequential_search(params:dict, X, y) -> dict:
+    best_params = {}
+    for name, make_model in MODELS.items():
+        grid_search = GridSearchCV(estimator=make_model(), param_grid=params.get(name) or {},
+                                   cv=MODEL_TRAINER_SEARCH_CV_FOLDS)
+        grid_search.fit(X, y)
+        make_model().set_params(**grid_search.best_params_).fit(X, y)
+        best_params[name] = grid_search.best_params_
+    return best_params
+
+
+def run(n_jobs_values:list, full_grid:bool) -> list:
+    reference_df = pd.read_csv(REFERENCE_DATA_FILE_PATH)
+    X = reference_df.drop(columns=[TARGET_COLUMN]).to_numpy(dtype=np.float32)
+    y = reference_df[TARGET_COLUMN].replace(-1, 0).to_numpy(dtype=np.int8)
+    params = read_yaml_file("parameters/params.yaml")["model_params"] if full_grid else REDUCED_PARAMS
+
+    start = time.perf_counter()
+    sequential_best = sequential_search(params, X, y)
+    sequential_seconds = time.perf_counter() - start
+    results = [{"search": "sequential_gridsearchcv", "n_jobs": 1, "seconds": round(sequential_seconds, 2)}]
+    print(results[-1])
+
+    for n_jobs in n_jobs_values:
+        start = time.perf_counter()
+        search_results, _ = ParallelSearchExecutor(n_jobs=n_jobs).search(
+            {name: make_model() for name, make_model in MODELS.items()}, params, X, y)
+        seconds = time.perf_counter() - start
+        results.append({
+            "search": "parallel_executor", "n_jobs": n_jobs, "seconds": round(seconds, 2),
+            "speedup": round(sequential_seconds / seconds, 2),
+            "same_best_params": all(search_results[name].best_params == sequential_best[name] for name in MODELS),
+        })
+        print(results[-1])
+    return results
+
+
+def run_strategies(n_jobs:int) -> list:
+    reference_df = pd.read_csv(REFERENCE_DATA_FILE_PATH)
+    X = reference_df.drop(columns=[TARGET_COLUMN]).to_numpy(dtype=np.float32)
+    y = reference_df[TARGET_COLUMN].replace(-1, 0).to_numpy(dtype=np.int8)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    params = read_yaml_file("parameters/params.yaml")
+
+    results = []
+    for label, search_config in (("full_grid", {}), ("params_yaml", params.get("search") or {})):
+        start = time.perf_counter()
+        search_results, fitted_models = ParallelSearchExecutor(n_jobs=n_jobs).search(
+            {name: make_model() for name, make_model in MODELS.items()}, params["model_params"], X_train, y_train,
+            strategies=search_config.get("strategies"), time_budget=search_config.get("time_budget_seconds"))
+        seconds = time.perf_counter() - start
+        test_scores = {name: round(model.score(X_test, y_test), 4) for name, model in fitted_models.items()}
+        results.append({
+            "search": label, "seconds": round(seconds, 1),
+            "cv_fits": sum(len(result.cv_results) for result in search_results.values()) * MODEL_TRAINER_SEARCH_CV_FOLDS,
+            "test_scores": test_scores, "best_model": max(test_scores, key=test_scores.get),
+            "best_params": {name: result.best_params for name, result in search_results.items()},
+        })
+        print(results[-1])
+    print({"speedup": round(results[0]["seconds"] / results[1]["seconds"], 1)})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n-jobs", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--full-grid", action="store_true")
+    parser.add_argument("--strategies", action="store_true")
+    args = parser.parse_args()
+    if args.strategies:
+        run_strategies(args.n_jobs[0])
+    else:
+        run(args.n_jobs, args.full_grid)
@@ -0,0 +1,165 @@
+"""
+Collection export benchmark: the previous `pd.DataFrame(list(collection.find()))` export against
+DataIngestion.export_collection_as_df (projected, batched, typed buffers), with 1 and more _id range
+workers. Reports seconds, rows/sec and peak RSS of each, and checks they give the same DataFrame.
+
+Runs against an in-memory stand-in for the collection by default, or a local mongod with
+--mongo-url (the documents are written to a scratch collection, dropped at the end):
+
+    python -m benchmarks.mongo_export --rows 100000 1000000 --workers 1 4
+    python -m benchmarks.mongo_export --mongo-url mongodb://localhost:27017 --rows 1000000
+"""
+import os
+import copy
+import bisect
+import argparse
+import numpy as np
+import pandas as pd
+from networksecurity.constants.training_pipeline import SCHEMA_FILE_PATH
+from networksecurity.components.data_ingestion import DataIngestion
+from networksecurity.entity.config_entity import TrainingPipelineConfig, DataIngestionConfig
+from networksecurity.utils.main_utils.utils import get_schema_dtypes
+from benchmarks.synthetic_data import generate_dataset
+from benchmarks.suite import measure
+
+
+BENCHMARK_DATABASE_NAME = "benchmarks"
+BENCHMARK_COLLECTION_NAME = "mongo_export"
+
+
+
+class MockCollection:
+    """
+    The part of pymongo's Collection the export uses: find (filter on _id ranges, projection,
+    sort on _id, skip, limit), estimated_document_count and insert_many. Every document found is a
+    new dict, as pymongo decodes one from BSON. Documents are kept in _id order, and _id ranges
+    are found by bisection, as with the _id index.
+    """
+    def __init__(self):
+        self.documents = []
+        self.ids = []
+
+
+    def insert_many(self, documents:list) -> None:
+        self.documents.extend(copy.deepcopy(documents))
+        self.documents.sort(key=lambda document: document["_id"])
+        self.ids = [document["_id"] for document in self.documents]
+
+
+    def estimated_document_count(self) -> int:
+        return len(self.documents)
+
+
+    def find(self, filter:dict=None, projection:dict=None, batch_size:int=0, sort:list=None, skip:int=0, limit:int=0):
+        # Only _id range filters and _id order are supported.
+        bounds = (filter or {}).get("_id", {})
+        start = bisect.bisect_left(self.ids, bounds["$gte"]) if "$gte" in bounds else 0
+        stop = bisect.bisect_left(self.ids, bounds["$lt"]) if "$lt" in bounds else len(self.ids)
+        start += skip
+        stop = min(stop, start + limit) if limit else stop
+        for document in self.documents[start:stop]:
+            # Built field by field either way, as BSON decoding does.
+            if projection:
+                yield {field: value for field, value in document.items()
+                       if projection.get(field, 1 if field == "_id" else 0)}
+            else:
+                yield {field: value for field, value in document.items()}
+
+
+    def drop(self) -> None:
+        self.documents, self.ids = [], []
+
+
+
+class MockMongoClient:
+    def __init__(self):
+        self.databases = {}
+
+
+    def __getitem__(self, database_name:str) -> dict:
+        return self.databases.setdefault(database_name, _MockDatabase())
+
+
+
+class _MockDatabase(dict):
+    def __missing__(self, collection_name:str) -> MockCollection:
+        self[collection_name] = MockCollection()
+        return self[collection_name]
+
+
+
+def documents_like_collection(n_rows:int, missing_fraction:float, seed:int=42) -> list:
+    """
+    Synthetic rows as push_data stores them: one document per row, "na" for missing values.
+    """
+    dataframe = generate_dataset(n_rows, seed=seed, missing_fraction=missing_fraction).astype(object)
+    dataframe = dataframe.where(dataframe.notna(), "na")
+    return [dict(record, _id=index) for index, record in enumerate(dataframe.to_dict("records"))]
+
+
+def current_rss_mb():
+    try:
+        with open("/proc/self/statm") as file_obj:
+            return round(int(file_obj.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024, 1)
+    except OSError:
+        return None
+
+
+def previous_export(collection) -> pd.DataFrame:
+    # The export as it was: every field of every document, cleaned afterwards.
+    df = pd.DataFrame(list(collection.find()))
+    if "_id" in df.columns.to_list():
+        df = df.drop(columns=["_id"])
+    df.replace({"na": np.nan}, inplace=True)
+    schema_dtypes = get_schema_dtypes(SCHEMA_FILE_PATH)
+    return df.astype({column: dtype for column, dtype in schema_dtypes.items() if column in df.columns})
+
+
+def run(rows:list, workers:list, missing_fraction:float, mongo_url:str=None) -> list:
+    if mongo_url:
+        from pymongo import MongoClient
+        mongo_client = MongoClient(mongo_url)
+    else:
+        mongo_client = MockMongoClient()
+
+    results = []
+    for n_rows in rows:
+        collection = mongo_client[BENCHMARK_DATABASE_NAME][BENCHMARK_COLLECTION_NAME]
+        collection.drop()
+        documents = documents_like_collection(n_rows, missing_fraction)
+        for start in range(0, n_rows, 100_000):
+            collection.insert_many(documents[start:start + 100_000])
+        del documents
+
+        # The peaks include what the process (and an in-memory collection) held before the export:
+        print({"rows": n_rows, "rss_before_export_mb": current_rss_mb()})
+        expected, metrics = measure(previous_export, collection)
+        results.append({"method": "previous", "rows": n_rows, **metrics,
+                        "rows_per_sec": round(n_rows / metrics["seconds"])})
+        print(results[-1])
+
+        for n_workers in workers:
+            data_ingestion_config = DataIngestionConfig(TrainingPipelineConfig())
+            data_ingestion_config.database_name = BENCHMARK_DATABASE_NAME
+            data_ingestion_config.collection_name = BENCHMARK_COLLECTION_NAME
+            data_ingestion_config.export_workers = n_workers
+            data_ingestion = DataIngestion(data_ingestion_config, mongo_client=mongo_client)
+            actual, metrics = measure(data_ingestion.export_collection_as_df)
+            results.append({"method": "export_collection_as_df", "workers": n_workers, "rows": n_rows, **metrics,
+                            "rows_per_sec": round(n_rows / metrics["seconds"]),
+                            # Documents are inserted in _id order, so the _id ranges keep the row order.
+                            "identical": bool(actual.equals(expected)),
+                            "memory_mb": round(float(actual.memory_usage(deep=True).sum()) / 1024 / 1024, 1)})
+            print(results[-1])
+        collection.drop()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--missing-fraction", type=float, default=0.02)
+    parser.add_argument("--mongo-url", default=None, help="local mongod to run against (default: in-memory stand-in)")
+    args = parser.parse_args()
+    run(args.rows, args.workers, args.missing_fraction, mongo_url=args.mongo_url)
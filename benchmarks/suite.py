@@ -0,0 +1,227 @@
+"""
+Pipeline benchmark suite on synthetic data shaped like the ingested collection (see synthetic_data).
+
+For every dataset size (and share of missing feature values) it times:
+    read_data                                   the ingested CSV, with the schema's dtypes
+    detect_data_drift                           KS test of the 80/20 train/test split
+    initiate_data_transformation                imputer fit + int8 arrays written to disk
+    evaluate_models                             reduced grids, on at most --max-search-rows rows
+    NetworkModel.predict                        latency and throughput per batch size, best model
+
+    python -m benchmarks.suite                                  # 10k and 1M rows
+    python -m benchmarks.suite --rows 10000 1000000 10000000 --missing-fraction 0 0.05
+
+Results go to benchmarks/results/<timestamp>.json, and are compared with the latest earlier results
+file there (or --compare FILE): every benchmark that got more than 20% slower is printed.
+"""
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from networksecurity.constants.training_pipeline import TARGET_COLUMN, SCHEMA_FILE_PATH
+from networksecurity.components.data_validation import DataValidation
+from networksecurity.components.data_transformation import DataTransformation
+from networksecurity.entity.config_entity import TrainingPipelineConfig, DataValidationConfig, DataTransformationConfig
+from networksecurity.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact
+from networksecurity.utils.main_utils.utils import (read_data, get_schema_dtypes, load_object, load_numpy_arr_data,
+                                                    evaluate_models, from_int8_features)
+from networksecurity.utils.ml_utils.model.estimator import NetworkModel
+from networksecurity.utils.ml_utils.model.imputer import FastPathKNNImputer
+from networksecurity.pipeline.run_report import _reset_peak_rss, _peak_rss_mb
+from benchmarks.synthetic_data import write_dataset_csv
+from benchmarks.model_search import MODELS, REDUCED_PARAMS
+
+
+
+RESULTS_DIR = os.path.join("benchmarks", "results")
+REGRESSION_THRESHOLD = 0.2
+
+
+def measure(fn, *args, **kwargs):
+    """
+    Returns (result, {"seconds", "cpu_seconds", "peak_rss_mb"}) of one call.
+    """
+    peak_was_reset = _reset_peak_rss()
+    start, cpu_start = time.perf_counter(), time.process_time()
+    result = fn(*args, **kwargs)
+    metrics = {"seconds": round(time.perf_counter() - start, 4),
+               "cpu_seconds": round(time.process_time() - cpu_start, 4),
+               "peak_rss_mb": _peak_rss_mb(peak_was_reset)}
+    return result, metrics
+
+
+def with_throughput(metrics:dict, rows:int) -> dict:
+    return dict(metrics, rows=rows, rows_per_sec=round(rows / metrics["seconds"]) if metrics["seconds"] > 0 else None)
+
+
+def stage_configs(work_dir:str):
+    training_pipeline_config = TrainingPipelineConfig()
+    training_pipeline_config.artifact_dir = work_dir
+    return (DataValidationConfig(training_pipeline_config=training_pipeline_config),
+            DataTransformationConfig(training_pipeline_config=training_pipeline_config))
+
+
+def run_dataset(n_rows:int, missing_fraction:float, work_dir:str, batch_sizes:list, repeats:int,
+                max_search_rows:int, n_jobs:int) -> list:
+    labels = {"dataset_rows": n_rows, "missing_fraction": missing_fraction}
+    results = []
+    def add(benchmark:str, metrics:dict, **extra):
+        results.append({"benchmark": benchmark, **labels, **extra, **metrics})
+        print(results[-1])
+
+    data_file_path = write_dataset_csv(os.path.join(work_dir, "dataset.csv"), n_rows, missing_fraction=missing_fraction)
+    schema_dtypes = get_schema_dtypes(SCHEMA_FILE_PATH)
+
+    dataframe, metrics = measure(read_data, data_file_path, dtypes=schema_dtypes)
+    add("read_data", with_throughput(metrics, n_rows))
+
+    # The ingestion split, then the stages on it as the pipeline runs them.
+    n_train_rows = n_rows - int(n_rows * 0.2)
+    train_file_path, test_file_path = os.path.join(work_dir, "train.csv"), os.path.join(work_dir, "test.csv")
+    dataframe.iloc[:n_train_rows].to_csv(train_file_path, index=False)
+    dataframe.iloc[n_train_rows:].to_csv(test_file_path, index=False)
+    data_validation_config, data_transformation_config = stage_configs(work_dir)
+
+    data_validation = DataValidation(DataIngestionArtifact(trained_file_path=train_file_path, test_file_path=test_file_path),
+                                     data_validation_config)
+    _, metrics = measure(data_validation.detect_data_drift, dataframe.iloc[:n_train_rows], dataframe.iloc[n_train_rows:])
+    add("detect_data_drift", with_throughput(metrics, n_rows))
+    del dataframe
+
+    data_validation_artifact = DataValidationArtifact(
+        validation_status=True, valid_train_file_path=train_file_path, valid_test_file_path=test_file_path,
+        invalid_train_file_path=None, invalid_test_file_path=None,
+        drift_report_file_path=data_validation_config.drift_report_file_path)
+    data_transformation = DataTransformation(data_validation_artifact, data_transformation_config)
+    artifact, metrics = measure(data_transformation.initiate_data_transformation)
+    add("initiate_data_transformation", with_throughput(metrics, n_rows))
+
+    # Model search on (at most) max_search_rows rows, imputed as the trainer does.
+    preprocessor = FastPathKNNImputer(load_object(artifact.transformed_object_file_path))
+    n_search_rows = min(n_train_rows, max_search_rows)
+    n_search_test_rows = min(n_rows - n_train_rows, max(max_search_rows // 4, 1))
+    X_train = preprocessor.transform(from_int8_features(load_numpy_arr_data(artifact.transformed_train_file_path)[:n_search_rows]))
+    X_test = preprocessor.transform(from_int8_features(load_numpy_arr_data(artifact.transformed_test_file_path)[:n_search_test_rows]))
+    y_train = load_numpy_arr_data(artifact.transformed_train_label_file_path)[:n_search_rows]
+    y_test = load_numpy_arr_data(artifact.transformed_test_label_file_path)[:n_search_test_rows]
+    models = {name: make_model() for name, make_model in MODELS.items()}
+    model_report, metrics = measure(evaluate_models, X_train=X_train, y_train=y_train, X_test=X_test, y_test=y_test,
+                                    models=models, params=REDUCED_PARAMS, n_jobs=n_jobs)
+    best_model_name = max(model_report, key=model_report.get)
+    add("evaluate_models", with_throughput(metrics, n_search_rows), best_model=best_model_name)
+
+    # Prediction latency on raw test rows (with their missing values) in the serving input format,
+    # repeated if there are fewer than the batches need.
+    network_model = NetworkModel(preprocessor=load_object(artifact.transformed_object_file_path),
+                                 model=models[best_model_name])
+    X_test_raw = from_int8_features(load_numpy_arr_data(artifact.transformed_test_file_path))
+    X_raw = pd.DataFrame(np.resize(X_test_raw, (max(batch_sizes) * 2, X_test_raw.shape[1])),
+                         columns=[column for column in schema_dtypes if column != TARGET_COLUMN])
+    network_model.compile_model(X_raw.iloc[:1000])
+    for batch_size in batch_sizes:
+        network_model.predict(X_raw.iloc[:batch_size])
+        latencies = []
+        for repeat in range(repeats):
+            start_row = (repeat * batch_size) % (len(X_raw) - batch_size + 1)
+            batch = X_raw.iloc[start_row:start_row + batch_size]
+            start = time.perf_counter()
+            network_model.predict(batch)
+            latencies.append(time.perf_counter() - start)
+        compiled_model = network_model.compiled_model
+        add("NetworkModel.predict", {
+            "batch_size": batch_size, "model": best_model_name,
+            "compiled": compiled_model is not None and batch_size <= compiled_model.max_batch_rows,
+            "latency_ms_p50": round(float(np.percentile(latencies, 50)) * 1000, 4),
+            "latency_ms_p95": round(float(np.percentile(latencies, 95)) * 1000, 4),
+            "rows_per_sec": round(batch_size / float(np.median(latencies))),
+        })
+    return results
+
+
+def result_key(result:dict) -> tuple:
+    return (result["benchmark"], result["dataset_rows"], result["missing_fraction"], result.get("batch_size"))
+
+
+def compare(results:list, previous_file_path:str) -> list:
+    """
+    The benchmarks that got more than REGRESSION_THRESHOLD slower than in `previous_file_path`.
+    """
+    with open(previous_file_path) as file_obj:
+        previous = {result_key(result): result for result in json.load(file_obj)["results"]}
+    regressions = []
+    for result in results:
+        before = previous.get(result_key(result))
+        if before is None:
+            continue
+        metric = "latency_ms_p50" if "latency_ms_p50" in result else "seconds"
+        if before.get(metric) and result[metric] > before[metric] * (1 + REGRESSION_THRESHOLD):
+            regressions.append({"benchmark": result_key(result), "metric": metric, "previous": before[metric],
+                                "current": result[metric], "change": round(result[metric] / before[metric] - 1, 3)})
+    return regressions
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit, "python": sys.version.split()[0], "platform": platform.platform(),
+            "cpu_count": os.cpu_count(), "numpy": np.__version__, "pandas": pd.__version__}
+
+
+def run(rows:list, missing_fractions:list, batch_sizes:list, repeats:int, max_search_rows:int, n_jobs:int,
+        work_dir:str=None, results_dir:str=RESULTS_DIR, compare_file_path:str=None) -> dict:
+    previous_files = sorted(glob.glob(os.path.join(results_dir, "*.json")), key=os.path.getmtime)
+    compare_file_path = compare_file_path or (previous_files[-1] if previous_files else None)
+
+    results = []
+    for n_rows in rows:
+        for missing_fraction in missing_fractions:
+            dataset_dir = tempfile.mkdtemp(prefix="benchmark_suite_", dir=work_dir)
+            try:
+                results += run_dataset(n_rows, missing_fraction, dataset_dir, batch_sizes, repeats, max_search_rows, n_jobs)
+            finally:
+                shutil.rmtree(dataset_dir, ignore_errors=True)
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "environment": environment(),
+        "config": {"rows": rows, "missing_fractions": missing_fractions, "batch_sizes": batch_sizes,
+                   "repeats": repeats, "max_search_rows": max_search_rows, "n_jobs": n_jobs},
+        "results": results,
+        "compared_with": compare_file_path,
+        "regressions": compare(results, compare_file_path) if compare_file_path else [],
+    }
+    os.makedirs(results_dir, exist_ok=True)
+    results_file_path = os.path.join(results_dir, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(results_file_path, "w") as file_obj:
+        json.dump(report, file_obj, indent=2)
+    for regression in report["regressions"]:
+        print(f"REGRESSION {regression}")
+    print(f"Results written to {results_file_path}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 1_000_000])
+    parser.add_argument("--missing-fraction", type=float, nargs="+", default=[0.0])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 100, 1000, 10_000])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--max-search-rows", type=int, default=20_000)
+    parser.add_argument("--n-jobs", type=int, default=None)
+    parser.add_argument("--work-dir", default=None, help="where the datasets are written (default: system temp dir)")
+    parser.add_argument("--results-dir", default=RESULTS_DIR)
+    parser.add_argument("--compare", default=None, help="results file to compare with (default: the latest one)")
+    args = parser.parse_args()
+    run(args.rows, args.missing_fraction, args.batch_sizes, args.repeats, args.max_search_rows, args.n_jobs,
+        work_dir=args.work_dir, results_dir=args.results_dir, compare_file_path=args.compare)
@@ -0,0 +1,58 @@
+import os
+import numpy as np
+import pandas as pd
+from networksecurity.constants.training_pipeline import TARGET_COLUMN, SCHEMA_FILE_PATH
+from networksecurity.utils.main_utils.utils import get_schema_dtypes
+
+
+REFERENCE_DATA_FILE_PATH = "Network_Data/phisingData.csv"
+
+
+def generate_feature_frame(n_rows:int, seed:int=42, reference_file_path:str=REFERENCE_DATA_FILE_PATH) -> pd.DataFrame:
+    """
+    Samples every feature column independently from its marginal distribution in the reference data.
+    """
+    rng = np.random.default_rng(seed)
+    reference_df = pd.read_csv(reference_file_path).drop(columns=[TARGET_COLUMN])
+    columns = {}
+    for column in reference_df.columns:
+        frequencies = reference_df[column].value_counts(normalize=True)
+        columns[column] = rng.choice(frequencies.index.to_numpy(), size=n_rows, p=frequencies.to_numpy())
+    return pd.DataFrame(columns)
+
+
+def generate_dataset(n_rows:int, seed:int=42, missing_fraction:float=0.0, schema_file_path:str=SCHEMA_FILE_PATH,
+                     reference_file_path:str=REFERENCE_DATA_FILE_PATH) -> pd.DataFrame:
+    """
+    A dataset shaped like the ingested data: the schema's columns in its order and dtypes (nullable
+    int8), every column (the target too) sampled from its marginal distribution in the reference data.
+    With missing_fraction, that share of the feature values (not labels) is missing, at random cells.
+    """
+    rng = np.random.default_rng(seed)
+    schema_dtypes = get_schema_dtypes(schema_file_path)
+    reference_df = pd.read_csv(reference_file_path)
+    columns = {}
+    for column, dtype in schema_dtypes.items():
+        frequencies = reference_df[column].value_counts(normalize=True)
+        values = rng.choice(frequencies.index.to_numpy().astype(np.int8), size=n_rows, p=frequencies.to_numpy())
+        mask = None
+        if missing_fraction and column != TARGET_COLUMN:
+            mask = rng.random(n_rows) < missing_fraction
+        columns[column] = pd.arrays.IntegerArray(values, mask if mask is not None else np.zeros(n_rows, dtype=bool)) \
+            if dtype.startswith("Int") else values
+    return pd.DataFrame(columns).astype(schema_dtypes)
+
+
+def write_dataset_csv(file_path:str, n_rows:int, seed:int=42, missing_fraction:float=0.0,
+                      chunk_rows:int=1_000_000) -> str:
+    """
+    Writes `generate_dataset` rows to a CSV chunk by chunk (each with its own seed), so 10M rows
+    never have to be in memory at once.
+    """
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    with open(file_path, "w", newline="") as file_obj:
+        for chunk_index, start in enumerate(range(0, n_rows, chunk_rows)):
+            chunk = generate_dataset(min(chunk_rows, n_rows - start), seed=seed + chunk_index,
+                                     missing_fraction=missing_fraction)
+            chunk.to_csv(file_obj, index=False, header=chunk_index == 0)
+    return file_path
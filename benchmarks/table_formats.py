@@ -0,0 +1,75 @@
+"""
+Table format benchmark: the stage tables (Feature Store, train / test) as CSV, as the stages wrote them
+so far, against Parquet and Arrow IPC. For every format it reports the write time, the file size, and the
+read time and peak RSS of read_data reading the whole table, only two of its columns (projection), and
+the whole table in chunks (as out-of-core mode does). It also checks every read gives the written data.
+
+    python -m benchmarks.table_formats --rows 100000 1000000
+    python -m benchmarks.table_formats --rows 10000000 --formats csv parquet
+"""
+import os
+import shutil
+import argparse
+import tempfile
+import pandas as pd
+from networksecurity.constants.training_pipeline import TARGET_COLUMN, SCHEMA_FILE_PATH, TABLE_FORMAT_EXTENSIONS
+from networksecurity.utils.main_utils.utils import read_data, write_data, get_schema_dtypes
+from benchmarks.synthetic_data import generate_dataset
+from benchmarks.suite import measure, with_throughput
+
+
+PROJECTED_COLUMNS = ["URL_Length", TARGET_COLUMN]
+READ_CHUNK_ROWS = 100_000
+
+
+
+def read_in_chunks(file_path:str, dtypes:dict) -> int:
+    return sum(len(chunk) for chunk in read_data(file_path, dtypes=dtypes, chunk_rows=READ_CHUNK_ROWS))
+
+
+def run(rows:list, formats:list, missing_fraction:float, work_dir:str=None) -> list:
+    schema_dtypes = get_schema_dtypes(SCHEMA_FILE_PATH)
+    results = []
+    for n_rows in rows:
+        dataframe = generate_dataset(n_rows, missing_fraction=missing_fraction)
+        dataset_dir = tempfile.mkdtemp(prefix="benchmark_table_formats_", dir=work_dir)
+        try:
+            for table_format in formats:
+                labels = {"format": table_format, "rows": n_rows}
+                file_path = os.path.join(dataset_dir, f"train{TABLE_FORMAT_EXTENSIONS[table_format]}")
+
+                _, metrics = measure(write_data, dataframe, file_path)
+                results.append({"benchmark": "write", **labels, **with_throughput(metrics, n_rows),
+                                "file_mb": round(os.path.getsize(file_path) / 1024 / 1024, 2)})
+                print(results[-1])
+
+                actual, metrics = measure(read_data, file_path, dtypes=schema_dtypes)
+                results.append({"benchmark": "read", **labels, **with_throughput(metrics, n_rows),
+                                "identical": bool(actual.equals(dataframe))})
+                print(results[-1])
+                del actual
+
+                actual, metrics = measure(read_data, file_path, dtypes=schema_dtypes, columns=PROJECTED_COLUMNS)
+                results.append({"benchmark": "read_projected", **labels, **with_throughput(metrics, n_rows),
+                                "identical": bool(actual[PROJECTED_COLUMNS].equals(dataframe[PROJECTED_COLUMNS]))})
+                print(results[-1])
+                del actual
+
+                n_read, metrics = measure(read_in_chunks, file_path, schema_dtypes)
+                results.append({"benchmark": "read_in_chunks", **labels, **with_throughput(metrics, n_rows),
+                                "identical": n_read == n_rows})
+                print(results[-1])
+                os.remove(file_path)
+        finally:
+            shutil.rmtree(dataset_dir, ignore_errors=True)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--formats", nargs="+", default=list(TABLE_FORMAT_EXTENSIONS), choices=list(TABLE_FORMAT_EXTENSIONS))
+    parser.add_argument("--missing-fraction", type=float, default=0.02)
+    parser.add_argument("--work-dir", default=None, help="where the tables are written (default: system temp dir)")
+    args = parser.parse_args()
+    run(args.rows, args.formats, args.missing_fraction, work_dir=args.work_dir)
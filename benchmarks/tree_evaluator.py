@@ -0,0 +1,54 @@
+"""
+Prediction latency benchmark: sklearn `predict` vs the compiled flat-array tree evaluator.
+
+    python -m benchmarks.tree_evaluator --batch-rows 1 10 100 1000 10000 100000
+"""
+import argparse
+import numpy as np
+import pandas as pd
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.ensemble import AdaBoostClassifier, GradientBoostingClassifier, RandomForestClassifier
+from networksecurity.constants.training_pipeline import TARGET_COLUMN
+from networksecurity.utils.ml_utils.model.tree_compiler import compile_tree_model, _best_time
+from benchmarks.synthetic_data import REFERENCE_DATA_FILE_PATH, generate_feature_frame
+
+
+
+MODELS = {
+    "Decision_Tree": lambda: DecisionTreeClassifier(random_state=0),
+    "Random_Forest": lambda: RandomForestClassifier(n_estimators=128, random_state=0),
+    "Gradient_Boosting": lambda: GradientBoostingClassifier(n_estimators=125, subsample=0.85, random_state=0),
+    "Ada_Boost": lambda: AdaBoostClassifier(n_estimators=128, random_state=0),
+}
+
+
+def run(batch_rows:list, repeats:int) -> list:
+    reference_df = pd.read_csv(REFERENCE_DATA_FILE_PATH)
+    X_train = reference_df.drop(columns=[TARGET_COLUMN]).to_numpy(dtype=float)
+    y_train = reference_df[TARGET_COLUMN].replace(-1, 0).to_numpy(dtype=float)
+    X_all = generate_feature_frame(max(batch_rows), seed=2).to_numpy(dtype=float)
+
+    results = []
+    for name, make_model in MODELS.items():
+        model = make_model().fit(X_train, y_train)
+        compiled_model = compile_tree_model(model)
+        for n_rows in batch_rows:
+            X = X_all[:n_rows]
+            sklearn_seconds = _best_time(model.predict, X, repeats)
+            compiled_seconds = _best_time(compiled_model.predict, X, repeats)
+            results.append({
+                "model": name, "batch_rows": n_rows,
+                "sklearn_ms": round(sklearn_seconds * 1000, 3), "compiled_ms": round(compiled_seconds * 1000, 3),
+                "speedup": round(sklearn_seconds / max(compiled_seconds, 1e-9), 2),
+                "identical": bool(np.array_equal(model.predict(X), compiled_model.predict(X))),
+            })
+            print(results[-1])
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-rows", type=int, nargs="+", default=[1, 10, 100, 1_000, 10_000, 100_000])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    run(args.batch_rows, args.repeats)
@@ -2,16 +2,25 @@ from networksecurity.exception.exception import NetworkSecurityException
 from networksecurity.logging.logger import logging
 
 # Configurations of the data ingestion:
-from networksecurity.entity.config_entity import DataIngestionConfig
+from networksecurity.entity.config_entity import DataIngestionConfig, table_file_name
 from networksecurity.entity.artifact_entity import DataIngestionArtifact
+from networksecurity.constants.training_pipeline import (SCHEMA_FILE_PATH, OUT_OF_CORE_CHUNK_BYTES_PER_VALUE,
+                                                         OUT_OF_CORE_CHUNK_MEMORY_SHARE)
+from networksecurity.utils.main_utils.utils import (get_schema_dtypes, read_data, write_data, table_writer,
+                                                    rows_within_memory, stable_test_mask)
+from networksecurity.utils.main_utils.artifact_writer import ArtifactWriter
 
 
 import os
 import sys
+import time
+import hashlib
 import numpy as np
 import pandas as pd
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from bson import ObjectId, json_util
 from pymongo  import MongoClient
-from sklearn.model_selection import train_test_split
 from dotenv import load_dotenv
 
 
@@ -23,34 +32,369 @@ MONGO_DB_URL = os.getenv("MONGO_DB_URL")
 
 
 
+class _ColumnBuffers:
+    """
+    Preallocated typed column buffers that batches of documents are written into: the values of
+    every nullable column (e.g. Int8) in a NumPy array of its type plus a missing-value mask, grown
+    by doubling if more documents come than were allocated for.
+    Missing values are absent fields, nulls and "na" strings (how the collection stores them).
+    """
+    def __init__(self, dtypes:dict, capacity:int):
+        self.dtypes = {column: pd.api.types.pandas_dtype(dtype) for column, dtype in dtypes.items()}
+        self.n_rows = 0
+        self.present = dict.fromkeys(dtypes, False)
+        capacity = max(capacity, 1)
+        self.values = {column: np.empty(capacity, dtype=self._numpy_dtype(dtype)) for column, dtype in self.dtypes.items()}
+        self.missing = {column: np.empty(capacity, dtype=bool) for column in self.dtypes}
+
+
+    @staticmethod
+    def _numpy_dtype(dtype):
+        # Masked (nullable) dtypes keep their values in a NumPy array of `numpy_dtype`; others go through float64.
+        return dtype.numpy_dtype if isinstance(dtype, pd.api.extensions.ExtensionDtype) and \
+            hasattr(dtype, "numpy_dtype") else np.float64
+
+
+    @staticmethod
+    def _to_float(raw:list) -> np.ndarray:
+        try:
+            return np.array(raw, dtype=np.float64)   # None -> NaN
+        except (TypeError, ValueError):
+            values = np.array(raw, dtype=object)
+            values[values == "na"] = None
+            return values.astype(np.float64)
+
+
+    def _reserve(self, n_rows:int) -> None:
+        capacity = len(next(iter(self.missing.values())))
+        if n_rows <= capacity:
+            return
+        capacity = max(n_rows, capacity * 2)
+        for column in self.dtypes:
+            self.values[column] = np.resize(self.values[column], capacity)
+            self.missing[column] = np.resize(self.missing[column], capacity)
+
+
+    def append(self, documents:list) -> None:
+        self._reserve(self.n_rows + len(documents))
+        rows = slice(self.n_rows, self.n_rows + len(documents))
+        for column in self.dtypes:
+            if not self.present[column]:
+                self.present[column] = any(column in document for document in documents)
+            floats = self._to_float([document.get(column) for document in documents])
+            missing = np.isnan(floats)
+            values = self.values[column]
+            present_values = floats[~missing]
+            # The same check as pandas' astype to an integer type: no fractions, nothing out of range.
+            if present_values.size and not np.array_equal(present_values.astype(values.dtype), present_values):
+                raise ValueError(f"Column {column} has values that are not {self.dtypes[column]}.")
+            values[rows] = np.where(missing, 0, floats)
+            self.missing[column][rows] = missing
+        self.n_rows += len(documents)
+
+
+    def to_frame(self, columns:list=None) -> pd.DataFrame:
+        """
+        The buffered rows as a DataFrame of `columns` (default: the columns present in any document).
+        """
+        columns = [column for column in self.dtypes if self.present[column]] if columns is None else columns
+        data = {}
+        for column in columns:
+            dtype, values, missing = self.dtypes[column], self.values[column][:self.n_rows], self.missing[column][:self.n_rows]
+            if isinstance(dtype, pd.api.extensions.ExtensionDtype) and hasattr(dtype, "numpy_dtype"):
+                data[column] = dtype.construct_array_type()(values, missing)
+            else:
+                data[column] = pd.Series(np.where(missing, np.nan, values)).astype(dtype)
+        return pd.DataFrame(data, index=pd.RangeIndex(self.n_rows))
+
+
+    def clear(self) -> None:
+        self.n_rows = 0
+
+
+
 class DataIngestion:
-    def __init__(self, data_ingestion_config: DataIngestionConfig):
+    def __init__(self, data_ingestion_config: DataIngestionConfig, mongo_client=None, artifact_writer:ArtifactWriter=None):
+        """
+        mongo_client: the client to export the collection with (default: one for MONGO_DB_URL, made
+        when needed), e.g. a local mongod's or a stand-in with the same find / count interface.
+        artifact_writer: writes the Feature Store file and the train / test files (default: right away).
+        """
         try:
             self.data_ingestion_config = data_ingestion_config
+            self.mongo_client = mongo_client
+            self.artifact_writer = artifact_writer or ArtifactWriter()
+            # Seconds, rows and rows/sec of the last collection export:
+            self.export_metrics = {}
         except Exception as e:
             raise NetworkSecurityException(e, sys)
-        
-    
+
+
+    def _collection(self):
+        if self.mongo_client is None:
+            self.mongo_client = MongoClient(MONGO_DB_URL)
+        return self.mongo_client[self.data_ingestion_config.database_name][self.data_ingestion_config.collection_name]
+
+
+    def _id_ranges(self, collection, n_ranges:int) -> list:
+        """
+        `n_ranges` disjoint `_id` filters covering the collection, split at `_id` quantiles (one filter
+        matching everything for a single range or a small collection).
+        """
+        n_documents = collection.estimated_document_count()
+        if n_ranges <= 1 or n_documents < n_ranges * self.data_ingestion_config.export_batch_size:
+            return [{}]
+        boundaries = []
+        for index in range(1, n_ranges):
+            document = next(iter(collection.find({}, {"_id": 1}, sort=[("_id", 1)],
+                                                 skip=index * n_documents // n_ranges, limit=1)), None)
+            if document is not None and (not boundaries or document["_id"] > boundaries[-1]):
+                boundaries.append(document["_id"])
+        lower_bounds, upper_bounds = [None] + boundaries, boundaries + [None]
+        return [{"_id": {**({"$gte": lower} if lower is not None else {}), **({"$lt": upper} if upper is not None else {})}}
+                for lower, upper in zip(lower_bounds, upper_bounds)]
+
+
+    def _export_batches(self, collection, id_filter:dict, schema_dtypes:dict, fields:tuple=()):
+        """
+        Yields the documents matching `id_filter` in lists of `export_batch_size`, projected to the
+        schema columns and `fields` (one round trip to the server per batch).
+        """
+        batch_size = self.data_ingestion_config.export_batch_size
+        projection = {"_id": 0, **{column: 1 for column in schema_dtypes}, **{field: 1 for field in fields}}
+        batch = []
+        for document in collection.find(id_filter, projection, batch_size=batch_size):
+            batch.append(document)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+    def _export_range(self, collection, id_filter:dict, schema_dtypes:dict, capacity:int) -> _ColumnBuffers:
+        buffers = _ColumnBuffers(schema_dtypes, capacity)
+        for batch in self._export_batches(collection, id_filter, schema_dtypes):
+            buffers.append(batch)
+        return buffers
+
+
+    def _record_export(self, n_rows:int, seconds:float, n_workers:int) -> None:
+        self.export_metrics = {"export_rows": n_rows, "export_seconds": round(seconds, 3),
+                               "export_rows_per_sec": round(n_rows / seconds) if seconds > 0 else None,
+                               "export_workers": n_workers}
+        logging.info(f"Exported the collection: {self.export_metrics}")
+
 
     def export_collection_as_df(self):
         """
         Loads Collection from MongoDB as a Pandas DataFrame:
+        only the schema columns, read in large cursor batches straight into typed column buffers
+        (nullable int8). With `export_workers` > 1, disjoint `_id` ranges are read in parallel and
+        their rows concatenated in `_id` range order.
         """
         
         try:
-            database_name = self.data_ingestion_config.database_name
-            collection_name = self.data_ingestion_config.collection_name
-            self.mongo_client = MongoClient(MONGO_DB_URL)
-            collection = self.mongo_client[database_name][collection_name]
-            df = pd.DataFrame(list(collection.find()))
-            
+            start = time.perf_counter()
+            collection = self._collection()
+            schema_dtypes = get_schema_dtypes(SCHEMA_FILE_PATH)
+            id_filters = self._id_ranges(collection, self.data_ingestion_config.export_workers)
+            capacity = int(collection.estimated_document_count() / len(id_filters) * 1.05) + 1
+            if len(id_filters) == 1:
+                buffers = [self._export_range(collection, id_filters[0], schema_dtypes, capacity)]
+            else:
+                with ThreadPoolExecutor(max_workers=len(id_filters)) as executor:
+                    buffers = list(executor.map(lambda id_filter: self._export_range(collection, id_filter,
+                                                                                     schema_dtypes, capacity),
+                                                id_filters))
+            columns = [column for column in schema_dtypes if any(buffer.present[column] for buffer in buffers)]
+            df = buffers[0].to_frame(columns) if len(buffers) == 1 else \
+                pd.concat([buffer.to_frame(columns) for buffer in buffers], ignore_index=True)
+            self._record_export(len(df), time.perf_counter() - start, len(id_filters))
+            return df
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
 
 
-            if "_id" in df.columns.to_list():
-                df = df.drop(columns=["_id"])
-            
-            df.replace({"na": np.nan}, inplace=True)
-            return df
+    def _chunk_rows(self) -> int:
+        return rows_within_memory(self.data_ingestion_config.memory_cap_mb, len(get_schema_dtypes(SCHEMA_FILE_PATH)),
+                                  OUT_OF_CORE_CHUNK_BYTES_PER_VALUE, OUT_OF_CORE_CHUNK_MEMORY_SHARE)
+
+
+    def _export_to_table(self, collection, query:dict, file_path:str, watermark_field:str=None) -> tuple:
+        """
+        Streams the documents matching `query` into a table file (in the format of its extension), one
+        chunk of documents at a time (projected and buffered as in `export_collection_as_df`). Returns the
+        number of rows, and the largest `watermark_field` value among the documents (None without the field).
+        """
+        chunk_rows = self._chunk_rows()
+        schema_dtypes = get_schema_dtypes(SCHEMA_FILE_PATH)
+
+        n_rows, columns, watermark = 0, None, None
+        buffers = _ColumnBuffers(schema_dtypes, chunk_rows)
+        with table_writer(file_path) as write:
+            def write_chunk():
+                nonlocal n_rows, columns
+                chunk = buffers.to_frame(columns)
+                # Every chunk in the columns of the first one.
+                columns = chunk.columns.to_list() if columns is None else columns
+                write(chunk)
+                n_rows += len(chunk)
+                buffers.clear()
+
+            fields = (watermark_field,) if watermark_field else ()
+            for batch in self._export_batches(collection, query, schema_dtypes, fields):
+                if watermark_field:
+                    values = [document[watermark_field] for document in batch if document.get(watermark_field) is not None]
+                    if values:
+                        watermark = max(values) if watermark is None else max(watermark, max(values))
+                buffers.append(batch)
+                if buffers.n_rows >= chunk_rows:
+                    write_chunk()
+            if buffers.n_rows:
+                write_chunk()
+        logging.info(f"Exported {n_rows} rows to {file_path} in chunks of {chunk_rows}.")
+        return n_rows, watermark
+
+
+    def export_collection_to_feature_store(self) -> int:
+        """
+        Out-of-core mode: streams the collection into the Feature Store file, one chunk of documents
+        at a time, and returns the number of rows.
+        """
+        try:
+            start = time.perf_counter()
+            n_rows, _ = self._export_to_table(self._collection(), {}, self.data_ingestion_config.feature_store_file_path)
+            self._record_export(n_rows, time.perf_counter() - start, 1)
+            return n_rows
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
+    def read_feature_store_manifest(self) -> dict:
+        """
+        The manifest of the partitioned Feature Store: the collection and watermark field it follows, the
+        watermark, the documents without the field the first partition took, and the partitions (file name,
+        rows, watermark after it, when it was ingested), oldest first.
+        """
+        try:
+            config = self.data_ingestion_config
+            source = {"database": config.database_name, "collection": config.collection_name,
+                      "watermark_field": config.watermark_field}
+            if not os.path.exists(config.feature_store_manifest_file_path):
+                return dict(source, watermark=None, partitions=[])
+            with open(config.feature_store_manifest_file_path) as file_obj:
+                manifest = json_util.loads(file_obj.read())
+            followed = {key: manifest.get(key) for key in source}
+            if followed != source:
+                raise ValueError(f"The Feature Store in {config.partitioned_feature_store_dir} follows {followed}, not {source}.")
+            return manifest
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
+    def _write_feature_store_manifest(self, manifest:dict) -> None:
+        manifest_file_path = self.data_ingestion_config.feature_store_manifest_file_path
+        temp_file_path = f"{manifest_file_path}.tmp"
+        with open(temp_file_path, "w") as file_obj:
+            file_obj.write(json_util.dumps(manifest, indent=2))
+        os.replace(temp_file_path, manifest_file_path)
+
+
+    def _watermark_query(self, watermark) -> tuple:
+        """
+        The filter of the documents after `watermark` (every document if None) and before the lag cutoff,
+        and that cutoff.
+        """
+        config = self.data_ingestion_config
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=config.watermark_lag_seconds)
+        if config.watermark_field == "_id":
+            cutoff = ObjectId.from_datetime(cutoff)
+        if watermark is None:
+            # Documents without the field too (written before it was stamped).
+            return {config.watermark_field: {"$not": {"$gte": cutoff}}}, cutoff
+        return {config.watermark_field: {"$gt": watermark, "$lt": cutoff}}, cutoff
+
+
+    def _count_unstamped(self, collection) -> int:
+        # Documents without the watermark field (every document has an _id).
+        watermark_field = self.data_ingestion_config.watermark_field
+        if watermark_field == "_id":
+            return 0
+        return collection.count_documents({watermark_field: {"$exists": False}})
+
+
+    def ingest_new_partition(self):
+        """
+        Incremental ingestion: streams the documents newer than the watermark (and older than the lag
+        cutoff) into a new partition of the Feature Store, then moves the watermark up to the newest of
+        them. Returns the partition's manifest entry (None if there was nothing new).
+        """
+        try:
+            start = time.perf_counter()
+            config = self.data_ingestion_config
+            manifest = self.read_feature_store_manifest()
+            query, cutoff = self._watermark_query(manifest["watermark"])
+            collection = self._collection()
+            # Only the first run takes documents without the field: count those written since.
+            n_unstamped = self._count_unstamped(collection)
+            if manifest["watermark"] is not None and n_unstamped > manifest.get("unstamped_documents", 0):
+                logging.warning(f"{n_unstamped - manifest.get('unstamped_documents', 0)} documents without the "
+                                f"{config.watermark_field} field were written after the first run: they are not ingested.")
+            file_name = table_file_name(f"part-{len(manifest['partitions']):05d}", config.table_format)
+            file_path = os.path.join(config.partitioned_feature_store_dir, file_name)
+            # Written aside (hidden) first: an interrupted export leaves neither a partition nor a moved watermark.
+            temp_file_path = os.path.join(config.partitioned_feature_store_dir, f".{file_name}")
+            n_rows, watermark = self._export_to_table(collection, query, temp_file_path, config.watermark_field)
+            self._record_export(n_rows, time.perf_counter() - start, 1)
+            if n_rows == 0:
+                if os.path.exists(temp_file_path):
+                    os.remove(temp_file_path)
+                logging.info(f"No documents after the watermark {manifest['watermark']}.")
+                return None
+            os.replace(temp_file_path, file_path)
+            # Documents none of which has the field are all older than the cutoff.
+            partition = {"file_name": file_name, "rows": n_rows, "watermark": cutoff if watermark is None else watermark,
+                         "ingested_at": datetime.now(timezone.utc)}
+            manifest["partitions"].append(partition)
+            if manifest["watermark"] is None:
+                manifest["unstamped_documents"] = n_unstamped
+            manifest["watermark"] = partition["watermark"]
+            self._write_feature_store_manifest(manifest)
+            logging.info(f"Added partition {file_name} ({n_rows} rows) to the Feature Store, watermark {manifest['watermark']}.")
+            return partition
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
+    def training_partitions(self) -> list:
+        """
+        The manifest entries of the partitions to train on: all of them, or the `training_window_partitions`
+        most recent.
+        """
+        partitions = self.read_feature_store_manifest()["partitions"]
+        window = self.data_ingestion_config.training_window_partitions
+        return partitions[-window:] if window > 0 else partitions
+
+
+    @staticmethod
+    def partitions_digest(partitions:list) -> str:
+        # Partitions are never rewritten: their entries identify their content.
+        return hashlib.sha256(json_util.dumps(partitions, sort_keys=True).encode()).hexdigest()
+
+
+    def partition_file_paths(self, partitions:list) -> list:
+        if not partitions:
+            raise ValueError("The Feature Store has no partitions: no documents were ingested yet.")
+        return [os.path.join(self.data_ingestion_config.partitioned_feature_store_dir, partition["file_name"])
+                for partition in partitions]
+
+
+    def read_feature_store_partitions(self, partitions:list) -> pd.DataFrame:
+        try:
+            schema_dtypes = get_schema_dtypes(SCHEMA_FILE_PATH)
+            return pd.concat([read_data(file_path, dtypes=schema_dtypes) for file_path in self.partition_file_paths(partitions)],
+                             ignore_index=True)
         except Exception as e:
             raise NetworkSecurityException(e, sys)
         
@@ -62,11 +406,7 @@ class DataIngestion:
         Stores the DataFrame as a backup for re-building in Feature Store.
         """
         try:
-            feature_store_file_path = self.data_ingestion_config.feature_store_file_path
-            # Create the folder:
-            dir_path = os.path.dirname(feature_store_file_path)
-            os.makedirs(dir_path, exist_ok=True)
-            dataframe.to_csv(feature_store_file_path, index=False, header=True)
+            self.artifact_writer.submit(write_data, dataframe, self.data_ingestion_config.feature_store_file_path)
             return dataframe
         except Exception as e:
             raise NetworkSecurityException(e, sys)
@@ -76,41 +416,88 @@ class DataIngestion:
 
     def split_data_as_train_test(self, dataframe: pd.DataFrame):
         """
-        Splits the dataframe into train and test file
+        Splits the dataframe into train and test file, and returns both sets.
         """
 
         try:
             split_ratio =  self.data_ingestion_config.train_test_split_ratio
-            train_set, test_set = train_test_split(dataframe, test_size=split_ratio)
+            # Each row's split is decided by its values: the same data always gives the same split (and later
+            # stages can be reused), and a row stays in its split when partitions are added.
+            is_test = stable_test_mask(dataframe, split_ratio, seed=self.data_ingestion_config.random_state)
+            train_set, test_set = dataframe[~is_test], dataframe[is_test]
             logging.info(f"Train-Test split completed. Train: {(1-split_ratio)*100}% and Test: {split_ratio*100}%\n")
             logging.info("Exited the `split_data_as_train_test` method of DataIngestion Class.")
 
-            dir_path = os.path.dirname(self.data_ingestion_config.training_file_path)
-            os.makedirs(dir_path, exist_ok=True)
             logging.info("Exporting the train and test data.")
-            train_set.to_csv(self.data_ingestion_config.training_file_path, index=False, header=True)
-            test_set.to_csv(self.data_ingestion_config.testing_file_path, index=False, header=True)
-            logging.info("Exporting training and testind data completed.")
+            self.artifact_writer.submit(write_data, train_set, self.data_ingestion_config.training_file_path)
+            self.artifact_writer.submit(write_data, test_set, self.data_ingestion_config.testing_file_path)
+            return train_set, test_set
         except Exception as e:
             raise NetworkSecurityException(e, sys)
     
 
 
-    def initiate_data_ingestion(self):
+    def split_feature_store_in_chunks(self, file_paths:list=None):
         """
-        Triggers the entire data ingestion process.
+        Out-of-core mode: splits the Feature Store file (or the partition files `file_paths`) into the train
+        and test files chunk by chunk. Each row goes to the test file with probability `train_test_split_ratio`,
+        decided by its values as in `split_data_as_train_test`.
         """
         try:
-            df = self.export_collection_as_df()
+            config = self.data_ingestion_config
+            schema_dtypes = get_schema_dtypes(SCHEMA_FILE_PATH)
+            chunks = (chunk for file_path in (file_paths or [config.feature_store_file_path])
+                      for chunk in read_data(file_path, dtypes=schema_dtypes, chunk_rows=self._chunk_rows()))
+            with table_writer(config.training_file_path) as write_train, table_writer(config.testing_file_path) as write_test:
+                for chunk in chunks:
+                    is_test = stable_test_mask(chunk, config.train_test_split_ratio, seed=config.random_state)
+                    write_train(chunk[~is_test])
+                    write_test(chunk[is_test])
+            logging.info("Train-Test split of the Feature Store completed.")
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
+
+    def initiate_data_ingestion(self, dataframe:pd.DataFrame=None, partitions:list=None):
+        """
+        Triggers the entire data ingestion process. `dataframe` is the already exported collection, if any.
+        In out-of-core mode the collection is streamed to the Feature Store (unless it already was) and
+        split from there, never loaded whole.
+        In incremental mode the new documents are added to the partitioned Feature Store (unless
+        `partitions`, the ones to train on, are given), and the training partitions are split.
+        With in-memory handoff, the artifact also carries the train and test sets.
+        """
+        try:
+            if self.data_ingestion_config.incremental:
+                if partitions is None:
+                    self.ingest_new_partition()
+                    partitions = self.training_partitions()
+                if self.data_ingestion_config.out_of_core:
+                    self.split_feature_store_in_chunks(self.partition_file_paths(partitions))
+                    return self._artifact()
+                dataframe = self.read_feature_store_partitions(partitions)
+                return self._artifact(*self.split_data_as_train_test(dataframe=dataframe))
+
+            if self.data_ingestion_config.out_of_core:
+                if not os.path.exists(self.data_ingestion_config.feature_store_file_path):
+                    self.export_collection_to_feature_store()
+                self.split_feature_store_in_chunks()
+                return self._artifact()
+
+            df = self.export_collection_as_df() if dataframe is None else dataframe
             dataframe = self.export_data_into_feature_store(dataframe=df)
-            self.split_data_as_train_test(dataframe=dataframe)
-            data_ingestion_artifact = DataIngestionArtifact(
-                trained_file_path=self.data_ingestion_config.training_file_path,
-                test_file_path=self.data_ingestion_config.testing_file_path
-            )
-            return data_ingestion_artifact
+            return self._artifact(*self.split_data_as_train_test(dataframe=dataframe))
         except Exception as e:
             raise NetworkSecurityException(e, sys)
+
+
+    def _artifact(self, train_set:pd.DataFrame=None, test_set:pd.DataFrame=None) -> DataIngestionArtifact:
+        handoff = self.data_ingestion_config.in_memory_handoff
+        return DataIngestionArtifact(trained_file_path=self.data_ingestion_config.training_file_path,
+                                     test_file_path=self.data_ingestion_config.testing_file_path,
+                                     train_dataframe=train_set if handoff else None,
+                                     test_dataframe=test_set if handoff else None)
         
 
 
@@ -1,11 +1,17 @@
+import os
 import sys
 import numpy as np
-from networksecurity.utils.main_utils.utils import save_numpy_array_data, save_obj_to_pkl, read_data
+import pandas as pd
+from networksecurity.utils.main_utils.utils import (save_numpy_array_data, save_obj_to_pkl, read_data,
+                                                    get_schema_dtypes, to_int8_features, from_int8_features,
+                                                    count_table_rows, rows_within_memory)
 from networksecurity.entity.artifact_entity import DataValidationArtifact, DataTransformationArtifact
 from networksecurity.entity.config_entity import DataTransformationConfig
-from sklearn.impute import KNNImputer
+from networksecurity.utils.main_utils.artifact_writer import ArtifactWriter
 from sklearn.pipeline import Pipeline
-from networksecurity.constants.training_pipeline import TARGET_COLUMN, DATA_TRANSFORMATION_IMPUTER_PARAMS
+from networksecurity.utils.ml_utils.model.imputer import make_imputer
+from networksecurity.constants.training_pipeline import (TARGET_COLUMN, DATA_TRANSFORMATION_IMPUTER_STRATEGY, SCHEMA_FILE_PATH,
+                                                         OUT_OF_CORE_CHUNK_BYTES_PER_VALUE, OUT_OF_CORE_CHUNK_MEMORY_SHARE)
 from networksecurity.logging.logger import logging
 from networksecurity.exception.exception import NetworkSecurityException
 
@@ -13,64 +19,149 @@ from networksecurity.exception.exception import NetworkSecurityException
 
 class DataTransformation:
     def __init__(self, data_validation_artifact:DataValidationArtifact,
-                 data_transformation_config: DataTransformationConfig):
+                 data_transformation_config: DataTransformationConfig, artifact_writer:ArtifactWriter=None):
+        """
+        artifact_writer: writes the arrays and the pre-processor (default: right away).
+        """
         try:
             self.data_validation_artifact = data_validation_artifact
             self.data_transformation_config = data_transformation_config
+            self.artifact_writer = artifact_writer or ArtifactWriter()
         except Exception as e:
             raise NetworkSecurityException(e, sys)
     
     @classmethod   # Is used so that this method can be called without creating an instance of the class: Ex: (`DataTransformation.get_data_transformer_object()`)
-    def get_data_transformer_object(cls) -> Pipeline:
+    def get_data_transformer_object(cls, imputer_strategy:str=DATA_TRANSFORMATION_IMPUTER_STRATEGY) -> Pipeline:
         logging.info("Entered the get_data_transformer_object method of the DataTransformation Class")
         try:
-            knn_imputer = KNNImputer(**DATA_TRANSFORMATION_IMPUTER_PARAMS)
-            processor = Pipeline(steps=[("KNNImputer", knn_imputer)])
+            processor = make_imputer(imputer_strategy)
+            logging.info(f"Imputer strategy: {imputer_strategy}")
             return processor
         except Exception as e:
             raise NetworkSecurityException(e, sys)
         
         
 
+    def _table_to_int8_arrays(self, table_file_path:str, features_file_path:str, labels_file_path:str,
+                              schema_dtypes:dict, chunk_rows:int) -> np.memmap:
+        """
+        Streams a table file (CSV, Parquet or Arrow) into memory-mapped .npy files (the same int8 features
+        and labels as the in-memory path writes) and returns the features, memory-mapped read-only.
+        """
+        n_rows = count_table_rows(table_file_path)
+        feature_columns = [column for column in schema_dtypes if column != TARGET_COLUMN]
+        for file_path in (features_file_path, labels_file_path):
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        features = np.lib.format.open_memmap(features_file_path, mode="w+", dtype=np.int8,
+                                             shape=(n_rows, len(feature_columns)))
+        labels = np.lib.format.open_memmap(labels_file_path, mode="w+", dtype=np.int8, shape=(n_rows,))
+        start = 0
+        for chunk in read_data(table_file_path, dtypes=schema_dtypes, chunk_rows=chunk_rows):
+            features[start:start + len(chunk)] = to_int8_features(chunk[feature_columns])
+            labels[start:start + len(chunk)] = chunk[TARGET_COLUMN].replace(-1, 0).to_numpy(dtype=np.int8)
+            start += len(chunk)
+        features.flush()
+        labels.flush()
+        del features, labels
+        return np.load(features_file_path, mmap_mode="r")
+
+
+    def initiate_data_transformation_out_of_core(self) -> DataTransformationArtifact:
+        """
+        Out-of-core mode: converts the train and test files chunk by chunk into memory-mapped int8 arrays and fits the
+        imputer on a random sample of the training rows (the KNN imputers keep the rows they are fitted on).
+        """
+        try:
+            config = self.data_transformation_config
+            schema_dtypes = get_schema_dtypes(SCHEMA_FILE_PATH)
+            chunk_rows = rows_within_memory(config.memory_cap_mb, len(schema_dtypes),
+                                            OUT_OF_CORE_CHUNK_BYTES_PER_VALUE, OUT_OF_CORE_CHUNK_MEMORY_SHARE)
+            X_train = self._table_to_int8_arrays(self.data_validation_artifact.valid_train_file_path,
+                                               config.transformed_train_file_path,
+                                               config.transformed_train_label_file_path, schema_dtypes, chunk_rows)
+            self._table_to_int8_arrays(self.data_validation_artifact.valid_test_file_path,
+                                     config.transformed_test_file_path,
+                                     config.transformed_test_label_file_path, schema_dtypes, chunk_rows)
+
+            rng = np.random.default_rng(config.random_state)
+            sample_rows = np.sort(rng.choice(len(X_train), size=min(config.imputer_sample_rows, len(X_train)), replace=False))
+            feature_columns = [column for column in schema_dtypes if column != TARGET_COLUMN]
+            imputer = DataTransformation.get_data_transformer_object(config.imputer_strategy)
+            imputer.fit(pd.DataFrame(from_int8_features(X_train[sample_rows]), columns=feature_columns))
+            logging.info(f"Fitted the imputer on {len(sample_rows)} of {len(X_train)} training rows.")
+            save_obj_to_pkl(file_path=config.transformed_object_file_path, obj=imputer)
+
+            return DataTransformationArtifact(
+                transformed_object_file_path=config.transformed_object_file_path,
+                transformed_train_file_path=config.transformed_train_file_path,
+                transformed_test_file_path=config.transformed_test_file_path,
+                transformed_train_label_file_path=config.transformed_train_label_file_path,
+                transformed_test_label_file_path=config.transformed_test_label_file_path
+            )
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
     def initiate_data_transformation(self) -> DataTransformationArtifact:
         logging.info("Entered initiate_data_transformation method of DataTransformation Class")
         try:
+            if self.data_transformation_config.out_of_core:
+                return self.initiate_data_transformation_out_of_core()
+
             logging.info("Starting Data Transformation")
-            # 1. Read the training and testing data:
-            train_df = read_data(self.data_validation_artifact.valid_train_file_path)
-            test_df = read_data(self.data_validation_artifact.valid_test_file_path)
+            # 1. Read the training and testing data (nullable int8 columns, see the schema), unless handed over in memory:
+            schema_dtypes = get_schema_dtypes(SCHEMA_FILE_PATH)
+            train_df = self.data_validation_artifact.train_dataframe
+            test_df = self.data_validation_artifact.test_dataframe
+            if train_df is None or test_df is None:
+                train_df = read_data(self.data_validation_artifact.valid_train_file_path, dtypes=schema_dtypes)
+                test_df = read_data(self.data_validation_artifact.valid_test_file_path, dtypes=schema_dtypes)
 
-            X_train = train_df.drop(columns=[TARGET_COLUMN], axis=1)
+            X_train = train_df.drop(columns=[TARGET_COLUMN])
             y_train = train_df[TARGET_COLUMN]
             y_train = y_train.replace(-1, 0)
 
-            X_test = test_df.drop(columns=[TARGET_COLUMN], axis=1)
+            X_test = test_df.drop(columns=[TARGET_COLUMN])
             y_test = test_df[TARGET_COLUMN]
             y_test = y_test.replace(-1, 0)
 
-            # 2. Getting the pre-processor:
-            knn_imputer = DataTransformation.get_data_transformer_object()
-            X_train = knn_imputer.fit_transform(X_train)
-            X_test = knn_imputer.transform(X_test)
+            # 2. Fitting the pre-processor (float32 holds the small integers exactly, at half the size of float64):
+            imputer = DataTransformation.get_data_transformer_object(self.data_transformation_config.imputer_strategy)
+            imputer.fit(X_train.astype(np.float32))
 
-            # 3. Convert the transformed data as an array:
-            X_train_arr = np.c_[X_train, np.array(y_train)]
-            X_test_arr = np.c_[X_test, np.array(y_test)]
+            # 3. Convert the data to compact arrays: int8 features (missing values kept as a sentinel and
+            #    imputed by the trainer with the pre-processor) and a separate int8 label vector:
+            X_train_arr = to_int8_features(X_train)
+            X_test_arr = to_int8_features(X_test)
+            y_train_arr = y_train.to_numpy(dtype=np.int8)
+            y_test_arr = y_test.to_numpy(dtype=np.int8)
 
 
             # 4. Save the pre-processor and the arrays:
-            save_numpy_array_data(file_path=self.data_transformation_config.transformed_train_file_path, 
-                                  array=X_train_arr)
-            save_numpy_array_data(file_path=self.data_transformation_config.transformed_test_file_path,
-                                  array=X_test_arr)
-            save_obj_to_pkl(file_path=self.data_transformation_config.transformed_object_file_path, obj=knn_imputer)
+            write = self.artifact_writer.submit
+            write(save_numpy_array_data, file_path=self.data_transformation_config.transformed_train_file_path, 
+                  array=X_train_arr)
+            write(save_numpy_array_data, file_path=self.data_transformation_config.transformed_test_file_path,
+                  array=X_test_arr)
+            write(save_numpy_array_data, file_path=self.data_transformation_config.transformed_train_label_file_path,
+                  array=y_train_arr)
+            write(save_numpy_array_data, file_path=self.data_transformation_config.transformed_test_label_file_path,
+                  array=y_test_arr)
+            # The imputer goes on to the trainer in memory, a copy is written:
+            write(save_obj_to_pkl, file_path=self.data_transformation_config.transformed_object_file_path,
+                  obj=self.artifact_writer.snapshot(imputer))
 
 
-            # 5. Preparing the artifacts:
+            # 5. Preparing the artifacts (with the pre-processor and the arrays themselves for in-memory handoff):
+            handoff = self.data_transformation_config.in_memory_handoff
             data_transformation_artifacts = DataTransformationArtifact(
                 transformed_object_file_path=self.data_transformation_config.transformed_object_file_path,
                 transformed_train_file_path=self.data_transformation_config.transformed_train_file_path,
-                transformed_test_file_path=self.data_transformation_config.transformed_test_file_path
+                transformed_test_file_path=self.data_transformation_config.transformed_test_file_path,
+                transformed_train_label_file_path=self.data_transformation_config.transformed_train_label_file_path,
+                transformed_test_label_file_path=self.data_transformation_config.transformed_test_label_file_path,
+                **(dict(preprocessor=imputer, train_features=X_train_arr, test_features=X_test_arr,
+                        train_labels=y_train_arr, test_labels=y_test_arr) if handoff else {})
             )
             return data_transformation_artifacts
         
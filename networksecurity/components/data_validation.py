@@ -2,20 +2,29 @@ from networksecurity.entity.artifact_entity import DataIngestionArtifact, DataVa
 from networksecurity.entity.config_entity import DataValidationConfig
 from networksecurity.exception.exception import NetworkSecurityException
 from networksecurity.logging.logger import logging
-from networksecurity.constants.training_pipeline import SCHEMA_FILE_PATH
-from networksecurity.utils.main_utils.utils import read_data, read_yaml_file, write_yaml_file
+from networksecurity.constants.training_pipeline import (SCHEMA_FILE_PATH, OUT_OF_CORE_CHUNK_BYTES_PER_VALUE,
+                                                         OUT_OF_CORE_CHUNK_MEMORY_SHARE)
+from networksecurity.utils.main_utils.utils import (read_data, write_data, read_table_columns, read_yaml_file,
+                                                    write_yaml_file, get_schema_dtypes, ks_2samp_from_counts,
+                                                    rows_within_memory)
+from networksecurity.utils.main_utils.artifact_writer import ArtifactWriter
 from scipy.stats import ks_2samp
+import numpy as np
 import pandas as pd
-import os, sys
+import os, sys, shutil
 
 
 
 class DataValidation:
     def __init__(self, data_ingestion_artifact:DataIngestionArtifact,
-                 data_validation_config: DataValidationConfig):
+                 data_validation_config: DataValidationConfig, artifact_writer:ArtifactWriter=None):
+        """
+        artifact_writer: writes the validated train / test files (default: right away).
+        """
         try:
             self.data_ingestion_artifact = data_ingestion_artifact
             self.data_validation_config = data_validation_config
+            self.artifact_writer = artifact_writer or ArtifactWriter()
             self._schema_config = read_yaml_file(SCHEMA_FILE_PATH)
         except Exception as e:
             raise NetworkSecurityException(e, sys)
@@ -40,8 +49,9 @@ class DataValidation:
             data_validation_status = True  
             report = {}
             for column in base_df.columns:
-                d1 = base_df[column]
-                d2 = current_df[column]
+                # The columns are nullable int8; the KS test needs plain floats (NaN for missing):
+                d1 = base_df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+                d2 = current_df[column].to_numpy(dtype=np.float64, na_value=np.nan)
                 is_sample_distri_same = ks_2samp(d1, d2)
                 if is_sample_distri_same.pvalue > threshold:
                     # No data drift detected (We accept our NULL Hypothesis)
@@ -61,14 +71,90 @@ class DataValidation:
             raise NetworkSecurityException(e, sys)
         
     
+    def detect_data_drift_from_counts(self, base_counts:dict, current_counts:dict, threshold=0.05) -> bool:
+        """
+        Out-of-core version of `detect_data_drift`: the same KS test per column, from each column's
+        value counts ({column: pd.Series of counts by value}) over the present (non-missing) values.
+        """
+        try:
+            data_validation_status = True
+            report = {}
+            for column, counts in base_counts.items():
+                _, pvalue = ks_2samp_from_counts(counts, current_counts[column])
+                has_data_drift = not pvalue > threshold
+                if has_data_drift:
+                    data_validation_status = False
+                report.update({column: {
+                    "P-value": float(pvalue),
+                    "has_data_drift" : has_data_drift
+                }})
+            drift_report_file_path = self.data_validation_config.drift_report_file_path
+            os.makedirs(os.path.dirname(drift_report_file_path), exist_ok=True)
+            write_yaml_file(file_path=drift_report_file_path, content=report)
+            return data_validation_status
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
+    def _value_counts_in_chunks(self, file_path:str, schema_dtypes:dict) -> dict:
+        chunk_rows = rows_within_memory(self.data_validation_config.memory_cap_mb, len(schema_dtypes),
+                                        OUT_OF_CORE_CHUNK_BYTES_PER_VALUE, OUT_OF_CORE_CHUNK_MEMORY_SHARE)
+        value_counts = {}
+        for chunk in read_data(file_path, dtypes=schema_dtypes, chunk_rows=chunk_rows):
+            for column in chunk.columns:
+                counts = chunk[column].value_counts(dropna=True)
+                value_counts[column] = counts if column not in value_counts else value_counts[column].add(counts, fill_value=0)
+        return {column: counts.astype(np.int64) for column, counts in value_counts.items()}
+
+
+    def initiate_data_validation_out_of_core(self) -> DataValidationArtifact:
+        """
+        Out-of-core mode: checks the columns from the files' headers (schemas) and the drift from value counts
+        accumulated chunk by chunk, so the data is never loaded whole.
+        """
+        try:
+            train_file_path = self.data_ingestion_artifact.trained_file_path
+            test_file_path = self.data_ingestion_artifact.test_file_path
+            for file_path in (train_file_path, test_file_path):
+                if not self.validate_number_of_columns(dataframe=pd.DataFrame(columns=read_table_columns(file_path))):
+                    logging.info(f"The columns of {file_path} are not the same as the original data schema.")
+
+            schema_dtypes = get_schema_dtypes(SCHEMA_FILE_PATH)
+            data_validation_status = self.detect_data_drift_from_counts(
+                base_counts=self._value_counts_in_chunks(train_file_path, schema_dtypes),
+                current_counts=self._value_counts_in_chunks(test_file_path, schema_dtypes))
+
+            os.makedirs(os.path.dirname(self.data_validation_config.valid_train_file_path), exist_ok=True)
+            shutil.copyfile(train_file_path, self.data_validation_config.valid_train_file_path)
+            shutil.copyfile(test_file_path, self.data_validation_config.valid_test_file_path)
+
+            return DataValidationArtifact(
+                validation_status=data_validation_status,
+                valid_train_file_path=self.data_validation_config.valid_train_file_path,
+                valid_test_file_path=self.data_validation_config.valid_test_file_path,
+                invalid_train_file_path=None,
+                invalid_test_file_path=None,
+                drift_report_file_path=self.data_validation_config.drift_report_file_path
+            )
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
     def initiate_data_validation(self) -> DataValidationArtifact:
         try:
+            if self.data_validation_config.out_of_core:
+                return self.initiate_data_validation_out_of_core()
+
             train_file_path = self.data_ingestion_artifact.trained_file_path
             test_file_path = self.data_ingestion_artifact.test_file_path
 
-            # Read the training and the testing data:
-            train_df = read_data(train_file_path)
-            test_df = read_data(test_file_path)
+            # Read the training and the testing data (unless handed over in memory):
+            schema_dtypes = get_schema_dtypes(SCHEMA_FILE_PATH)
+            train_df = self.data_ingestion_artifact.train_dataframe
+            test_df = self.data_ingestion_artifact.test_dataframe
+            if train_df is None or test_df is None:
+                train_df = read_data(train_file_path, dtypes=schema_dtypes)
+                test_df = read_data(test_file_path, dtypes=schema_dtypes)
 
             # 1. Validate the number of columns:
             column_num_status = self.validate_number_of_columns(dataframe=train_df)
@@ -82,20 +168,20 @@ class DataValidation:
 
             # 2. Check the data drift:
             data_validation_status = self.detect_data_drift(base_df=train_df, current_df=test_df)
-            dir_path = os.path.dirname(self.data_validation_config.valid_train_file_path)
-            os.makedirs(dir_path, exist_ok=True)
-
-            train_df.to_csv(self.data_validation_config.valid_train_file_path, index=False, header=True)
+            self.artifact_writer.submit(write_data, train_df, self.data_validation_config.valid_train_file_path)
             
-            test_df.to_csv(self.data_validation_config.valid_test_file_path, index=False, header=True)
+            self.artifact_writer.submit(write_data, test_df, self.data_validation_config.valid_test_file_path)
 
+            handoff = self.data_validation_config.in_memory_handoff
             data_validation_artifact = DataValidationArtifact(
                 validation_status=data_validation_status,
-                valid_train_file_path=self.data_ingestion_artifact.trained_file_path,
-                valid_test_file_path=self.data_ingestion_artifact.test_file_path,
+                valid_train_file_path=self.data_validation_config.valid_train_file_path,
+                valid_test_file_path=self.data_validation_config.valid_test_file_path,
                 invalid_train_file_path=None,
                 invalid_test_file_path=None,
-                drift_report_file_path=self.data_validation_config.drift_report_file_path
+                drift_report_file_path=self.data_validation_config.drift_report_file_path,
+                train_dataframe=train_df if handoff else None,
+                test_dataframe=test_df if handoff else None
             )
             return data_validation_artifact
         
@@ -1,6 +1,9 @@
 from networksecurity.entity.artifact_entity import ModelTrainerArtifact, DataTransformationArtifact
 from networksecurity.entity.config_entity import ModelTrainerConfig
 import os
+import time
+import shutil
+import numpy as np
 import mlflow
 import joblib
 import sys
@@ -8,13 +11,26 @@ import dagshub
 from dotenv import load_dotenv
 from networksecurity.exception.exception import NetworkSecurityException
 from networksecurity.logging.logger import logging
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.tree import DecisionTreeClassifier
-from sklearn.ensemble import (AdaBoostClassifier, GradientBoostingClassifier, RandomForestClassifier)
-from networksecurity.utils.main_utils.utils import (load_object, evaluate_models, 
+from sklearn.ensemble import (AdaBoostClassifier, GradientBoostingClassifier, RandomForestClassifier,
+                              HistGradientBoostingClassifier)
+from sklearn.metrics import r2_score
+from networksecurity.utils.main_utils.utils import (load_object, evaluate_models, from_int8_features,
                                                     save_obj_to_pkl, load_numpy_arr_data, read_yaml_file)
 from networksecurity.utils.ml_utils.metric.classification_metric import get_classification_score
 from networksecurity.utils.ml_utils.model.estimator import NetworkModel
+from networksecurity.utils.ml_utils.model.imputer import (FastPathKNNImputer, passes_missing_values,
+                                                          allows_missing_values)
+from networksecurity.utils.ml_utils.model.incremental import (TRAINING_MODE_FULL, TRAINING_MODE_INCREMENTAL,
+                                                              WARM_START_MODELS, grow_ensemble, has_feature_drift,
+                                                              load_training_snapshot, new_row_mask,
+                                                              save_training_snapshot)
+from networksecurity.utils.ml_utils.model.out_of_core import (TRAINING_MODE_OUT_OF_CORE, impute_to_memmap, fit_in_chunks,
+                                                              fit_on_sample, predict_in_chunks)
+from networksecurity.utils.main_utils.utils import rows_within_memory
+from networksecurity.constants.training_pipeline import (OUT_OF_CORE_CHUNK_BYTES_PER_VALUE, OUT_OF_CORE_CHUNK_MEMORY_SHARE,
+                                                         OUT_OF_CORE_HIST_BYTES_PER_VALUE, OUT_OF_CORE_HIST_MEMORY_SHARE)
 
 
 
@@ -44,6 +60,8 @@ class ModelTrainer:
         try:
             self.model_trainer_config = model_trainer_config
             self.data_transformation_artifact = data_transformation_artifact
+            # Per-model search cost of the last full retrain (see evaluate_models):
+            self.candidate_metrics = {}
         except Exception as e:
             raise NetworkSecurityException(e, sys)
         
@@ -76,10 +94,16 @@ class ModelTrainer:
             "Logistic_Regression": LogisticRegression(verbose=1),
             "Ada_Boost": AdaBoostClassifier()
         }
+        models = self.models_for_preprocessor(models)
 
         params = read_yaml_file("parameters/params.yaml")
         model_report: dict = evaluate_models(X_train=X_train, y_train=y_train, 
-                                             X_test=X_test, y_test=y_test, models=models, params=params['model_params'])
+                                             X_test=X_test, y_test=y_test, models=models, params=params['model_params'],
+                                             n_jobs=self.model_trainer_config.search_n_jobs,
+                                             search_config=params.get('search'),
+                                             cache_dir=self.model_trainer_config.search_cache_dir,
+                                             cache_models=self.model_trainer_config.search_cache_models,
+                                             candidate_metrics=self.candidate_metrics)
         
 
 
@@ -88,10 +112,46 @@ class ModelTrainer:
         best_model_name = list(model_report.keys())[list(model_report.values()).index(best_model_score)]
         best_model = models[best_model_name]
 
-        preprocessor = load_object(file_path=self.data_transformation_artifact.transformed_object_file_path)
+        return self.publish_model(best_model, X_test=X_test, y_test=y_test, training_mode=TRAINING_MODE_FULL)
+
+
+    def _preprocessor(self):
+        # The fitted pre-processor, handed over in memory or loaded from its file (its arrays memory-mapped).
+        preprocessor = self.data_transformation_artifact.preprocessor
+        return preprocessor if preprocessor is not None else \
+            load_object(file_path=self.data_transformation_artifact.transformed_object_file_path, mmap_mode="r")
+
+
+    @staticmethod
+    def _transformed_array(array:np.ndarray, file_path:str) -> np.ndarray:
+        return array if array is not None else load_numpy_arr_data(file_path)
+
+
+    def models_for_preprocessor(self, models:dict) -> dict:
+        """
+        Leaves out the models that can't handle missing values when the pre-processor passes them
+        through (the "passthrough" imputer strategy).
+        """
+        preprocessor = self._preprocessor()
+        if not passes_missing_values(preprocessor):
+            return models
+        skipped = [model_name for model_name, model in models.items() if not allows_missing_values(model)]
+        if skipped:
+            logging.info(f"The pre-processor passes missing values through, leaving out {skipped}.")
+        return {model_name: model for model_name, model in models.items() if model_name not in skipped}
+
+
+    def publish_model(self, best_model, X_test, y_test, training_mode:str, y_pred=None) -> ModelTrainerArtifact:
+        """
+        y_pred: the model's predictions for y_test, when already made (out-of-core mode, where X_test
+        is only a sample of the test rows to compile the model with).
+        """
+        preprocessor = self._preprocessor()
         network_model = NetworkModel(preprocessor=preprocessor, model=best_model)
+        network_model.compile_model(X_test)
 
-        y_pred = network_model.predict(X_test)
+        if y_pred is None:
+            y_pred = network_model.predict(X_test)
         classification_report_test = get_classification_score(y_true=y_test, y_pred=y_pred)
         self.track_mlflow(best_model, classification_report_test)
 
@@ -100,35 +160,159 @@ class ModelTrainer:
 
        
         save_obj_to_pkl(self.model_trainer_config.trained_model_file_path, obj=network_model)
-        save_obj_to_pkl("final_model/model.pkl", network_model)
+        save_obj_to_pkl(self.model_trainer_config.published_model_file_path, network_model)
 
 
          # Model Trainer Artifact:
         model_trainer_artifact = ModelTrainerArtifact(trained_model_file_path=self.model_trainer_config.trained_model_file_path,
-                             test_metric_artifact=classification_report_test
+                             test_metric_artifact=classification_report_test,
+                             training_mode=training_mode
                              )
 
         return model_trainer_artifact
-    
+
+
+    def grow_published_model(self, X_train, y_train, X_raw, y_raw):
+        """
+        Incremental retraining: returns the published RandomForest / GradientBoosting model grown
+        (warm start) with the training rows added since it was built, or None, with the reason,
+        when a full retrain is needed instead.
+
+        X_raw, y_raw: every row of this run (train rows first, in the order of X_train), int8.
+        """
+        config = self.model_trainer_config
+        if not config.incremental_enabled:
+            return None, "incremental retraining is disabled"
+        snapshot_X, snapshot_y = load_training_snapshot(config.training_snapshot_file_path)
+        if snapshot_X is None or not os.path.exists(config.published_model_file_path):
+            return None, "no published model to grow"
+        published_model = load_object(config.published_model_file_path)
+        model = published_model.model
+        preprocessor = self._preprocessor()
+        if repr(published_model.preprocessor) != repr(preprocessor):
+            return None, "the pre-processor (imputer strategy) changed"
+        if not isinstance(model, WARM_START_MODELS):
+            return None, f"the published {type(model).__name__} cannot be grown with warm start"
+        if snapshot_X.shape[1] != X_raw.shape[1] or model.n_features_in_ != X_train.shape[1]:
+            return None, "the features changed"
+
+        new_rows = new_row_mask(X_raw, y_raw, snapshot_X, snapshot_y)
+        n_new_rows, n_old_rows = int(new_rows.sum()), len(X_raw) - int(new_rows.sum())
+        # Every row the published model was built from must still be there (a grown model can't unlearn rows).
+        if n_old_rows < len(snapshot_y):
+            return None, f"{len(snapshot_y) - n_old_rows} rows were removed or changed since the published model"
+        if n_new_rows < config.incremental_min_new_rows:
+            return None, f"only {n_new_rows} new rows"
+        if n_new_rows > config.incremental_max_new_fraction * len(snapshot_y):
+            return None, f"{n_new_rows} new rows is more than {config.incremental_max_new_fraction:.0%} of the data"
+        if has_feature_drift(snapshot_X, X_raw[new_rows], config.incremental_drift_threshold):
+            return None, "the new rows drifted from the published model's data"
+
+        new_train_rows = new_rows[:len(X_train)]
+        if not np.isin(model.classes_, y_train[new_train_rows]).all():
+            return None, "the new training rows don't cover every class"
+        try:
+            model = grow_ensemble(model, X_train[new_train_rows], y_train[new_train_rows],
+                                  growth=n_new_rows / len(snapshot_y))
+        except NetworkSecurityException as e:
+            return None, f"warm start failed: {e}"
+        return model, f"grown with {int(new_train_rows.sum())} new training rows"
+
+
+    def train_model_out_of_core(self) -> ModelTrainerArtifact:
+        """
+        Out-of-core mode: trains the candidates that don't need all the data in memory over the
+        memory-mapped arrays (imputed once, chunk by chunk, into float32 memory maps):
+        - SGD_Classifier: `partial_fit` passes over the training chunks,
+        - Hist_Gradient_Boosting: fitted on the random sample of rows that fits the memory cap,
+        and publishes the one with the best test score.
+        """
+        config = self.model_trainer_config
+        artifact = self.data_transformation_artifact
+        preprocessor = FastPathKNNImputer(load_object(artifact.transformed_object_file_path, mmap_mode="r"))
+        X_train_raw = load_numpy_arr_data(artifact.transformed_train_file_path, mmap_mode="r")
+        X_test_raw = load_numpy_arr_data(artifact.transformed_test_file_path, mmap_mode="r")
+        y_train = load_numpy_arr_data(artifact.transformed_train_label_file_path, mmap_mode="r")
+        y_test = load_numpy_arr_data(artifact.transformed_test_label_file_path)
+        n_features = X_train_raw.shape[1]
+        chunk_rows = rows_within_memory(config.memory_cap_mb, n_features, OUT_OF_CORE_CHUNK_BYTES_PER_VALUE,
+                                        OUT_OF_CORE_CHUNK_MEMORY_SHARE)
+        working_memory_mb = max(16, chunk_rows * n_features * OUT_OF_CORE_CHUNK_BYTES_PER_VALUE // (4 * 1024 * 1024))
+        try:
+            X_train = impute_to_memmap(preprocessor, X_train_raw, os.path.join(config.imputed_data_dir, "train.npy"),
+                                       chunk_rows, working_memory_mb)
+            X_test = impute_to_memmap(preprocessor, X_test_raw, os.path.join(config.imputed_data_dir, "test.npy"),
+                                      chunk_rows, working_memory_mb)
+
+            hist_rows = rows_within_memory(config.memory_cap_mb, n_features, OUT_OF_CORE_HIST_BYTES_PER_VALUE,
+                                           OUT_OF_CORE_HIST_MEMORY_SHARE)
+            candidates = self.models_for_preprocessor({
+                "SGD_Classifier": SGDClassifier(loss="log_loss", random_state=0),
+                "Hist_Gradient_Boosting": HistGradientBoostingClassifier(random_state=0),
+            })
+            train = {
+                "SGD_Classifier": lambda model: fit_in_chunks(model, X_train, y_train, chunk_rows,
+                                                              epochs=config.partial_fit_epochs),
+                "Hist_Gradient_Boosting": lambda model: fit_on_sample(model, X_train, y_train, max_rows=hist_rows),
+            }
+            models, predictions, model_report = {}, {}, {}
+            for model_name, model in candidates.items():
+                start = time.perf_counter()
+                models[model_name] = train[model_name](model)
+                fit_seconds = time.perf_counter() - start
+                predictions[model_name] = predict_in_chunks(models[model_name], X_test, chunk_rows)
+                model_report[model_name] = r2_score(y_test, predictions[model_name])
+                self.candidate_metrics[model_name] = {
+                    "wall_seconds": round(time.perf_counter() - start, 3),
+                    "fit_seconds": round(fit_seconds, 3),
+                    "rows": len(y_train),
+                    "rows_per_sec": round(len(y_train) / fit_seconds) if fit_seconds else None,
+                    "test_score": model_report[model_name],
+                }
+
+            best_model_name = max(model_report, key=model_report.get)
+            logging.info(f"Out-of-core candidates: {model_report}, publishing {best_model_name}.")
+            return self.publish_model(models[best_model_name], X_test=np.asarray(X_test[:chunk_rows]), y_test=y_test,
+                                      training_mode=TRAINING_MODE_OUT_OF_CORE, y_pred=predictions[best_model_name])
+        finally:
+            shutil.rmtree(config.imputed_data_dir, ignore_errors=True)
+
 
     def initiate_model_trainer(self) -> ModelTrainerArtifact:
         try:
-            train_file_path = self.data_transformation_artifact.transformed_train_file_path
-            test_file_path = self.data_transformation_artifact.transformed_test_file_path
+            if self.model_trainer_config.out_of_core:
+                model_trainer_artifact = self.train_model_out_of_core()
+                # The snapshot would need every row in memory; the next in-memory run retrains in full.
+                if os.path.exists(self.model_trainer_config.training_snapshot_file_path):
+                    os.remove(self.model_trainer_config.training_snapshot_file_path)
+                return model_trainer_artifact
 
-            # Load the data as array:
-            train_array = load_numpy_arr_data(train_file_path)
-            test_array = load_numpy_arr_data(test_file_path)
+            # Load the compact int8 arrays (unless handed over in memory) and impute the missing values with
+            # the fitted pre-processor:
+            artifact = self.data_transformation_artifact
+            preprocessor = FastPathKNNImputer(self._preprocessor())
+            X_train_raw = self._transformed_array(artifact.train_features, artifact.transformed_train_file_path)
+            X_test_raw = self._transformed_array(artifact.test_features, artifact.transformed_test_file_path)
+            X_train, X_test = (preprocessor.transform(from_int8_features(X_raw)).astype(np.float32)
+                               for X_raw in (X_train_raw, X_test_raw))
+            y_train = self._transformed_array(artifact.train_labels, artifact.transformed_train_label_file_path)
+            y_test = self._transformed_array(artifact.test_labels, artifact.transformed_test_label_file_path)
 
-            X_train, y_train, X_test, y_test = (
-                train_array[:, :-1],
-                train_array[:, -1],
-                test_array[:, :-1],
-                test_array[:, -1]
-            )
+            # Every row of this run, as saved next to the published model for the next incremental run:
+            X_raw = np.concatenate([X_train_raw, X_test_raw])
+            y_raw = np.concatenate([y_train, y_test])
 
-            model_trainer_artifact = self.train_model(X_train=X_train, y_train=y_train, X_test=X_test, y_test=y_test)
+            grown_model, reason = self.grow_published_model(X_train, y_train, X_raw, y_raw)
+            if grown_model is not None:
+                logging.info(f"Incremental retraining: {reason}.")
+                model_trainer_artifact = self.publish_model(grown_model, X_test=X_test, y_test=y_test,
+                                                            training_mode=TRAINING_MODE_INCREMENTAL)
+            else:
+                logging.info(f"Full retraining: {reason}.")
+                model_trainer_artifact = self.train_model(X_train=X_train, y_train=y_train, X_test=X_test, y_test=y_test)
+            save_training_snapshot(self.model_trainer_config.training_snapshot_file_path, X_raw, y_raw)
             print(model_trainer_artifact)
+            return model_trainer_artifact
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
@@ -15,6 +15,17 @@ TEST_FILE_NAME: str = "test.csv"
 SCHEMA_FILE_PATH = os.path.join("data_schema", "schema.yaml")
 SAVED_MODEL_DIR = os.path.join("saved_models")
 MODEL_FILE_NAME = "model.pkl"
+FINAL_MODEL_DIR: str = "final_model"
+FINAL_MODEL_FILE_PATH: str = os.path.join(FINAL_MODEL_DIR, MODEL_FILE_NAME)
+FINAL_MODEL_TRAINING_SNAPSHOT_FILE_PATH: str = os.path.join(FINAL_MODEL_DIR, "training_snapshot.npz")
+# Format of the tables the stages write (Feature Store, ingested and validated train / test): "parquet"
+# (columnar, compressed), "arrow" (Arrow IPC: columnar, uncompressed, used in place when memory-mapped)
+# or "csv". `read_data` reads any of them, by the file's extension.
+TABLE_FORMAT_CSV: str = "csv"
+TABLE_FORMAT_PARQUET: str = "parquet"
+TABLE_FORMAT_ARROW: str = "arrow"
+TABLE_FORMAT_EXTENSIONS: dict = {TABLE_FORMAT_CSV: ".csv", TABLE_FORMAT_PARQUET: ".parquet", TABLE_FORMAT_ARROW: ".arrow"}
+ARTIFACT_TABLE_FORMAT: str = os.getenv("ARTIFACT_TABLE_FORMAT", TABLE_FORMAT_PARQUET)
 
 
 ############################################
@@ -26,6 +37,22 @@ DATA_INGESTION_DIR_NAME: str = "data_ingestion"
 DATA_INGESTION_FEATURE_STORE_DIR: str = "feature_store"
 DATA_INGESTION_INGESTED_DIR: str = "ingested"
 DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO:float = 0.2
+DATA_INGESTION_RANDOM_STATE: int = 42
+# Documents per cursor batch of the collection export, and disjoint _id ranges read in parallel:
+DATA_INGESTION_EXPORT_BATCH_SIZE: int = 10_000
+DATA_INGESTION_EXPORT_WORKERS: int = int(os.getenv("DATA_INGESTION_EXPORT_WORKERS", 1))
+# Incremental ingestion: every run appends the documents newer than the persisted watermark as a new
+# partition of the Feature Store shared by the runs (under ARTIFACT_DIR), listed in its manifest.
+# push_data stamps the watermark field on every document it writes ("_id" works as well, for ObjectIds).
+# Documents stamped in the last lag seconds are left to the next run (writes still in flight may get
+# stamped earlier than them). Off by default: after the first run, documents written without the field
+# (by anything but push_data) are never ingested, only counted in a warning.
+DATA_INGESTION_INCREMENTAL: bool = os.getenv("DATA_INGESTION_INCREMENTAL", "0") == "1"
+DATA_INGESTION_WATERMARK_FIELD: str = "ingested_at"
+DATA_INGESTION_WATERMARK_LAG_SECONDS: float = float(os.getenv("DATA_INGESTION_WATERMARK_LAG_SECONDS", 60))
+DATA_INGESTION_FEATURE_STORE_MANIFEST_FILE_NAME: str = "manifest.json"
+# Train on the most recent partitions only (0: on all of them):
+DATA_INGESTION_TRAINING_WINDOW_PARTITIONS: int = int(os.getenv("DATA_INGESTION_TRAINING_WINDOW", 0))
 
 
 ############################################
@@ -47,6 +74,15 @@ DATA_TRANSFORMATION_TRANSFORMED_DIR:str = "transformed"
 DATA_TRANSFORMATION_TRANSFORMED_OBJECT_DIR:str = "transformed_object"
 
 PREPROCESSING_OBJECT_FILE_NAME: str = "preprocessing.pkl"
+TRAIN_LABEL_FILE_NAME: str = "train_labels.npy"
+TEST_LABEL_FILE_NAME: str = "test_labels.npy"
+
+# Features are stored as int8 (see data_schema/schema.yaml); missing values use this sentinel:
+FEATURE_MISSING_SENTINEL: int = np.iinfo(np.int8).min
+
+# Imputation strategy (see networksecurity/utils/ml_utils/model/imputer.py, and benchmarks/imputation.py
+# --strategies for their accuracy and timings): knn, knn_approx, mode or passthrough.
+DATA_TRANSFORMATION_IMPUTER_STRATEGY: str = os.getenv("DATA_TRANSFORMATION_IMPUTER", "knn")
 
 DATA_TRANSFORMATION_IMPUTER_PARAMS: dict = {
     "missing_values": np.nan,
@@ -54,6 +90,13 @@ DATA_TRANSFORMATION_IMPUTER_PARAMS: dict = {
     "weights": "uniform"
 }
 
+DATA_TRANSFORMATION_APPROX_IMPUTER_PARAMS: dict = {
+    "n_neighbors": 3,
+    # Complete training rows sampled as donors:
+    "max_donors": 20_000,
+    "random_state": 42
+}
+
 
 ############################################
 # Constant variables for the Model Training:
@@ -63,5 +106,81 @@ MODEL_TRAINER_TRAINED_MODEL_DIR: str = "trained_model"
 MODEL_TRAINER_TRAINED_MODEL_NAME: str = "model.pkl"
 MODEL_TRAINER_EXPECTED_SCORE: float = 0.6
 MODEL_TRAINER_FITTING_UNDER_FITTING_THRESHOLD: float = 0.05
+MODEL_TRAINER_SEARCH_N_JOBS: int = int(os.getenv("MODEL_TRAINER_SEARCH_N_JOBS", os.cpu_count() or 1))
+MODEL_TRAINER_SEARCH_CV_FOLDS: int = 3
+MODEL_TRAINER_HALVING_FACTOR: int = 3
+MODEL_TRAINER_HALVING_MIN_SAMPLES: int = 200
+MODEL_TRAINER_SEARCH_CACHE_DIR: str = "search_cache"
+MODEL_TRAINER_SEARCH_CACHE_MODELS: bool = True
+MODEL_TRAINER_IMPUTED_DATA_DIR: str = "imputed"
+MODEL_TRAINER_INCREMENTAL_ENABLED: bool = os.getenv("MODEL_TRAINER_INCREMENTAL", "1") != "0"
+MODEL_TRAINER_INCREMENTAL_MIN_NEW_ROWS: int = 50
+MODEL_TRAINER_INCREMENTAL_MAX_NEW_FRACTION: float = 0.25
+MODEL_TRAINER_INCREMENTAL_DRIFT_THRESHOLD: float = 0.05
 
 TRAINING_BUCKET_NAME="networksecuritymlopstesting"
+
+TRAINING_PIPELINE_STAGES: list = ["data_ingestion", "data_validation", "data_transformation", "model_training", "sync_to_s3"]
+TRAINING_JOB_CANCEL_GRACE_SECONDS: float = 30.0
+TRAINING_JOB_POLL_INTERVAL_SECONDS: float = 0.5
+TRAINING_JOB_HISTORY_SIZE: int = 20
+TRAINING_PIPELINE_STAGE_INDEX_DIR: str = "stage_index"
+TRAINING_PIPELINE_STAGE_MANIFEST_FILE_NAME: str = "manifest.json"
+TRAINING_PIPELINE_RUN_REPORT_FILE_NAME: str = "run_report.json"
+# A stage (or model search candidate) regressed when it got this much slower / bigger than in the previous
+# comparable run, and by at least the absolute amounts below (small stages are mostly noise):
+TRAINING_PIPELINE_REGRESSION_THRESHOLD: float = 0.2
+TRAINING_PIPELINE_REGRESSION_MIN_SECONDS: float = 1.0
+TRAINING_PIPELINE_REGRESSION_MIN_RSS_MB: float = 50.0
+# Out-of-core mode: every stage streams the data in chunks sized to the memory cap instead of loading it whole.
+TRAINING_PIPELINE_OUT_OF_CORE: bool = os.getenv("TRAINING_OUT_OF_CORE", "0") == "1"
+TRAINING_PIPELINE_MEMORY_CAP_MB: int = int(os.getenv("TRAINING_MEMORY_CAP_MB", 2048))
+# In-memory handoff (not in out-of-core mode): every stage passes its tables / arrays to the next one in
+# its artifact instead of through files. The artifact files are then written in the background ("async",
+# waited for before the stage is recorded for reuse and the artifacts are synced), right away ("sync"),
+# or not at all ("off": nothing to audit, and the run's stages are not recorded for reuse):
+TRAINING_PIPELINE_IN_MEMORY_HANDOFF: bool = os.getenv("TRAINING_IN_MEMORY_HANDOFF", "1") != "0"
+ARTIFACT_PERSISTENCE_SYNC: str = "sync"
+ARTIFACT_PERSISTENCE_ASYNC: str = "async"
+ARTIFACT_PERSISTENCE_OFF: str = "off"
+TRAINING_PIPELINE_ARTIFACT_PERSISTENCE: str = os.getenv("TRAINING_ARTIFACT_PERSISTENCE", ARTIFACT_PERSISTENCE_ASYNC)
+# Rough peak bytes per value of a chunk being parsed / converted / imputed, and the share of the cap
+# (what's left of it after the interpreter and libraries) a chunk may take:
+OUT_OF_CORE_CHUNK_BYTES_PER_VALUE: int = 64
+OUT_OF_CORE_CHUNK_MEMORY_SHARE: float = 0.25
+# Rows of the training data the imputer is fitted on (it keeps them all to find neighbours):
+OUT_OF_CORE_IMPUTER_SAMPLE_ROWS: int = 50_000
+# Passes of the partial_fit candidates over the training chunks:
+OUT_OF_CORE_PARTIAL_FIT_EPOCHS: int = 5
+# HistGradientBoosting copies its rows to float64 and bins them (~24 bytes per value in all); it gets a
+# random sample of the rows that fits in this share of the cap:
+OUT_OF_CORE_HIST_BYTES_PER_VALUE: int = 24
+OUT_OF_CORE_HIST_MEMORY_SHARE: float = 0.5
+
+
+############################################
+# Constant variables for the Model Serving:
+############################################
+MODEL_HOLDER_REFRESH_INTERVAL_SECONDS: float = 5.0
+MODEL_HOLDER_WARMUP_BATCH_SIZE: int = 8
+# The served model's arrays memory-mapped read-only from its file, one copy shared by every worker process
+# (MODEL_HOLDER_MMAP_MODE="" reads them into each):
+MODEL_HOLDER_MMAP_MODE: str = os.getenv("MODEL_HOLDER_MMAP_MODE", "r") or None
+SERVING_CPU_WORKERS: int = max(1, (os.cpu_count() or 2) - 1)
+SERVING_IO_WORKERS: int = 8
+SERVING_MAX_PENDING_CPU_TASKS: int = 4 * SERVING_CPU_WORKERS
+SERVING_QUEUE_TIMEOUT_SECONDS: float = 2.0
+PREDICTION_COLUMN_NAME: str = "Prediced_values"
+PREDICTION_BATCH_WINDOW_MS: float = 5.0
+PREDICTION_BATCH_MAX_ROWS: int = 1024
+PREDICTION_BATCH_MAX_CONCURRENT: int = SERVING_CPU_WORKERS
+PREDICTION_STREAM_CHUNK_BYTES: int = 4 * 1024 * 1024
+PREDICTION_OUTPUT_DIR: str = "prediction_output"
+PREDICTION_RESULT_FILE_NAME: str = "predictions.parquet"
+PREDICTION_RESULT_ROW_GROUP_SIZE: int = 64 * 1024
+PREDICTION_PAGE_SIZE: int = 100
+PREDICTION_MAX_PAGE_SIZE: int = 5000
+PREDICTION_CACHE_MAX_ENTRIES: int = 100_000
+IMPUTER_CHUNK_MAX_BYTES: int = 256 * 1024 * 1024
+TREE_EVALUATOR_CHUNK_SIZE: int = 1024 * 1024
+TREE_EVALUATOR_CALIBRATION_BATCH_SIZES: tuple = (1, 16, 128, 1024, 8192)
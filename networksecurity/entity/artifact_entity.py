@@ -1,4 +1,16 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields
+
+
+def in_memory():
+    """
+    A field for what a stage hands over in memory (see TRAINING_PIPELINE_IN_MEMORY_HANDOFF): None when the
+    next stage has to read it from the artifact files, and never recorded with the artifact.
+    """
+    return field(default=None, repr=False, compare=False, metadata={"in_memory": True})
+
+
+def in_memory_fields(artifact) -> list:
+    return [artifact_field.name for artifact_field in fields(artifact) if artifact_field.metadata.get("in_memory")]
 
 
 # 1. Data Ingestion Artifacts:
@@ -6,6 +18,8 @@ from dataclasses import dataclass
 class DataIngestionArtifact:
     trained_file_path: str
     test_file_path: str
+    train_dataframe: object = in_memory()
+    test_dataframe: object = in_memory()
 
 
 
@@ -18,6 +32,8 @@ class DataValidationArtifact:
     invalid_train_file_path: str
     invalid_test_file_path: str
     drift_report_file_path: str
+    train_dataframe: object = in_memory()
+    test_dataframe: object = in_memory()
     
 
 # 3. Data Transformation Artifacts:
@@ -26,6 +42,13 @@ class DataTransformationArtifact:
     transformed_object_file_path: str
     transformed_train_file_path: str
     transformed_test_file_path: str
+    transformed_train_label_file_path: str
+    transformed_test_label_file_path: str
+    preprocessor: object = in_memory()
+    train_features: object = in_memory()
+    test_features: object = in_memory()
+    train_labels: object = in_memory()
+    test_labels: object = in_memory()
 
 
 # 4. Model Trainer Artifacts:
@@ -38,4 +61,6 @@ class ClassificationMetricArtifact:
 @dataclass
 class ModelTrainerArtifact:
     trained_model_file_path: str
-    test_metric_artifact: ClassificationMetricArtifact
\ No newline at end of file
+    test_metric_artifact: ClassificationMetricArtifact
+    # "full" (model search from scratch) or "incremental" (published ensemble grown with the new rows):
+    training_mode: str = "full"
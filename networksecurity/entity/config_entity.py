@@ -5,33 +5,72 @@ import os
 # Changes to be pusehd for testing
 
 class TrainingPipelineConfig:
-    def __init__(self, timestamp=datetime.now()):
+    def __init__(self, timestamp:datetime=None):
+        # Evaluated per call: a `datetime.now()` default would be frozen at import time.
+        timestamp = timestamp or datetime.now()
         self.timestamp:str = timestamp.strftime("%m_%d_%Y_%H_%M_%S")
         self.pipeline_name = training_pipeline.PIPELINE_NAME
-        self.artifact_dir = training_pipeline.ARTIFACT_DIR
-        self.model_dir = os.path.join("final_model")
+        # Shared across runs (caches, stage index); each run writes its artifacts under its own directory.
+        self.artifact_name = training_pipeline.ARTIFACT_DIR
+        self.artifact_dir = os.path.join(self.artifact_name, self.timestamp)
+        self.stage_index_dir = os.path.join(self.artifact_name, training_pipeline.TRAINING_PIPELINE_STAGE_INDEX_DIR)
+        self.run_report_file_path = os.path.join(self.artifact_dir, training_pipeline.TRAINING_PIPELINE_RUN_REPORT_FILE_NAME)
+        self.model_dir = os.path.join(training_pipeline.FINAL_MODEL_DIR)
+        self.out_of_core:bool = training_pipeline.TRAINING_PIPELINE_OUT_OF_CORE
+        self.memory_cap_mb:int = training_pipeline.TRAINING_PIPELINE_MEMORY_CAP_MB
+        self.table_format:str = training_pipeline.ARTIFACT_TABLE_FORMAT
+        # Out-of-core mode streams through files: no in-memory handoff there.
+        self.in_memory_handoff:bool = training_pipeline.TRAINING_PIPELINE_IN_MEMORY_HANDOFF and not self.out_of_core
+        self.artifact_persistence:str = training_pipeline.TRAINING_PIPELINE_ARTIFACT_PERSISTENCE
+
+
+
+def table_file_name(file_name:str, table_format:str) -> str:
+    """
+    `file_name` with the extension of `table_format` (see ARTIFACT_TABLE_FORMAT).
+    """
+    if table_format not in training_pipeline.TABLE_FORMAT_EXTENSIONS:
+        raise ValueError(f"Unknown table format {table_format!r}, expected one of {list(training_pipeline.TABLE_FORMAT_EXTENSIONS)}.")
+    return os.path.splitext(file_name)[0] + training_pipeline.TABLE_FORMAT_EXTENSIONS[table_format]
 
 
 
 class DataIngestionConfig:
     def __init__(self, training_pipeline_config:TrainingPipelineConfig):
+        self.table_format: str = training_pipeline_config.table_format
         self.data_ingestion_dir:str = os.path.join(training_pipeline_config.artifact_dir, 
                                                    training_pipeline.DATA_INGESTION_DIR_NAME)
         self.feature_store_file_path: str = os.path.join(self.data_ingestion_dir, training_pipeline.DATA_INGESTION_FEATURE_STORE_DIR,
-                                                         training_pipeline.FILE_NAME)
+                                                         table_file_name(training_pipeline.FILE_NAME, self.table_format))
         self.training_file_path: str = os.path.join(self.data_ingestion_dir, training_pipeline.DATA_INGESTION_INGESTED_DIR,
-                                                    training_pipeline.TRAIN_FILE_NAME)
+                                                    table_file_name(training_pipeline.TRAIN_FILE_NAME, self.table_format))
         self.testing_file_path: str = os.path.join(self.data_ingestion_dir, training_pipeline.DATA_INGESTION_INGESTED_DIR,
-                                                   training_pipeline.TEST_FILE_NAME)
+                                                   table_file_name(training_pipeline.TEST_FILE_NAME, self.table_format))
         self.train_test_split_ratio: float = training_pipeline.DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO
+        self.random_state: int = training_pipeline.DATA_INGESTION_RANDOM_STATE
         self.collection_name: str = training_pipeline.DATA_INGESTION_COLLECTION_NAME
         self.database_name: str = training_pipeline.DATA_INGESTION_DATABASE_NAME
+        self.export_batch_size: int = training_pipeline.DATA_INGESTION_EXPORT_BATCH_SIZE
+        self.export_workers: int = training_pipeline.DATA_INGESTION_EXPORT_WORKERS
+        # The partitioned Feature Store and its manifest are shared by every run:
+        self.incremental: bool = training_pipeline.DATA_INGESTION_INCREMENTAL
+        self.partitioned_feature_store_dir: str = os.path.join(training_pipeline_config.artifact_name,
+                                                               training_pipeline.DATA_INGESTION_FEATURE_STORE_DIR)
+        self.feature_store_manifest_file_path: str = os.path.join(self.partitioned_feature_store_dir,
+                                                                  training_pipeline.DATA_INGESTION_FEATURE_STORE_MANIFEST_FILE_NAME)
+        self.watermark_field: str = training_pipeline.DATA_INGESTION_WATERMARK_FIELD
+        self.watermark_lag_seconds: float = training_pipeline.DATA_INGESTION_WATERMARK_LAG_SECONDS
+        self.training_window_partitions: int = training_pipeline.DATA_INGESTION_TRAINING_WINDOW_PARTITIONS
+        self.out_of_core: bool = training_pipeline_config.out_of_core
+        self.memory_cap_mb: int = training_pipeline_config.memory_cap_mb
+        self.in_memory_handoff: bool = training_pipeline_config.in_memory_handoff
 
         
 
 
 class DataValidationConfig:
     def __init__(self, training_pipeline_config: TrainingPipelineConfig):
+        self.table_format: str = training_pipeline_config.table_format
         self.data_validation_dir: str = os.path.join(training_pipeline_config.artifact_dir,
                                                      training_pipeline.DATA_VALIDATION_DIR_NAME)
         self.valid_data_dir: str = os.path.join(self.data_validation_dir, 
@@ -39,16 +78,19 @@ class DataValidationConfig:
         self.invalid_data_dir: str = os.path.join(self.data_validation_dir,
                                                   training_pipeline.DATA_VALIDATION_INVALID_DIR)
         self.valid_train_file_path: str = os.path.join(self.valid_data_dir,
-                                                       training_pipeline.TRAIN_FILE_NAME)
+                                                       table_file_name(training_pipeline.TRAIN_FILE_NAME, self.table_format))
         self.valid_test_file_path: str = os.path.join(self.valid_data_dir, 
-                                                      training_pipeline.TEST_FILE_NAME)
+                                                      table_file_name(training_pipeline.TEST_FILE_NAME, self.table_format))
         self.invalid_train_file_path: str = os.path.join(self.invalid_data_dir, 
-                                                         training_pipeline.TRAIN_FILE_NAME)
+                                                         table_file_name(training_pipeline.TRAIN_FILE_NAME, self.table_format))
         self.invalid_test_file_path: str = os.path.join(self.invalid_data_dir,
-                                                        training_pipeline.TEST_FILE_NAME)
+                                                        table_file_name(training_pipeline.TEST_FILE_NAME, self.table_format))
         self.drift_report_file_path: str = os.path.join(self.data_validation_dir,
                                                         training_pipeline.DATA_VALIDATION_DRIFT_REPORT_DIR,
                                                         training_pipeline.DATA_VALIDATION_DRIFT_REPORT_FILE_NAME)
+        self.out_of_core: bool = training_pipeline_config.out_of_core
+        self.memory_cap_mb: int = training_pipeline_config.memory_cap_mb
+        self.in_memory_handoff: bool = training_pipeline_config.in_memory_handoff
         
         
 
@@ -64,9 +106,21 @@ class DataTransformationConfig:
         self.transformed_test_file_path: str = os.path.join(self.data_transformation_dir,
                                                             training_pipeline.DATA_TRANSFORMATION_TRANSFORMED_DIR,
                                                             training_pipeline.TEST_FILE_NAME.replace("csv", "npy"))
+        self.transformed_train_label_file_path: str = os.path.join(self.data_transformation_dir,
+                                                                   training_pipeline.DATA_TRANSFORMATION_TRANSFORMED_DIR,
+                                                                   training_pipeline.TRAIN_LABEL_FILE_NAME)
+        self.transformed_test_label_file_path: str = os.path.join(self.data_transformation_dir,
+                                                                  training_pipeline.DATA_TRANSFORMATION_TRANSFORMED_DIR,
+                                                                  training_pipeline.TEST_LABEL_FILE_NAME)
         self.transformed_object_file_path: str = os.path.join(self.data_transformation_dir,
                                                               training_pipeline.DATA_TRANSFORMATION_TRANSFORMED_OBJECT_DIR,
                                                               training_pipeline.PREPROCESSING_OBJECT_FILE_NAME)
+        self.imputer_strategy: str = training_pipeline.DATA_TRANSFORMATION_IMPUTER_STRATEGY
+        self.out_of_core: bool = training_pipeline_config.out_of_core
+        self.memory_cap_mb: int = training_pipeline_config.memory_cap_mb
+        self.in_memory_handoff: bool = training_pipeline_config.in_memory_handoff
+        self.imputer_sample_rows: int = training_pipeline.OUT_OF_CORE_IMPUTER_SAMPLE_ROWS
+        self.random_state: int = training_pipeline.DATA_INGESTION_RANDOM_STATE
 
 
 class ModelTrainerConfig:
@@ -77,4 +131,22 @@ class ModelTrainerConfig:
                                                         training_pipeline.MODEL_TRAINER_TRAINED_MODEL_NAME)
         self.expected_accuracy: float = training_pipeline.MODEL_TRAINER_EXPECTED_SCORE
         self.overfitting_underfitting_threshold:float = training_pipeline.MODEL_TRAINER_FITTING_UNDER_FITTING_THRESHOLD
+        self.search_n_jobs:int = training_pipeline.MODEL_TRAINER_SEARCH_N_JOBS
+        # Kept across training runs (outside the per-run directory): later runs reuse the CV results
+        # and refitted models.
+        self.search_cache_dir:str = os.path.join(training_pipeline_config.artifact_name, training_pipeline.MODEL_TRAINER_DIR_NAME,
+                                                 training_pipeline.MODEL_TRAINER_SEARCH_CACHE_DIR)
+        self.search_cache_models:bool = training_pipeline.MODEL_TRAINER_SEARCH_CACHE_MODELS
+        # Incremental retraining: grow the published model with the rows added since it was trained.
+        self.published_model_file_path:str = training_pipeline.FINAL_MODEL_FILE_PATH
+        self.training_snapshot_file_path:str = training_pipeline.FINAL_MODEL_TRAINING_SNAPSHOT_FILE_PATH
+        self.incremental_enabled:bool = training_pipeline.MODEL_TRAINER_INCREMENTAL_ENABLED
+        self.incremental_min_new_rows:int = training_pipeline.MODEL_TRAINER_INCREMENTAL_MIN_NEW_ROWS
+        self.incremental_max_new_fraction:float = training_pipeline.MODEL_TRAINER_INCREMENTAL_MAX_NEW_FRACTION
+        self.incremental_drift_threshold:float = training_pipeline.MODEL_TRAINER_INCREMENTAL_DRIFT_THRESHOLD
+        # Out-of-core mode: partial_fit / histogram boosting candidates over the memory-mapped arrays.
+        self.out_of_core:bool = training_pipeline_config.out_of_core
+        self.memory_cap_mb:int = training_pipeline_config.memory_cap_mb
+        self.partial_fit_epochs:int = training_pipeline.OUT_OF_CORE_PARTIAL_FIT_EPOCHS
+        self.imputed_data_dir:str = os.path.join(self.model_trainer_dir, training_pipeline.MODEL_TRAINER_IMPUTED_DATA_DIR)
         
\ No newline at end of file
@@ -0,0 +1,189 @@
+import os
+import sys
+import glob
+import json
+import time
+from contextlib import contextmanager
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.logging.logger import logging
+from networksecurity.constants.training_pipeline import (TRAINING_PIPELINE_RUN_REPORT_FILE_NAME,
+                                                         TRAINING_PIPELINE_REGRESSION_THRESHOLD,
+                                                         TRAINING_PIPELINE_REGRESSION_MIN_SECONDS,
+                                                         TRAINING_PIPELINE_REGRESSION_MIN_RSS_MB)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+
+def _reset_peak_rss() -> bool:
+    # Linux: writing 5 to clear_refs resets the process' peak RSS (VmHWM) to its current RSS.
+    try:
+        with open("/proc/self/clear_refs", "w") as file_obj:
+            file_obj.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb(since_reset:bool):
+    """
+    Peak RSS of this process since `_reset_peak_rss`, or over its whole life when it couldn't be reset.
+    """
+    if since_reset:
+        with open("/proc/self/status") as file_obj:
+            for line in file_obj:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _children_usage():
+    """
+    (CPU seconds, largest peak RSS in MB) of the child processes that have exited, e.g. search workers.
+    """
+    if resource is None:
+        return 0.0, None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime, round(usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _regression(scope:str, name:str, metric:str, previous, current, min_change:float):
+    if previous is None or current is None or previous <= 0:
+        return None
+    if current <= previous * (1 + TRAINING_PIPELINE_REGRESSION_THRESHOLD) or current - previous < min_change:
+        return None
+    return {"scope": scope, "name": name, "metric": metric, "previous": previous, "current": current,
+            "change": round(current / previous - 1, 3)}
+
+
+
+class RunReport:
+    """
+    Machine-readable performance report of a training run, written to `report_file_path` (next to
+    the run's artifacts).
+
+    Every stage run inside `stage()` gets its wall time, CPU time (including child processes such as
+    the model search workers), peak RSS, rows processed and rows/sec; the model search adds one entry
+    per candidate model. `write()` compares the report with the last completed run's and lists the
+    stages and candidates that got slower or bigger as regressions.
+    """
+    def __init__(self, report_file_path:str, run:str):
+        self.report_file_path = report_file_path
+        self.run = run
+        self.started_at = time.time()
+        self.stages = {}
+        self.candidates = {}
+
+
+    @contextmanager
+    def stage(self, stage_name:str):
+        metrics = self.stages.setdefault(stage_name, {})
+        peak_was_reset = _reset_peak_rss()
+        children_cpu_start, children_peak_start = _children_usage()
+        start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield metrics
+        finally:
+            wall_seconds = time.perf_counter() - start
+            children_cpu, children_peak = _children_usage()
+            metrics.update(
+                wall_seconds=round(wall_seconds, 3),
+                cpu_seconds=round(time.process_time() - cpu_start + children_cpu - children_cpu_start, 3),
+                peak_rss_mb=_peak_rss_mb(peak_was_reset),
+                # Only known when a child exceeded the peak of the ones before it.
+                children_peak_rss_mb=children_peak if children_peak != children_peak_start else None,
+            )
+            rows = metrics.setdefault("rows", None)
+            # A reused stage (see StageCache) didn't process its rows in this run.
+            processed = rows and wall_seconds > 0 and not metrics.get("reused")
+            metrics["rows_per_sec"] = round(rows / wall_seconds) if processed else None
+            logging.info(f"{stage_name}: {metrics}")
+
+
+    def annotate(self, stage_name:str, **values) -> None:
+        """
+        Adds values to a stage's metrics, e.g. rows=... or reused=True.
+        """
+        self.stages.setdefault(stage_name, {}).update(values)
+
+
+    def add_candidates(self, candidate_metrics:dict) -> None:
+        self.candidates.update(candidate_metrics)
+
+
+    def _previous_report(self):
+        reports_pattern = os.path.join(os.path.dirname(os.path.dirname(self.report_file_path)), "*",
+                                       TRAINING_PIPELINE_RUN_REPORT_FILE_NAME)
+        previous = None
+        for report_file_path in glob.glob(reports_pattern):
+            if os.path.abspath(report_file_path) == os.path.abspath(self.report_file_path):
+                continue
+            try:
+                with open(report_file_path) as file_obj:
+                    report = json.load(file_obj)
+            except (OSError, ValueError):
+                continue
+            if report.get("status") == "completed" and report.get("started_at", 0) < self.started_at and \
+                    (previous is None or report["started_at"] > previous["started_at"]):
+                previous = report
+        return previous
+
+
+    def _regressions(self, previous:dict) -> list:
+        regressions = []
+        for stage_name, metrics in self.stages.items():
+            previous_metrics = previous["stages"].get(stage_name)
+            # A reused stage against one that ran (or the other way round) says nothing about speed.
+            if not previous_metrics or previous_metrics.get("reused") != metrics.get("reused"):
+                continue
+            regressions.append(_regression("stage", stage_name, "wall_seconds", previous_metrics.get("wall_seconds"),
+                                           metrics.get("wall_seconds"), TRAINING_PIPELINE_REGRESSION_MIN_SECONDS))
+            regressions.append(_regression("stage", stage_name, "peak_rss_mb", previous_metrics.get("peak_rss_mb"),
+                                           metrics.get("peak_rss_mb"), TRAINING_PIPELINE_REGRESSION_MIN_RSS_MB))
+        for model_name, metrics in self.candidates.items():
+            previous_metrics = (previous.get("candidates") or {}).get(model_name)
+            # Only the same amount of work is comparable (the search cache can skip fits).
+            if not previous_metrics or previous_metrics.get("cv_fits") != metrics.get("cv_fits"):
+                continue
+            regressions.append(_regression("candidate", model_name, "wall_seconds", previous_metrics.get("wall_seconds"),
+                                           metrics.get("wall_seconds"), TRAINING_PIPELINE_REGRESSION_MIN_SECONDS))
+        return [regression for regression in regressions if regression is not None]
+
+
+    def write(self, status:str) -> dict:
+        """
+        Writes the report with the run's final status ("completed", "failed" or "cancelled") and returns it.
+        """
+        try:
+            previous = self._previous_report()
+            report = {
+                "run": self.run,
+                "status": status,
+                "started_at": self.started_at,
+                "wall_seconds": round(time.time() - self.started_at, 3),
+                "stages": self.stages,
+                "candidates": self.candidates,
+                "previous_run": previous["run"] if previous else None,
+                "regressions": self._regressions(previous) if previous else [],
+            }
+            os.makedirs(os.path.dirname(self.report_file_path), exist_ok=True)
+            temp_file_path = f"{self.report_file_path}.{os.getpid()}.tmp"
+            with open(temp_file_path, "w") as file_obj:
+                json.dump(report, file_obj, indent=2)
+            os.replace(temp_file_path, self.report_file_path)
+
+            for regression in report["regressions"]:
+                logging.info(f"Performance regression since run {report['previous_run']}: {regression['scope']} "
+                             f"{regression['name']} {regression['metric']} {regression['previous']} -> "
+                             f"{regression['current']} (+{regression['change']:.0%})")
+            logging.info(f"Run report written to {self.report_file_path}")
+            return report
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
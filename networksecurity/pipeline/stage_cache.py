@@ -0,0 +1,170 @@
+import os
+import sys
+import json
+import inspect
+import hashlib
+import functools
+import dataclasses
+import pandas as pd
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.logging.logger import logging
+from networksecurity.constants.training_pipeline import TRAINING_PIPELINE_STAGE_MANIFEST_FILE_NAME
+
+
+
+def file_digest(file_path:str, chunk_size:int=1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file_obj:
+        for chunk in iter(lambda: file_obj.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def package_source_digest(package_name:str) -> str:
+    """
+    Digest of every Python source file of a package (their paths and contents): a stage's code is its
+    component and all the helpers it calls (utils, imputers, tree compiler, search executor, constants...).
+    Computed once per process, as the code it stands for is only imported once.
+    """
+    package_dir = os.path.dirname(inspect.getsourcefile(sys.modules[package_name]))
+    digest = hashlib.sha256()
+    for dir_path, dir_names, file_names in os.walk(package_dir):
+        dir_names[:] = sorted(name for name in dir_names if name != "__pycache__")
+        for file_name in sorted(name for name in file_names if name.endswith(".py")):
+            file_path = os.path.join(dir_path, file_name)
+            digest.update(os.path.relpath(file_path, package_dir).encode())
+            digest.update(file_digest(file_path).encode())
+    return digest.hexdigest()
+
+
+def dataframe_digest(dataframe:pd.DataFrame) -> str:
+    digest = hashlib.sha256()
+    digest.update(repr([(column, str(dtype)) for column, dtype in dataframe.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(dataframe, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _artifact_to_dict(artifact) -> dict:
+    # The artifact's files and values, without what it hands over in memory.
+    data = {}
+    for artifact_field in dataclasses.fields(artifact):
+        if artifact_field.metadata.get("in_memory"):
+            continue
+        value = getattr(artifact, artifact_field.name)
+        data[artifact_field.name] = _artifact_to_dict(value) if dataclasses.is_dataclass(value) else value
+    return data
+
+
+def _artifact_from_dict(artifact_cls, data:dict):
+    values = {}
+    for artifact_field in dataclasses.fields(artifact_cls):
+        if artifact_field.name not in data:
+            continue
+        value = data[artifact_field.name]
+        if dataclasses.is_dataclass(artifact_field.type) and isinstance(value, dict):
+            value = _artifact_from_dict(artifact_field.type, value)
+        values[artifact_field.name] = value
+    return artifact_cls(**values)
+
+
+def _output_files(artifact) -> dict:
+    # Every file an artifact points to, with its size, to check it is still there on reuse.
+    outputs = {}
+    for value in _artifact_to_dict(artifact).values():
+        if isinstance(value, str) and os.path.isfile(value):
+            outputs[value] = os.path.getsize(value)
+    return outputs
+
+
+
+class StageCache:
+    """
+    Content-addressed reuse of training pipeline stages across runs.
+
+    A stage's fingerprint covers the source code of its component's package, its config (paths taken relative to
+    the run directory, so they don't differ between runs) and the content of its inputs. After a
+    stage runs, a manifest (fingerprint, artifact, output files) is written next to its outputs and
+    indexed under `<index_dir>/<stage>/<fingerprint>.json`. A later run with the same fingerprint gets
+    the recorded artifact back, pointing at the earlier run's outputs, as long as they still exist.
+    """
+    def __init__(self, index_dir:str, run_artifact_dir:str):
+        self.index_dir = index_dir
+        self.run_artifact_dir = run_artifact_dir
+
+
+    def _normalize(self, value):
+        if isinstance(value, str) and value.startswith(self.run_artifact_dir):
+            return os.path.relpath(value, self.run_artifact_dir)
+        return repr(value)
+
+
+    def fingerprint(self, stage_name:str, component_cls, config, input_files:list=(), input_digests:list=()) -> str:
+        try:
+            description = {
+                "stage": stage_name,
+                "code": package_source_digest(component_cls.__module__.split(".")[0]),
+                "config": {name: self._normalize(value) for name, value in sorted(vars(config).items())},
+                "inputs": [file_digest(file_path) if file_path and os.path.exists(file_path) else None
+                           for file_path in input_files] + list(input_digests),
+            }
+            return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()[:32]
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
+    def _index_file_path(self, stage_name:str, fingerprint:str) -> str:
+        return os.path.join(self.index_dir, stage_name, f"{fingerprint}.json")
+
+
+    @staticmethod
+    def _write_json(file_path:str, content:dict) -> None:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        temp_file_path = f"{file_path}.{os.getpid()}.tmp"
+        with open(temp_file_path, "w") as file_obj:
+            json.dump(content, file_obj, indent=2)
+        os.replace(temp_file_path, file_path)
+
+
+    def lookup(self, stage_name:str, fingerprint:str, artifact_cls, stage_dir:str, validate=None):
+        """
+        Returns the artifact recorded for this fingerprint if all its output files are intact (and
+        `validate(manifest)`, if given, agrees), else None.
+        """
+        try:
+            index_file_path = self._index_file_path(stage_name, fingerprint)
+            if not os.path.exists(index_file_path):
+                return None
+            with open(index_file_path) as file_obj:
+                manifest = json.load(file_obj)
+            if any(not os.path.isfile(file_path) or os.path.getsize(file_path) != size
+                   for file_path, size in manifest["outputs"].items()):
+                logging.info(f"{stage_name}: outputs of run {manifest['run']} are missing or changed, running it again.")
+                return None
+            if validate is not None and not validate(manifest):
+                return None
+
+            # Record the reuse next to where this run's outputs would have been.
+            self._write_json(os.path.join(stage_dir, TRAINING_PIPELINE_STAGE_MANIFEST_FILE_NAME),
+                             dict(manifest, reused_by_run=os.path.basename(self.run_artifact_dir)))
+            logging.info(f"{stage_name}: inputs unchanged (fingerprint {fingerprint}), "
+                         f"reusing the outputs of run {manifest['run']}.")
+            return _artifact_from_dict(artifact_cls, manifest["artifact"])
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
+    def record(self, stage_name:str, fingerprint:str, artifact, stage_dir:str, extra:dict=None) -> None:
+        try:
+            manifest = {
+                "stage": stage_name,
+                "fingerprint": fingerprint,
+                "run": os.path.basename(self.run_artifact_dir),
+                "artifact": _artifact_to_dict(artifact),
+                "outputs": _output_files(artifact),
+                **(extra or {}),
+            }
+            self._write_json(os.path.join(stage_dir, TRAINING_PIPELINE_STAGE_MANIFEST_FILE_NAME), manifest)
+            self._write_json(self._index_file_path(stage_name, fingerprint), manifest)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
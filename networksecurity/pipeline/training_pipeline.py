@@ -1,4 +1,6 @@
+import os
 import sys
+import numpy as np
 from networksecurity.exception.exception import NetworkSecurityException
 from networksecurity.logging.logger import logging, log_separator
 from networksecurity.components.data_ingestion import DataIngestion
@@ -11,26 +13,76 @@ from networksecurity.entity.config_entity import (TrainingPipelineConfig, DataIn
                                                   ModelTrainerConfig)
 
 from networksecurity.entity.artifact_entity import (DataIngestionArtifact, DataValidationArtifact,
-                                                    DataTransformationArtifact)
-from networksecurity.constants.training_pipeline import TRAINING_BUCKET_NAME
+                                                    DataTransformationArtifact, ModelTrainerArtifact, in_memory_fields)
+from networksecurity.constants.training_pipeline import (TRAINING_BUCKET_NAME, TRAINING_PIPELINE_STAGES,
+                                                         SCHEMA_FILE_PATH, FINAL_MODEL_FILE_PATH,
+                                                         ARTIFACT_PERSISTENCE_SYNC)
+from networksecurity.utils.main_utils.artifact_writer import ArtifactWriter
 from networksecurity.cloud.s3_syncer import S3sync
+from networksecurity.pipeline.stage_cache import StageCache, dataframe_digest, file_digest
+from networksecurity.pipeline.run_report import RunReport
 
 
 
 
+class TrainingCancelledError(Exception):
+    pass
+
+
+
 class TrainingPipeline:
-    def __init__(self):
+    STAGES = TRAINING_PIPELINE_STAGES
+
+    def __init__(self, progress_callback=None, cancel_event=None):
+        """
+        progress_callback(stage_name, status) is called when a stage starts ("running") and
+        finishes ("completed"). When `cancel_event` is set the run stops before the next stage.
+        """
         self.training_pipeline_config = TrainingPipelineConfig()
+        self.stage_cache = StageCache(index_dir=self.training_pipeline_config.stage_index_dir,
+                                      run_artifact_dir=self.training_pipeline_config.artifact_dir)
+        self.run_report = RunReport(report_file_path=self.training_pipeline_config.run_report_file_path,
+                                    run=self.training_pipeline_config.timestamp)
+        # With in-memory handoff the stages' files are written as configured, else right away:
+        self.artifact_writer = ArtifactWriter(self.training_pipeline_config.artifact_persistence
+                                              if self.training_pipeline_config.in_memory_handoff else ARTIFACT_PERSISTENCE_SYNC)
+        self.stage_fingerprints = {}
         self.s3_sync = S3sync()
+        self.progress_callback = progress_callback
+        self.cancel_event = cancel_event
     
 
     def start_data_ingestion(self):
         try:
             self.data_ingestion_config = DataIngestionConfig(training_pipeline_config=self.training_pipeline_config)
-            data_ingestion = DataIngestion(data_ingestion_config=self.data_ingestion_config)
+            data_ingestion = DataIngestion(data_ingestion_config=self.data_ingestion_config,
+                                           artifact_writer=self.artifact_writer)
             log_separator(secion_name="DATA INGESTION")
             logging.info("Initiate Data Ingestion")
-            data_ingestion_artifact = data_ingestion.initiate_data_ingestion()
+            # The collection is the input: export it first to fingerprint it (only its new documents, into
+            # a new Feature Store partition, in incremental mode; streamed to the Feature Store in out-of-core
+            # mode; loaded otherwise).
+            if self.data_ingestion_config.incremental:
+                new_partition = data_ingestion.ingest_new_partition()
+                partitions = data_ingestion.training_partitions()
+                n_rows, input_digest = sum(partition["rows"] for partition in partitions), \
+                    data_ingestion.partitions_digest(partitions)
+                run_stage = lambda: data_ingestion.initiate_data_ingestion(partitions=partitions)
+                self.run_report.annotate("data_ingestion", partitions=len(partitions),
+                                         new_rows=new_partition["rows"] if new_partition else 0)
+            elif self.data_ingestion_config.out_of_core:
+                n_rows = data_ingestion.export_collection_to_feature_store()
+                input_digest = file_digest(self.data_ingestion_config.feature_store_file_path)
+                run_stage = data_ingestion.initiate_data_ingestion
+            else:
+                dataframe = data_ingestion.export_collection_as_df()
+                n_rows, input_digest = len(dataframe), dataframe_digest(dataframe)
+                run_stage = lambda: data_ingestion.initiate_data_ingestion(dataframe=dataframe)
+            self.run_report.annotate("data_ingestion", rows=n_rows, **data_ingestion.export_metrics)
+            data_ingestion_artifact = self._cached_stage(
+                "data_ingestion", DataIngestion, self.data_ingestion_config, DataIngestionArtifact,
+                stage_dir=self.data_ingestion_config.data_ingestion_dir,
+                input_files=[SCHEMA_FILE_PATH], input_digests=[input_digest], run_stage=run_stage)
             logging.info(f"Data Ingestion Artifacts:\n{data_ingestion_artifact}")
             logging.info("Data Ingestion Completed.")
             return data_ingestion_artifact
@@ -41,10 +93,18 @@ class TrainingPipeline:
     def start_data_validation(self, data_ingestion_artifact:DataIngestionArtifact):
         try:
             self.data_validation_config = DataValidationConfig(training_pipeline_config=self.training_pipeline_config)
-            data_validation = DataValidation(data_ingestion_artifact=data_ingestion_artifact, data_validation_config=self.data_validation_config)
+            data_validation = DataValidation(data_ingestion_artifact=data_ingestion_artifact, data_validation_config=self.data_validation_config,
+                                             artifact_writer=self.artifact_writer)
             log_separator(secion_name="DATA VALIDATION")
             logging.info("Initiate Data Validation")
-            data_validation_artifact = data_validation.initiate_data_validation()
+            data_validation_artifact = self._cached_stage(
+                "data_validation", DataValidation, self.data_validation_config, DataValidationArtifact,
+                stage_dir=self.data_validation_config.data_validation_dir,
+                **self._stage_inputs("data_ingestion", [data_ingestion_artifact.trained_file_path,
+                                                        data_ingestion_artifact.test_file_path], [SCHEMA_FILE_PATH]),
+                run_stage=data_validation.initiate_data_validation)
+            # Validation and transformation go through every ingested row.
+            self.run_report.annotate("data_validation", rows=self.run_report.stages["data_ingestion"].get("rows"))
             logging.info(f"Data Validation Artifacts:\n{data_validation_artifact}")
             logging.info("Data Validation Completed.")
             return data_validation_artifact
@@ -55,10 +115,17 @@ class TrainingPipeline:
     def start_data_transformation(self, data_validation_artifact: DataValidationArtifact):
         try:
             self.data_transformation_config = DataTransformationConfig(training_pipeline_config=self.training_pipeline_config)
-            data_transformation = DataTransformation(data_validation_artifact=data_validation_artifact, data_transformation_config=self.data_transformation_config)
+            data_transformation = DataTransformation(data_validation_artifact=data_validation_artifact, data_transformation_config=self.data_transformation_config,
+                                                     artifact_writer=self.artifact_writer)
             log_separator(secion_name="DATA TRANSFORMATION")
             logging.info("Initiate Data Transformation")
-            data_transformation_artifact = data_transformation.initiate_data_transformation()
+            data_transformation_artifact = self._cached_stage(
+                "data_transformation", DataTransformation, self.data_transformation_config, DataTransformationArtifact,
+                stage_dir=self.data_transformation_config.data_transformation_dir,
+                **self._stage_inputs("data_validation", [data_validation_artifact.valid_train_file_path,
+                                                         data_validation_artifact.valid_test_file_path], [SCHEMA_FILE_PATH]),
+                run_stage=data_transformation.initiate_data_transformation)
+            self.run_report.annotate("data_transformation", rows=self.run_report.stages["data_ingestion"].get("rows"))
             logging.info(f"Data Transformation artifacts:\n{data_transformation_artifact}")
             logging.info("Data Transformation Completed.")
             return data_transformation_artifact
@@ -72,7 +139,21 @@ class TrainingPipeline:
             model_trainer = ModelTrainer(model_trainer_config=self.model_training_config, data_transformation_artifact=data_transformation_artifact)
             log_separator(secion_name="MODEL TRAINING")
             logging.info("Initiate Model Training")
-            model_trainer_artifact = model_trainer.initiate_model_trainer()
+            artifact = data_transformation_artifact
+            model_trainer_artifact = self._cached_stage(
+                "model_training", ModelTrainer, self.model_training_config, ModelTrainerArtifact,
+                stage_dir=self.model_training_config.model_trainer_dir,
+                **self._stage_inputs("data_transformation",
+                                     [artifact.transformed_object_file_path, artifact.transformed_train_file_path,
+                                      artifact.transformed_test_file_path, artifact.transformed_train_label_file_path,
+                                      artifact.transformed_test_label_file_path], ["parameters/params.yaml"]),
+                run_stage=model_trainer.initiate_model_trainer,
+                # Training also publishes the model: only reuse a run whose model is still the published one.
+                validate=lambda manifest: manifest.get("published_model_digest") == self._published_model_digest(),
+                extra=lambda: {"published_model_digest": self._published_model_digest()})
+            self.run_report.annotate("model_training", rows=len(artifact.train_labels) if artifact.train_labels is not None
+                                     else len(np.load(artifact.transformed_train_label_file_path, mmap_mode="r")))
+            self.run_report.add_candidates(model_trainer.candidate_metrics)
             logging.info(f"Model Training Artifacts:\n{model_trainer_artifact}")
             logging.info("Model Training Completed.")
             return model_trainer_artifact
@@ -97,15 +178,95 @@ class TrainingPipeline:
         
     
 
+    @staticmethod
+    def _published_model_digest():
+        return file_digest(FINAL_MODEL_FILE_PATH) if os.path.exists(FINAL_MODEL_FILE_PATH) else None
+
+
+    def _cached_stage(self, stage_name:str, component_cls, config, artifact_cls, stage_dir:str, run_stage,
+                      input_files:list=(), input_digests:list=(), validate=None, extra=None):
+        """
+        Returns the artifact of an earlier run with the same fingerprint (see StageCache), or runs the
+        stage and records its manifest.
+        """
+        fingerprint = self.stage_cache.fingerprint(stage_name, component_cls, config,
+                                                   input_files=input_files, input_digests=input_digests)
+        self.stage_fingerprints[stage_name] = fingerprint
+        artifact = self.stage_cache.lookup(stage_name, fingerprint, artifact_cls, stage_dir, validate=validate)
+        self.run_report.annotate(stage_name, reused=artifact is not None)
+        if artifact is None:
+            artifact = run_stage()
+            # Recorded once its files are written (never if they aren't, see ArtifactWriter).
+            self.artifact_writer.submit(self.stage_cache.record, stage_name, fingerprint, artifact, stage_dir,
+                                        extra=extra() if extra is not None else None)
+        return artifact
+
+
+    def _stage_inputs(self, upstream_stage_name:str, upstream_files:list, other_files:list) -> dict:
+        """
+        The inputs a stage is fingerprinted by. With in-memory handoff the files of the upstream stage may
+        not be written yet (or ever): they are identified by that stage's fingerprint instead, which covers
+        everything they are made from.
+        """
+        if self.training_pipeline_config.in_memory_handoff:
+            return {"input_files": other_files, "input_digests": [self.stage_fingerprints[upstream_stage_name]]}
+        return {"input_files": upstream_files + other_files}
+
+
+    @staticmethod
+    def _release_in_memory(artifact) -> None:
+        # Once the next stage is done with it (the artifact writer keeps what it still has to write).
+        for field_name in in_memory_fields(artifact):
+            setattr(artifact, field_name, None)
+
+
+    def _run_stage(self, stage_name:str, stage_fn, **kwargs):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise TrainingCancelledError(f"Training run cancelled before stage: {stage_name}")
+        if self.progress_callback is not None:
+            self.progress_callback(stage_name, "running")
+        with self.run_report.stage(stage_name):
+            result = stage_fn(**kwargs)
+        if self.progress_callback is not None:
+            self.progress_callback(stage_name, "completed")
+        return result
+
+
+    def sync_to_s3(self):
+        self.artifact_writer.flush()
+        self.sync_artifact_dir_to_s3()
+        self.sync_saved_model_dir_to_s3()
+
+
     def run_pipeline(self):
+        status = "failed"
         try:
-            data_ingestion_artifact = self.start_data_ingestion()
-            data_validation_artifact = self.start_data_validation(data_ingestion_artifact=data_ingestion_artifact)
-            data_transformation_artifact = self.start_data_transformation(data_validation_artifact=data_validation_artifact)
-            model_trainer_artifact = self.start_model_training(data_transformation_artifact=data_transformation_artifact)
+            data_ingestion_artifact = self._run_stage("data_ingestion", self.start_data_ingestion)
+            data_validation_artifact = self._run_stage("data_validation", self.start_data_validation,
+                                                       data_ingestion_artifact=data_ingestion_artifact)
+            self._release_in_memory(data_ingestion_artifact)
+            data_transformation_artifact = self._run_stage("data_transformation", self.start_data_transformation,
+                                                           data_validation_artifact=data_validation_artifact)
+            self._release_in_memory(data_validation_artifact)
+            model_trainer_artifact = self._run_stage("model_training", self.start_model_training,
+                                                     data_transformation_artifact=data_transformation_artifact)
+            self._release_in_memory(data_transformation_artifact)
 
-            self.sync_artifact_dir_to_s3()
-            self.sync_saved_model_dir_to_s3()
+            self._run_stage("sync_to_s3", self.sync_to_s3)
+            status = "completed"
             return model_trainer_artifact
         except Exception as e:
-            raise NetworkSecurityException(e, sys)
\ No newline at end of file
+            if isinstance(e, TrainingCancelledError):
+                status = "cancelled"
+            raise NetworkSecurityException(e, sys)
+        finally:
+            try:
+                # The artifact files are all written (or failed) before the run ends.
+                self.artifact_writer.close()
+            except NetworkSecurityException as e:
+                logging.info(f"Could not write the artifacts: {e}")
+            try:
+                self.run_report.write(status)
+            except NetworkSecurityException as e:
+                # The report must not hide the run's own outcome.
+                logging.info(f"Could not write the run report: {e}")
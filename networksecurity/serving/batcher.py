@@ -0,0 +1,180 @@
+import time
+import asyncio
+import collections
+import numpy as np
+import pandas as pd
+from networksecurity.logging.logger import logging
+from networksecurity.constants.training_pipeline import (PREDICTION_BATCH_WINDOW_MS, PREDICTION_BATCH_MAX_ROWS,
+                                                         PREDICTION_BATCH_MAX_CONCURRENT)
+
+
+
+class _PendingRequest:
+    def __init__(self, frame:pd.DataFrame, future:asyncio.Future):
+        self.frame = frame
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+
+class PredictionBatcher:
+    """
+    Coalesces concurrent prediction requests into one vectorized `predict` call.
+
+    Requests are collected for up to `window_ms` after the first one arrives, or until
+    `max_batch_rows` rows are waiting, then predicted together and split back per caller.
+    `predict_fn` is a coroutine function taking a DataFrame and returning one label per row.
+    """
+    def __init__(self, predict_fn, window_ms:float=PREDICTION_BATCH_WINDOW_MS,
+                 max_batch_rows:int=PREDICTION_BATCH_MAX_ROWS,
+                 max_concurrent_batches:int=PREDICTION_BATCH_MAX_CONCURRENT):
+        self.predict_fn = predict_fn
+        self.window = window_ms / 1000
+        self.max_batch_rows = max_batch_rows
+        self.max_concurrent_batches = max_concurrent_batches
+        self._queue = None
+        self._worker = None
+        self._batch_slots = None
+        self._flush_tasks = set()
+
+        self._num_requests = 0
+        self._num_batches = 0
+        self._num_rows = 0
+        self._max_batch_rows_seen = 0
+        self._recent_waits_ms = collections.deque(maxlen=1000)
+        self._recent_batch_rows = collections.deque(maxlen=1000)
+
+
+    async def start(self) -> None:
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._batch_slots = asyncio.Semaphore(self.max_concurrent_batches)
+            self._worker = asyncio.create_task(self._collect_batches())
+
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        if self._flush_tasks:
+            await asyncio.gather(*self._flush_tasks, return_exceptions=True)
+
+
+    async def predict(self, frame:pd.DataFrame) -> np.ndarray:
+        if self._worker is None:
+            await self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_PendingRequest(frame=frame, future=future))
+        # A failure of predict_fn on this request's own rows is re-raised unchanged (see `_predict_group`).
+        return await future
+
+
+    async def _collect_batches(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            first = await self._queue.get()
+            batch = [first]
+            batch_rows = len(first.frame)
+            deadline = loop.time() + self.window
+
+            while batch_rows < self.max_batch_rows:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(pending)
+                batch_rows += len(pending.frame)
+
+            await self._batch_slots.acquire()
+            task = asyncio.create_task(self._flush(batch))
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+
+
+    async def _flush(self, batch:list) -> None:
+        try:
+            started_at = time.perf_counter()
+            for pending in batch:
+                self._recent_waits_ms.append((started_at - pending.enqueued_at) * 1000)
+
+            # Only frames with the same columns can be stacked into one matrix:
+            groups = collections.defaultdict(list)
+            for pending in batch:
+                groups[tuple(pending.frame.columns)].append(pending)
+
+            for group in groups.values():
+                await self._predict_group(group)
+        finally:
+            self._batch_slots.release()
+
+
+    async def _predict_group(self, group:list) -> None:
+        frames = [pending.frame for pending in group]
+        batch_frame = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+        batch_rows = len(batch_frame)
+        self._num_batches += 1
+        self._num_requests += len(group)
+        self._num_rows += batch_rows
+        self._max_batch_rows_seen = max(self._max_batch_rows_seen, batch_rows)
+        self._recent_batch_rows.append(batch_rows)
+
+        try:
+            y_pred = np.asarray(await self.predict_fn(batch_frame))
+        except Exception as e:
+            if len(group) == 1:
+                if not group[0].future.done():
+                    group[0].future.set_exception(e)
+                return
+            # One bad request (e.g. a non-numeric cell) must not fail the others it was batched with:
+            # predict each on its own, so only the requests that fail by themselves get an error.
+            logging.info(f"Batched prediction of {batch_rows} rows failed ({e}), predicting its {len(group)} requests one by one.")
+            for pending in group:
+                await self._predict_alone(pending)
+            return
+
+        offset = 0
+        for pending in group:
+            rows = len(pending.frame)
+            if not pending.future.done():
+                pending.future.set_result(y_pred[offset:offset + rows])
+            offset += rows
+
+
+    async def _predict_alone(self, pending:_PendingRequest) -> None:
+        try:
+            y_pred = np.asarray(await self.predict_fn(pending.frame))
+        except Exception as e:
+            if not pending.future.done():
+                pending.future.set_exception(e)
+            return
+        if not pending.future.done():
+            pending.future.set_result(y_pred)
+
+
+    def stats(self) -> dict:
+        waits = np.asarray(self._recent_waits_ms, dtype=float)
+        batch_rows = np.asarray(self._recent_batch_rows, dtype=float)
+        return {
+            "requests": self._num_requests,
+            "batches": self._num_batches,
+            "rows": self._num_rows,
+            "queued_requests": self._queue.qsize() if self._queue is not None else 0,
+            "mean_requests_per_batch": self._num_requests / self._num_batches if self._num_batches else 0.0,
+            "mean_batch_rows": float(batch_rows.mean()) if batch_rows.size else 0.0,
+            "max_batch_rows": self._max_batch_rows_seen,
+            "queue_wait_ms": {
+                "mean": float(waits.mean()) if waits.size else 0.0,
+                "p50": float(np.percentile(waits, 50)) if waits.size else 0.0,
+                "p95": float(np.percentile(waits, 95)) if waits.size else 0.0,
+                "max": float(waits.max()) if waits.size else 0.0,
+            },
+            "window_ms": self.window * 1000,
+            "max_batch_rows_limit": self.max_batch_rows,
+        }
@@ -0,0 +1,111 @@
+import sys
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.logging.logger import logging
+from networksecurity.constants.training_pipeline import (SERVING_CPU_WORKERS, SERVING_IO_WORKERS,
+                                                         SERVING_MAX_PENDING_CPU_TASKS, SERVING_QUEUE_TIMEOUT_SECONDS)
+from networksecurity.serving import tasks
+from networksecurity.utils.ml_utils.model.prediction_cache import COUNTER_NAMES, counters_to_stats
+
+
+
+class ExecutorSaturatedError(Exception):
+    """Raised when no CPU slot frees up within the queue timeout, so the route can answer 503."""
+
+
+
+class ExecutionLayer:
+    """
+    Keeps blocking work off the event loop.
+
+    - CPU-bound work (CSV parsing, inference, HTML rendering) runs in a process pool.
+    - Blocking I/O (writing outputs) runs in a thread pool.
+
+    At most `max_pending_cpu_tasks` CPU tasks may be queued or running at once. Further callers wait up
+    to `queue_timeout` seconds for a slot and then get `ExecutorSaturatedError`.
+    """
+    def __init__(self, model_file_path:str, cpu_workers:int=SERVING_CPU_WORKERS, io_workers:int=SERVING_IO_WORKERS,
+                 max_pending_cpu_tasks:int=SERVING_MAX_PENDING_CPU_TASKS,
+                 queue_timeout:float=SERVING_QUEUE_TIMEOUT_SECONDS):
+        self.model_file_path = model_file_path
+        self.cpu_workers = cpu_workers
+        self.io_workers = io_workers
+        self.max_pending_cpu_tasks = max_pending_cpu_tasks
+        self.queue_timeout = queue_timeout
+        self._cpu_pool = None
+        self._io_pool = None
+        self._cpu_slots = None
+        self._pending_cpu_tasks = 0
+        self._cache_counters = None
+
+
+    def start(self) -> None:
+        try:
+            if self._cpu_pool is not None:
+                return
+            # "spawn" keeps the workers independent of the server's threads and event loop.
+            mp_context = multiprocessing.get_context("spawn")
+            # Shared by the workers' prediction caches so stats cover all of them.
+            self._cache_counters = mp_context.Array("q", len(COUNTER_NAMES))
+            self._cpu_pool = ProcessPoolExecutor(max_workers=self.cpu_workers, mp_context=mp_context,
+                                                 initializer=tasks.init_worker,
+                                                 initargs=(self.model_file_path, self._cache_counters))
+            self._io_pool = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="serving-io")
+            self._cpu_slots = asyncio.Semaphore(self.max_pending_cpu_tasks)
+            logging.info(f"Execution layer started with {self.cpu_workers} CPU workers and {self.io_workers} I/O threads.")
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
+    def shutdown(self) -> None:
+        for pool in (self._cpu_pool, self._io_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        self._cpu_pool = self._io_pool = None
+
+
+    async def run_cpu(self, fn, *args, **kwargs):
+        try:
+            await asyncio.wait_for(self._cpu_slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise ExecutorSaturatedError(
+                f"All {self.max_pending_cpu_tasks} CPU slots are busy, retry later.")
+        return await self._run_in_cpu_slot(fn, *args, **kwargs)
+
+
+    async def run_cpu_when_free(self, fn, *args, **kwargs):
+        """
+        Like `run_cpu` but waits for a slot instead of failing, for work that can no longer be
+        rejected (e.g. the next chunk of a response that is already streaming).
+        """
+        await self._cpu_slots.acquire()
+        return await self._run_in_cpu_slot(fn, *args, **kwargs)
+
+
+    async def _run_in_cpu_slot(self, fn, *args, **kwargs):
+        # The caller has already acquired a slot.
+        self._pending_cpu_tasks += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._cpu_pool, functools.partial(fn, *args, **kwargs))
+        finally:
+            self._pending_cpu_tasks -= 1
+            self._cpu_slots.release()
+
+
+    async def run_io(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._io_pool, functools.partial(fn, *args, **kwargs))
+
+
+    def stats(self) -> dict:
+        return {
+            "cpu_workers": self.cpu_workers,
+            "io_workers": self.io_workers,
+            "pending_cpu_tasks": self._pending_cpu_tasks,
+            "max_pending_cpu_tasks": self.max_pending_cpu_tasks,
+            "prediction_cache": counters_to_stats(self._cache_counters) if self._cache_counters is not None else None,
+        }
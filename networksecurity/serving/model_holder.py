@@ -0,0 +1,108 @@
+import os
+import sys
+import time
+import threading
+import pandas as pd
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.logging.logger import logging
+from networksecurity.constants.training_pipeline import (SCHEMA_FILE_PATH, MODEL_HOLDER_REFRESH_INTERVAL_SECONDS,
+                                                         MODEL_HOLDER_WARMUP_BATCH_SIZE, MODEL_HOLDER_MMAP_MODE)
+from networksecurity.utils.main_utils.utils import load_object, get_schema_feature_columns
+
+
+
+class ModelHolder:
+    """
+    Keeps one unpickled NetworkModel resident for the whole process and swaps in a
+    newer one when the published model file changes. Its arrays are memory-mapped from
+    the file (see MODEL_HOLDER_MMAP_MODE), so every worker process shares one copy.
+
+    Callers take a reference with `get()` and keep using it for the rest of the request,
+    so a swap never affects work that is already in flight.
+    """
+    def __init__(self, model_file_path:str, refresh_interval:float=MODEL_HOLDER_REFRESH_INTERVAL_SECONDS,
+                 mmap_mode:str=MODEL_HOLDER_MMAP_MODE):
+        try:
+            self.model_file_path = model_file_path
+            self.refresh_interval = refresh_interval
+            self.mmap_mode = mmap_mode
+            self._model = None
+            self._version = None
+            self._last_checked = 0.0
+            self._reload_lock = threading.Lock()
+            self._feature_columns = get_schema_feature_columns(SCHEMA_FILE_PATH)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
+    @property
+    def version(self):
+        return self._version
+
+
+    def _fingerprint(self):
+        """
+        The model is published with an atomic rename, so (inode, size, mtime) changes
+        exactly when a new file is swapped in.
+        """
+        if not os.path.exists(self.model_file_path):
+            return None
+        stat = os.stat(self.model_file_path)
+        return f"{stat.st_ino}-{stat.st_size}-{stat.st_mtime_ns}"
+
+
+    def _warm_up(self, model) -> None:
+        dummy_batch = pd.DataFrame(0, index=range(MODEL_HOLDER_WARMUP_BATCH_SIZE), columns=self._feature_columns)
+        model.predict(dummy_batch)
+
+
+    def load(self) -> bool:
+        """
+        Loads (or reloads) the model if the published file changed. Returns True when a new model was swapped in.
+        """
+        try:
+            with self._reload_lock:
+                self._last_checked = time.monotonic()
+                fingerprint = self._fingerprint()
+                if fingerprint is None or fingerprint == self._version:
+                    return False
+
+                logging.info(f"Loading model from {self.model_file_path} (version: {fingerprint})")
+                model = load_object(self.model_file_path, mmap_mode=self.mmap_mode)
+                self._warm_up(model)
+
+                # Single reference assignment: readers see either the old or the new model, never a mix.
+                self._model, self._version = model, fingerprint
+                logging.info(f"Model version {fingerprint} is now serving.")
+                return True
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
+    def refresh_if_stale(self) -> None:
+        if time.monotonic() - self._last_checked < self.refresh_interval:
+            return
+        if self._reload_lock.locked():
+            # Another request is already loading the new model, keep serving the current one.
+            return
+        try:
+            self.load()
+        except NetworkSecurityException as e:
+            if self._model is None:
+                raise
+            logging.info(f"Could not reload the model, keeping version {self._version}: {e}")
+
+
+    def get(self):
+        """
+        Returns the current model, loading it on first use.
+        """
+        try:
+            self.refresh_if_stale()
+            if self._model is None:
+                self.load()
+            if self._model is None:
+                raise Exception(f"No trained model found at {self.model_file_path}. Train a model first.")
+            return self._model
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
@@ -0,0 +1,119 @@
+import os
+import re
+import sys
+import uuid
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.logging.logger import logging
+from networksecurity.constants.training_pipeline import (PREDICTION_OUTPUT_DIR, PREDICTION_RESULT_FILE_NAME,
+                                                         PREDICTION_RESULT_ROW_GROUP_SIZE, PREDICTION_COLUMN_NAME)
+
+
+
+JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+
+class PredictionResultStore:
+    """
+    Stores every prediction job under `prediction_output/<job_id>/` as one Parquet file, so
+    concurrent jobs never overwrite each other and results can be paged without loading them whole.
+    """
+    def __init__(self, root_dir:str=PREDICTION_OUTPUT_DIR):
+        self.root_dir = root_dir
+
+
+    @staticmethod
+    def new_job_id() -> str:
+        return uuid.uuid4().hex
+
+
+    def result_file_path(self, job_id:str) -> str:
+        if not JOB_ID_PATTERN.match(job_id):
+            raise ValueError(f"Invalid prediction job id: {job_id}")
+        return os.path.join(self.root_dir, job_id, PREDICTION_RESULT_FILE_NAME)
+
+
+    def exists(self, job_id:str) -> bool:
+        try:
+            return os.path.exists(self.result_file_path(job_id))
+        except ValueError:
+            return False
+
+
+    def save(self, job_id:str, dataframe:pd.DataFrame) -> str:
+        try:
+            file_path = self.result_file_path(job_id)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+            # The features are small integers: store them in the narrowest integer type.
+            compact_df = dataframe.reset_index(drop=True).copy()
+            for column in compact_df.columns:
+                if pd.api.types.is_integer_dtype(compact_df[column]):
+                    compact_df[column] = pd.to_numeric(compact_df[column], downcast="integer")
+
+            table = pa.Table.from_pandas(compact_df, preserve_index=False)
+            tmp_file_path = f"{file_path}.tmp"
+            pq.write_table(table, tmp_file_path, row_group_size=PREDICTION_RESULT_ROW_GROUP_SIZE)
+            os.replace(tmp_file_path, file_path)
+            logging.info(f"Saved {len(compact_df)} predictions for job {job_id} at {file_path}")
+            return file_path
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
+    def _selected_rows(self, parquet_file:pq.ParquetFile, file_path:str, prediction=None) -> np.ndarray:
+        total_rows = parquet_file.metadata.num_rows
+        if prediction is None:
+            return np.arange(total_rows)
+        # Only the (1 byte per row) prediction column is read to resolve the filter.
+        predictions = pq.read_table(file_path, columns=[PREDICTION_COLUMN_NAME]).column(0).to_numpy()
+        return np.flatnonzero(predictions == prediction)
+
+
+    def read_page(self, job_id:str, page:int, page_size:int, prediction=None):
+        """
+        Returns (page_df, matching_rows). Only the row groups that hold the requested page are read.
+        """
+        try:
+            file_path = self.result_file_path(job_id)
+            parquet_file = pq.ParquetFile(file_path)
+            selected_rows = self._selected_rows(parquet_file, file_path, prediction=prediction)
+            start = (page - 1) * page_size
+            page_rows = selected_rows[start:start + page_size]
+            if page_rows.size == 0:
+                return parquet_file.schema_arrow.empty_table().to_pandas(), int(selected_rows.size)
+
+            row_group_sizes = [parquet_file.metadata.row_group(i).num_rows for i in range(parquet_file.num_row_groups)]
+            row_group_starts = np.concatenate([[0], np.cumsum(row_group_sizes)[:-1]])
+            row_groups = np.unique(np.searchsorted(row_group_starts, page_rows, side="right") - 1)
+
+            table = parquet_file.read_row_groups(row_groups.tolist())
+            # Position of each page row inside the concatenation of the row groups just read:
+            read_starts = np.concatenate([[0], np.cumsum([row_group_sizes[i] for i in row_groups])[:-1]])
+            group_of_row = np.searchsorted(row_group_starts[row_groups], page_rows, side="right") - 1
+            local_rows = read_starts[group_of_row] + page_rows - row_group_starts[row_groups][group_of_row]
+
+            page_df = table.take(pa.array(local_rows)).to_pandas()
+            page_df.index = page_rows
+            return page_df, int(selected_rows.size)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
+    def iter_csv(self, job_id:str, prediction=None):
+        """
+        Yields the job's results as CSV, one row group at a time.
+        """
+        try:
+            parquet_file = pq.ParquetFile(self.result_file_path(job_id))
+            for i in range(parquet_file.num_row_groups):
+                chunk_df = parquet_file.read_row_group(i).to_pandas()
+                if prediction is not None:
+                    chunk_df = chunk_df[chunk_df[PREDICTION_COLUMN_NAME] == prediction]
+                yield chunk_df.to_csv(index=False, header=(i == 0)).encode()
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
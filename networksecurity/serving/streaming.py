@@ -0,0 +1,77 @@
+import sys
+import asyncio
+import collections
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.constants.training_pipeline import PREDICTION_STREAM_CHUNK_BYTES
+from networksecurity.serving import tasks
+
+
+
+STREAM_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+
+async def iter_csv_chunks(upload, chunk_bytes:int=PREDICTION_STREAM_CHUNK_BYTES):
+    """
+    Reads an uploaded CSV in fixed-size blocks and yields (header, body) pairs, where body holds
+    only complete lines. Only one block plus one partial line is held in memory at a time.
+    Fields must not contain quoted newlines (true for the numeric feature files we serve).
+    """
+    header = b""
+    carry = b""
+    while True:
+        block = await upload.read(chunk_bytes)
+        data = carry + block
+        if not header:
+            newline = data.find(b"\n")
+            if newline == -1:
+                if not block:
+                    return
+                carry = data
+                continue
+            header, data = data[:newline + 1], data[newline + 1:]
+
+        if not block:
+            # End of file: whatever is left is the last (possibly unterminated) line.
+            if data.strip():
+                yield header, data
+            return
+
+        last_newline = data.rfind(b"\n")
+        if last_newline == -1:
+            carry = data
+            continue
+        body, carry = data[:last_newline + 1], data[last_newline + 1:]
+        if body.strip():
+            yield header, body
+
+
+
+async def stream_predictions(chunks, execution_layer, output_format:str, header:bytes, first_result:bytes):
+    """
+    Predicts the remaining `chunks` one by one and yields the encoded results in input order.
+
+    Up to one chunk per CPU worker is in flight, so memory stays bounded by
+    `cpu_workers * chunk_bytes` whatever the size of the upload. The route predicts the first
+    chunk itself (so a saturated server can still answer 503) and passes its result in.
+    """
+    in_flight = collections.deque()
+    try:
+        yield first_result
+        async for _, body in chunks:
+            in_flight.append(asyncio.ensure_future(
+                execution_layer.run_cpu_when_free(tasks.predict_csv_chunk, header, body, output_format, False)))
+            if len(in_flight) >= execution_layer.cpu_workers:
+                yield await in_flight.popleft()
+
+        while in_flight:
+            yield await in_flight.popleft()
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+    finally:
+        # Client went away or a chunk failed: don't leave work queued for a dead response.
+        for pending in in_flight:
+            pending.cancel()
@@ -0,0 +1,68 @@
+"""
+CPU-bound work run inside the serving worker processes.
+
+Every function here is module-level so it can be pickled into a ProcessPoolExecutor.
+Each worker process keeps its own resident ModelHolder and PredictionCache, created by `init_worker`.
+"""
+import io
+import sys
+import pandas as pd
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.logging.logger import logging
+from networksecurity.serving.model_holder import ModelHolder
+from networksecurity.utils.ml_utils.model.prediction_cache import PredictionCache
+from networksecurity.constants.training_pipeline import PREDICTION_COLUMN_NAME
+
+
+_model_holder = None
+_prediction_cache = None
+
+
+def init_worker(model_file_path:str, cache_counters=None) -> None:
+    global _model_holder, _prediction_cache
+    _model_holder = ModelHolder(model_file_path=model_file_path)
+    _prediction_cache = PredictionCache(counters=cache_counters)
+    try:
+        _model_holder.load()
+    except Exception as e:
+        # Not fatal: the worker retries on its first prediction (e.g. before the first training run).
+        logging.info(f"Worker started without a model: {e}")
+
+
+def parse_csv(data:bytes) -> pd.DataFrame:
+    try:
+        return pd.read_csv(io.BytesIO(data))
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def predict(df:pd.DataFrame):
+    try:
+        network_model = _model_holder.get()
+        # Workers run one task at a time, so the version read here is the one of network_model.
+        return _prediction_cache.predict(network_model, df, model_version=_model_holder.version)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def predict_csv_chunk(header:bytes, body:bytes, output_format:str, include_header:bool) -> bytes:
+    """
+    Parses one chunk of CSV lines, predicts it and returns the rows with predictions as CSV or NDJSON.
+    """
+    try:
+        df = pd.read_csv(io.BytesIO(header + body))
+        df[PREDICTION_COLUMN_NAME] = predict(df)
+        if output_format == "ndjson":
+            output = df.to_json(orient="records", lines=True)
+            return output.encode() if output.endswith("\n") else (output + "\n").encode()
+        return df.to_csv(index=False, header=include_header).encode()
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def render_table_html(df:pd.DataFrame) -> str:
+    try:
+        return df.to_html(classes="table table-striped")
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
@@ -0,0 +1,196 @@
+import sys
+import time
+import uuid
+import queue
+import threading
+import multiprocessing
+from dataclasses import dataclass, field, asdict
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.logging.logger import logging
+from networksecurity.constants.training_pipeline import (TRAINING_JOB_CANCEL_GRACE_SECONDS, TRAINING_JOB_HISTORY_SIZE,
+                                                         TRAINING_JOB_POLL_INTERVAL_SECONDS, TRAINING_PIPELINE_STAGES)
+
+
+
+ACTIVE_STATUSES = ("queued", "running", "cancelling")
+
+
+
+@dataclass
+class TrainingJob:
+    job_id: str
+    status: str = "queued"
+    submitted_at: float = field(default_factory=time.time)
+    started_at: float = None
+    finished_at: float = None
+    current_stage: str = None
+    stages: dict = field(default_factory=dict)
+    error: str = None
+
+    def to_dict(self) -> dict:
+        job = asdict(self)
+        completed = sum(1 for stage in self.stages.values() if stage["status"] == "completed")
+        job["progress"] = completed / len(self.stages) if self.stages else 0.0
+        return job
+
+
+
+def _run_training_job(job_id:str, events:multiprocessing.Queue, cancel_event) -> None:
+    """
+    Entry point of the training process. Reports progress to the server through `events`.
+    """
+    def report(stage, status):
+        events.put({"job_id": job_id, "type": "stage", "stage": stage, "status": status, "time": time.time()})
+
+    try:
+        # Imported in the child so the serving process never loads the training stack.
+        from networksecurity.pipeline.training_pipeline import TrainingPipeline
+        events.put({"job_id": job_id, "type": "started", "time": time.time()})
+        TrainingPipeline(progress_callback=report, cancel_event=cancel_event).run_pipeline()
+        events.put({"job_id": job_id, "type": "finished", "status": "succeeded", "time": time.time()})
+    except Exception as e:
+        status = "cancelled" if cancel_event.is_set() else "failed"
+        events.put({"job_id": job_id, "type": "finished", "status": status, "error": str(e), "time": time.time()})
+
+
+
+class TrainingJobScheduler:
+    """
+    Runs training pipelines in a background process, one at a time.
+
+    Submitting while a run is queued or running returns that run instead of starting a second
+    one, so concurrent `/train` calls never race on `Artifacts/` and `final_model/`.
+    """
+    def __init__(self, stages:list=TRAINING_PIPELINE_STAGES, cancel_grace_seconds:float=TRAINING_JOB_CANCEL_GRACE_SECONDS,
+                 history_size:int=TRAINING_JOB_HISTORY_SIZE):
+        self.stages = stages
+        self.cancel_grace_seconds = cancel_grace_seconds
+        self.history_size = history_size
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._mp_context = multiprocessing.get_context("spawn")
+        self._process = None
+        self._cancel_event = None
+        self._cancel_requested_at = None
+
+
+    def submit(self):
+        """
+        Returns (job, coalesced).
+        """
+        try:
+            with self._lock:
+                for job in self._jobs.values():
+                    if job.status in ACTIVE_STATUSES:
+                        return job.to_dict(), True
+
+                job = TrainingJob(job_id=uuid.uuid4().hex,
+                                  stages={stage: {"status": "pending", "started_at": None, "finished_at": None}
+                                          for stage in self.stages})
+                self._jobs[job.job_id] = job
+                self._trim_history()
+
+                events = self._mp_context.Queue()
+                self._cancel_event = self._mp_context.Event()
+                self._cancel_requested_at = None
+                self._process = self._mp_context.Process(target=_run_training_job,
+                                                         args=(job.job_id, events, self._cancel_event),
+                                                         name=f"training-{job.job_id}", daemon=True)
+                self._process.start()
+                threading.Thread(target=self._monitor, args=(job.job_id, self._process, events),
+                                 name=f"training-monitor-{job.job_id}", daemon=True).start()
+                logging.info(f"Training job {job.job_id} submitted.")
+                return job.to_dict(), False
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
+    def get(self, job_id:str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job is not None else None
+
+
+    def list_jobs(self) -> list:
+        with self._lock:
+            return [job.to_dict() for job in reversed(list(self._jobs.values()))]
+
+
+    def cancel(self, job_id:str):
+        """
+        Asks the run to stop before its next stage; it is terminated if it is still alive after
+        the grace period (e.g. in the middle of the model search).
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status not in ACTIVE_STATUSES:
+                return job.to_dict() if job is not None else None
+            job.status = "cancelling"
+            self._cancel_event.set()
+            self._cancel_requested_at = time.monotonic()
+            logging.info(f"Cancellation requested for training job {job_id}.")
+            return job.to_dict()
+
+
+    def _trim_history(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.status not in ACTIVE_STATUSES]
+        for job_id in finished[:max(0, len(self._jobs) - self.history_size)]:
+            del self._jobs[job_id]
+
+
+    def _apply_event(self, event:dict) -> None:
+        with self._lock:
+            job = self._jobs[event["job_id"]]
+            if event["type"] == "started":
+                job.started_at = event["time"]
+                if job.status == "queued":
+                    job.status = "running"
+            elif event["type"] == "stage":
+                stage = job.stages.setdefault(event["stage"], {"status": "pending", "started_at": None, "finished_at": None})
+                stage["status"] = event["status"]
+                if event["status"] == "running":
+                    stage["started_at"] = event["time"]
+                    job.current_stage = event["stage"]
+                else:
+                    stage["finished_at"] = event["time"]
+            elif event["type"] == "finished":
+                if job.current_stage is not None and event["status"] != "succeeded":
+                    job.stages[job.current_stage]["status"] = event["status"]
+                    job.stages[job.current_stage]["finished_at"] = event["time"]
+                job.status = event["status"]
+                job.error = event.get("error")
+                job.finished_at = event["time"]
+                job.current_stage = None
+
+
+    def _monitor(self, job_id:str, process, events) -> None:
+        finished = False
+        while not finished:
+            try:
+                event = events.get(timeout=TRAINING_JOB_POLL_INTERVAL_SECONDS)
+                self._apply_event(event)
+                finished = event["type"] == "finished"
+                continue
+            except queue.Empty:
+                pass
+
+            if not process.is_alive():
+                # The process died without reporting (killed, crashed or terminated on cancel).
+                with self._lock:
+                    job = self._jobs[job_id]
+                    job.status = "cancelled" if job.status == "cancelling" else "failed"
+                    if job.current_stage is not None:
+                        job.stages[job.current_stage]["status"] = job.status
+                        job.stages[job.current_stage]["finished_at"] = time.time()
+                    job.error = job.error or f"Training process exited with code {process.exitcode}"
+                    job.finished_at = time.time()
+                    job.current_stage = None
+                finished = True
+            elif (self._cancel_requested_at is not None
+                  and time.monotonic() - self._cancel_requested_at > self.cancel_grace_seconds):
+                logging.info(f"Training job {job_id} did not stop within {self.cancel_grace_seconds}s, terminating it.")
+                process.terminate()
+                self._cancel_requested_at = None
+
+        process.join(timeout=self.cancel_grace_seconds)
+        logging.info(f"Training job {job_id} finished with status: {self.get(job_id)['status']}")
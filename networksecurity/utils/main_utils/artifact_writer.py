@@ -0,0 +1,64 @@
+import sys
+import copy
+from concurrent.futures import ThreadPoolExecutor
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.logging.logger import logging
+from networksecurity.constants.training_pipeline import (ARTIFACT_PERSISTENCE_SYNC, ARTIFACT_PERSISTENCE_ASYNC,
+                                                         ARTIFACT_PERSISTENCE_OFF)
+
+
+
+class ArtifactWriter:
+    """
+    Writes the artifact files of the stages: right away ("sync"), on one background thread while the
+    next stages run ("async", in the order they were submitted), or not at all ("off", when the stages
+    hand their outputs over in memory only). `flush` waits for the pending writes.
+    """
+    def __init__(self, mode:str=ARTIFACT_PERSISTENCE_SYNC):
+        if mode not in (ARTIFACT_PERSISTENCE_SYNC, ARTIFACT_PERSISTENCE_ASYNC, ARTIFACT_PERSISTENCE_OFF):
+            raise ValueError(f"Unknown artifact persistence {mode!r}.")
+        self.mode = mode
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="artifact_writer") \
+            if mode == ARTIFACT_PERSISTENCE_ASYNC else None
+        self._pending = []
+
+
+    def submit(self, write_fn, *args, **kwargs) -> None:
+        if self.mode == ARTIFACT_PERSISTENCE_OFF:
+            return
+        if self._executor is None:
+            write_fn(*args, **kwargs)
+            return
+        self._pending.append(self._executor.submit(write_fn, *args, **kwargs))
+
+
+    def snapshot(self, obj):
+        """
+        What to submit for an object the next stages keep using (and may change, e.g. a fitted model caching
+        its lookup structures): a copy made now when it is written in the background, else the object itself.
+        """
+        return copy.deepcopy(obj) if self._executor is not None else obj
+
+
+    def flush(self) -> None:
+        """
+        Waits for every pending write, and raises the first failure.
+        """
+        try:
+            pending, self._pending = self._pending, []
+            if pending:
+                logging.info(f"Waiting for {len(pending)} artifact writes.")
+            errors = [future.exception() for future in pending]
+            for error in errors:
+                if error is not None:
+                    raise error
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
+    def close(self) -> None:
+        try:
+            self.flush()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
@@ -1,12 +1,19 @@
 import yaml
 from networksecurity.exception.exception import NetworkSecurityException
 from networksecurity.logging.logger import logging
+from networksecurity.constants.training_pipeline import (TARGET_COLUMN, FEATURE_MISSING_SENTINEL, TABLE_FORMAT_CSV,
+                                                         TABLE_FORMAT_PARQUET, TABLE_FORMAT_ARROW, TABLE_FORMAT_EXTENSIONS)
 import os
 import sys
-import pickle
+import time
+import joblib
 import pandas as pd
-from sklearn.model_selection import GridSearchCV
+import pyarrow as pa
+import pyarrow.parquet as pq
+from contextlib import contextmanager
 from sklearn.metrics import r2_score
+from scipy.stats import ks_2samp, kstwo
+from networksecurity.utils.ml_utils.model.search import ParallelSearchExecutor
 import numpy as np
 
 # 1. To read the YAML File:
@@ -33,22 +40,62 @@ def write_yaml_file(file_path:str, content:object, replace:bool=False) -> None:
     
 
 
-# 3. To read the data:
-def read_data(file_path:str) -> pd.DataFrame:
+# 3. To read the data: a CSV, Parquet or Arrow IPC file, by its extension (see ARTIFACT_TABLE_FORMAT).
+#    Pass `get_schema_dtypes(...)` as dtypes for the compact, schema-typed columns, and `columns` to read only
+#    those. Parquet and Arrow files are memory-mapped unless memory_map=False (Arrow columns are then
+#    used in place, not read). With chunk_rows, returns an iterator of DataFrames of that many rows instead:
+def read_data(file_path:str, dtypes:dict=None, chunk_rows:int=None, columns:list=None,
+              memory_map:bool=True) -> pd.DataFrame:
     try:
         logging.info(f"Reading data from: {file_path}")
-        return pd.read_csv(file_path)
+        table_format = _table_format(file_path)
+        if table_format == TABLE_FORMAT_CSV:
+            return pd.read_csv(file_path, dtype=dtypes, chunksize=chunk_rows, usecols=columns)
+        if table_format == TABLE_FORMAT_PARQUET:
+            parquet_file = pq.ParquetFile(file_path, memory_map=memory_map)
+            if chunk_rows:
+                return (_arrow_to_frame(batch, dtypes) for batch in parquet_file.iter_batches(batch_size=chunk_rows,
+                                                                                              columns=columns))
+            return _arrow_to_frame(parquet_file.read(columns=columns), dtypes)
+        table = pa.ipc.open_file(pa.memory_map(file_path) if memory_map else pa.OSFile(file_path)).read_all()
+        table = table.select(columns) if columns is not None else table
+        if chunk_rows:
+            return (_arrow_to_frame(table.slice(start, chunk_rows), dtypes) for start in range(0, table.num_rows, chunk_rows))
+        return _arrow_to_frame(table, dtypes)
     except Exception as e:
         raise NetworkSecurityException(e, sys)
 
+
+def _table_format(file_path:str) -> str:
+    extension = os.path.splitext(file_path)[1]
+    for table_format, format_extension in TABLE_FORMAT_EXTENSIONS.items():
+        if extension == format_extension:
+            return table_format
+    return TABLE_FORMAT_CSV
+
+
+# Arrow integer columns straight to pandas' nullable types (columns with nulls skip the float64 step):
+_ARROW_NULLABLE_INTEGER_TYPES = {pa.int8(): pd.Int8Dtype(), pa.int16(): pd.Int16Dtype(), pa.int32(): pd.Int32Dtype(),
+                                 pa.int64(): pd.Int64Dtype()}
+
+
+def _arrow_to_frame(table, dtypes:dict=None) -> pd.DataFrame:
+    dataframe = table.to_pandas(types_mapper=_ARROW_NULLABLE_INTEGER_TYPES.get)
+    if dtypes:
+        dataframe = dataframe.astype({column: dtype for column, dtype in dtypes.items() if column in dataframe.columns})
+    return dataframe
+
 # 4. To save a NumPy array data:
 def save_numpy_array_data(file_path:str, array:np.array):
     try:
         logging.info(f"Saving the NumPy array data at: {file_path}")
         dir_path = os.path.dirname(file_path)
         os.makedirs(dir_path, exist_ok=True)
-        with open(file_path, "wb") as file_obj:
+        # Swapped in like save_obj_to_pkl's files: a process with the previous array memory-mapped keeps it intact.
+        tmp_file_path = f"{file_path}.{os.getpid()}.tmp"
+        with open(tmp_file_path, "wb") as file_obj:
             np.save(file_obj, array)
+        os.replace(tmp_file_path, file_path)
     except Exception as e:
         raise NetworkSecurityException(e, sys)
     
@@ -59,49 +106,256 @@ def save_obj_to_pkl(file_path:str, obj:object) -> None:
         logging.info(f"Saving the object as .pkl file at: {file_path}")
         dir_path = os.path.dirname(file_path)
         os.makedirs(dir_path, exist_ok=True)
-        with open(file_path, "wb") as file_obj:
-            pickle.dump(obj, file_obj)
+        # Write to a temporary file in the same directory and swap it in, so readers
+        # never see a half-written pickle (os.replace is atomic on the same filesystem).
+        # joblib stores the NumPy arrays as aligned raw buffers, so load_object can memory-map them:
+        tmp_file_path = f"{file_path}.{os.getpid()}.tmp"
+        with open(tmp_file_path, "wb") as file_obj:
+            joblib.dump(obj, file_obj)
+            file_obj.flush()
+            os.fsync(file_obj.fileno())
+        os.replace(tmp_file_path, file_path)
     except Exception as e:
         raise NetworkSecurityException(e, sys)
     
 
-# 6. Load the object file:
-def load_object(file_path:str) -> object:
+# 6. Load the object file (saved by save_obj_to_pkl, or a plain pickle). With mmap_mode="r" its NumPy arrays
+#    are memory-mapped read-only instead of read: processes loading the same file share one page-cache copy.
+#    A file is only ever replaced (os.replace), never rewritten, so the mapped arrays stay valid:
+def load_object(file_path:str, mmap_mode:str=None) -> object:
     try:
         if not os.path.exists(file_path):
             raise Exception(f"The file at {file_path} doesn't exist.")
-        with open(file_path, "rb") as file_obj:
-            return pickle.load(file_obj)
+        return joblib.load(file_path, mmap_mode=mmap_mode)
     except Exception as e:
         raise NetworkSecurityException(e, sys)
     
 
 # 7. Evaluate the models:
-def evaluate_models(X_train, y_train, X_test, y_test, models, params):
-    try:
-        report = {}
-        for model_name, model in models.items():
-            param = params.get(model_name)
+def evaluate_models(X_train, y_train, X_test, y_test, models, params, n_jobs:int=None, search_config:dict=None,
+                    cache_dir:str=None, cache_models:bool=True, candidate_metrics:dict=None):
+    """
+    Searches every model's hyperparameters in parallel (see ParallelSearchExecutor), replaces each
+    entry of `models` with its refitted best estimator and returns {model_name: test r2 score}.
 
-            grid_search = GridSearchCV(estimator=model, param_grid=param, cv=3)
-            grid_search.fit(X_train, y_train)
-
-            model.set_params(**grid_search.best_params_)
-            model.fit(X_train, y_train)
+    search_config: the `search` section of params.yaml ({"strategies": {...}, "time_budget_seconds": ...}),
+    full grids for every model when omitted.
+    cache_dir: where CV scores (and, with cache_models, refitted estimators) are kept across runs.
+    candidate_metrics: if given, filled with {model_name: cost of its search, refit and test predictions}.
+    """
+    try:
+        search_config = search_config or {}
+        executor_kwargs = {} if n_jobs is None else {"n_jobs": n_jobs}
+        executor = ParallelSearchExecutor(cache_dir=cache_dir, cache_models=cache_models, **executor_kwargs)
+        search_results, fitted_models = executor.search(models, params, X_train, y_train,
+                                                        strategies=search_config.get("strategies"),
+                                                        time_budget=search_config.get("time_budget_seconds"))
 
+        report = {}
+        for model_name, model in fitted_models.items():
+            models[model_name] = model
+            start = time.perf_counter()
             pred = model.predict(X_test)
+            predict_seconds = time.perf_counter() - start
             test_model_score = r2_score(y_test, pred)
             report[model_name] = test_model_score
+
+            if candidate_metrics is not None:
+                result = search_results[model_name]
+                candidate_metrics[model_name] = {
+                    "cv_fits": result.n_fits,
+                    "cached_cv_fits": result.n_cached_fits,
+                    "wall_seconds": round(result.fit_seconds + result.refit_seconds + predict_seconds, 3),
+                    "fit_seconds": round(result.fit_seconds, 3),
+                    "fit_cpu_seconds": round(result.fit_cpu_seconds, 3),
+                    "refit_seconds": round(result.refit_seconds, 3),
+                    "predict_seconds": round(predict_seconds, 4),
+                    "rows": result.rows_fitted,
+                    "rows_per_sec": round(result.rows_fitted / result.fit_seconds) if result.fit_seconds else None,
+                    "test_score": test_model_score,
+                }
         return report
     except Exception as e:
         raise NetworkSecurityException(e, sys)
 
 
-# 8. Load NumPy array data:
-def load_numpy_arr_data(file_path:str) -> np.array:
+# 8. Load NumPy array data (memory-mapped with mmap_mode, see np.load):
+def load_numpy_arr_data(file_path:str, mmap_mode:str=None) -> np.array:
+    try:
+        return np.load(file_path, mmap_mode=mmap_mode)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+# 9. Feature columns (every schema column except the target):
+def get_schema_feature_columns(schema_file_path:str) -> list:
+    try:
+        schema = read_yaml_file(schema_file_path)
+        columns = [list(column.keys())[0] for column in schema["columns"]]
+        return [column for column in columns if column != TARGET_COLUMN]
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+# 10. Column dtypes from the schema, as pandas nullable types so missing values survive (int8 -> Int8):
+def get_schema_dtypes(schema_file_path:str) -> dict:
+    try:
+        schema = read_yaml_file(schema_file_path)
+        dtypes = {}
+        for column in schema["columns"]:
+            (name, dtype), = column.items()
+            dtypes[name] = dtype.strip().capitalize() if dtype.strip().startswith("int") else dtype.strip()
+        return dtypes
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+# 11. Pack integer feature columns into an int8 array, missing values as FEATURE_MISSING_SENTINEL:
+def to_int8_features(dataframe:pd.DataFrame) -> np.ndarray:
+    try:
+        values = dataframe.to_numpy(dtype=np.float32, na_value=np.nan)
+        missing = np.isnan(values)
+        present = values[~missing]
+        if not (np.all(present == np.round(present))
+                and np.all((present > FEATURE_MISSING_SENTINEL) & (present <= np.iinfo(np.int8).max))):
+            raise ValueError("Feature values are not integers that fit in int8.")
+        return np.where(missing, FEATURE_MISSING_SENTINEL, values).astype(np.int8)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+# 12. Unpack an int8 feature array into float32, with NaN for missing values:
+def from_int8_features(array:np.ndarray) -> np.ndarray:
+    try:
+        features = array.astype(np.float32)
+        features[array == FEATURE_MISSING_SENTINEL] = np.nan
+        return features
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+# 13. Rows of `n_columns` values that fit in `share` of what the memory cap leaves to this process:
+def rows_within_memory(memory_cap_mb:int, n_columns:int, bytes_per_value:int, share:float, min_rows:int=1_000) -> int:
     try:
+        current_rss_bytes = 0
+        if os.path.exists("/proc/self/statm"):
+            with open("/proc/self/statm") as file_obj:
+                current_rss_bytes = int(file_obj.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        available_bytes = max(memory_cap_mb * 1024 * 1024 - current_rss_bytes, 0) * share
+        return max(min_rows, int(available_bytes // (n_columns * bytes_per_value)))
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+# 14. Number of data rows (header excluded) of a CSV file, without parsing it:
+def count_csv_rows(file_path:str, chunk_size:int=16 * 1024 * 1024) -> int:
+    try:
+        n_lines, last_byte = 0, b"\n"
         with open(file_path, "rb") as file_obj:
-            return np.load(file_obj)
+            for chunk in iter(lambda: file_obj.read(chunk_size), b""):
+                n_lines += chunk.count(b"\n")
+                last_byte = chunk[-1:]
+        if last_byte != b"\n":
+            n_lines += 1
+        return max(n_lines - 1, 0)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+# 15. Two-sample KS test (as scipy's ks_2samp, two-sided, method "auto") from the value counts of two samples,
+#     returns (statistic, p-value):
+def ks_2samp_from_counts(counts_1:pd.Series, counts_2:pd.Series):
+    try:
+        n_1, n_2 = int(counts_1.sum()), int(counts_2.sum())
+        if max(n_1, n_2) <= 10_000:
+            # Small enough for scipy's exact p-value.
+            result = ks_2samp(np.repeat(counts_1.index.to_numpy(dtype=float), counts_1.to_numpy()),
+                              np.repeat(counts_2.index.to_numpy(dtype=float), counts_2.to_numpy()))
+            return float(result.statistic), float(result.pvalue)
+        values = counts_1.index.union(counts_2.index).sort_values()
+        cdf_1 = counts_1.reindex(values, fill_value=0).cumsum().to_numpy() / n_1
+        cdf_2 = counts_2.reindex(values, fill_value=0).cumsum().to_numpy() / n_2
+        statistic = float(np.max(np.abs(cdf_1 - cdf_2)))
+        m, n = sorted([float(n_1), float(n_2)], reverse=True)
+        return statistic, float(kstwo.sf(statistic, np.round(m * n / (m + n))))
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+# 16. Number of rows of a table file (from the metadata for Parquet and Arrow, see count_csv_rows for CSV):
+def count_table_rows(file_path:str) -> int:
+    try:
+        table_format = _table_format(file_path)
+        if table_format == TABLE_FORMAT_PARQUET:
+            return pq.ParquetFile(file_path).metadata.num_rows
+        if table_format == TABLE_FORMAT_ARROW:
+            return pa.ipc.open_file(pa.memory_map(file_path)).read_all().num_rows
+        return count_csv_rows(file_path)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+# 17. Column names of a table file, without reading its rows:
+def read_table_columns(file_path:str) -> list:
+    try:
+        table_format = _table_format(file_path)
+        if table_format == TABLE_FORMAT_PARQUET:
+            return pq.read_schema(file_path).names
+        if table_format == TABLE_FORMAT_ARROW:
+            return pa.ipc.open_file(pa.memory_map(file_path)).schema.names
+        return pd.read_csv(file_path, nrows=0).columns.to_list()
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+# 18. To write a table file chunk by chunk, in the format of its extension (see read_data):
+#     `with table_writer(file_path) as write: write(chunk)` for every chunk, in the columns and dtypes of the first one.
+@contextmanager
+def table_writer(file_path:str):
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    table_format = _table_format(file_path)
+    if table_format == TABLE_FORMAT_CSV:
+        with open(file_path, "w", newline="") as file_obj:
+            n_chunks = 0
+            def write(chunk:pd.DataFrame) -> None:
+                nonlocal n_chunks
+                chunk.to_csv(file_obj, index=False, header=n_chunks == 0)
+                n_chunks += 1
+            yield write
+        return
+
+    writer, schema = None, None
+    def write(chunk:pd.DataFrame) -> None:
+        nonlocal writer, schema
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if writer is None:
+            schema = table.schema
+            writer = pq.ParquetWriter(file_path, schema) if table_format == TABLE_FORMAT_PARQUET \
+                else pa.ipc.new_file(file_path, schema)
+        writer.write_table(table.cast(schema))
+    try:
+        yield write
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+# 19. To write a DataFrame as a table file, in the format of its extension (see read_data):
+def write_data(dataframe:pd.DataFrame, file_path:str) -> None:
+    try:
+        logging.info(f"Writing data to: {file_path}")
+        with table_writer(file_path) as write:
+            write(dataframe)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+# 20. Which rows of a DataFrame go to the test set, decided by a hash of each row's values (salted with `seed`):
+#     a row is always assigned the same way, whatever other rows are split with it (identical rows together):
+def stable_test_mask(dataframe:pd.DataFrame, test_ratio:float, seed:int=0) -> np.ndarray:
+    try:
+        row_hashes = pd.util.hash_pandas_object(dataframe, index=False).to_numpy(dtype=np.uint64)
+        salted = row_hashes ^ np.uint64((seed * 0x9E3779B97F4A7C15) % 2**64)
+        return (salted >> np.uint64(11)).astype(np.float64) / 2**53 < test_ratio
     except Exception as e:
         raise NetworkSecurityException(e, sys)
-    
\ No newline at end of file
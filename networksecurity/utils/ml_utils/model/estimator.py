@@ -1,5 +1,8 @@
 from networksecurity.exception.exception import NetworkSecurityException
 from networksecurity.logging.logger import logging
+from networksecurity.utils.ml_utils.model.imputer import FastPathKNNImputer
+from networksecurity.utils.ml_utils.model.tree_compiler import compile_tree_model
+import numpy as np
 import sys
 
 
@@ -9,17 +12,49 @@ class NetworkModel:
         try:
             self.preprocessor = preprocessor
             self.model = model
+            self._inference_preprocessor = None
+            self.compiled_model = None
         except Exception as e:
             raise NetworkSecurityException(e, sys)
+
+    @property
+    def inference_preprocessor(self):
+        # Built lazily so models pickled before the fast path existed get it too.
+        if getattr(self, "_inference_preprocessor", None) is None:
+            self._inference_preprocessor = FastPathKNNImputer(self.preprocessor)
+        return self._inference_preprocessor
     
+    def compile_model(self, X_sample):
+        """
+        Builds the flat-array evaluator for tree models, keeps it only if it predicts exactly like
+        the model on X_sample, and records up to which batch size it is the faster of the two.
+        """
+        try:
+            self.compiled_model = None
+            compiled_model = compile_tree_model(self.model)
+            if compiled_model is None:
+                logging.info(f"No compiled evaluator for {type(self.model).__name__}, using sklearn.")
+                return None
+
+            X_transformed = self.inference_preprocessor.transform(X_sample)
+            if not np.array_equal(compiled_model.predict(X_transformed), self.model.predict(X_transformed)):
+                logging.info(f"Compiled {type(self.model).__name__} disagrees with sklearn, using sklearn.")
+                return None
+
+            if compiled_model.calibrate(self.model, X_transformed) > 0:
+                self.compiled_model = compiled_model
+                logging.info(f"Using the compiled evaluator for batches up to {compiled_model.max_batch_rows} rows.")
+            return self.compiled_model
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
     def predict(self, X):
         try:
-            X_transformed = self.preprocessor.transform(X)
+            X_transformed = self.inference_preprocessor.transform(X)
+            compiled_model = getattr(self, "compiled_model", None)
+            if compiled_model is not None and X_transformed.shape[0] <= compiled_model.max_batch_rows:
+                return compiled_model.predict(X_transformed)
             y_pred = self.model.predict(X_transformed)
             return y_pred
         except Exception as e:
             raise NetworkSecurityException(e, sys)
-        
-
-        
-        
\ No newline at end of file
@@ -0,0 +1,316 @@
+import sys
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.impute import KNNImputer, SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.utils.validation import check_array, check_is_fitted
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.constants.training_pipeline import (IMPUTER_CHUNK_MAX_BYTES, DATA_TRANSFORMATION_IMPUTER_PARAMS,
+                                                         DATA_TRANSFORMATION_APPROX_IMPUTER_PARAMS)
+
+try:
+    from sklearn.utils import get_tags
+except ImportError:  # scikit-learn < 1.6
+    get_tags = None
+
+
+
+IMPUTER_STRATEGY_KNN = "knn"
+IMPUTER_STRATEGY_KNN_APPROX = "knn_approx"
+IMPUTER_STRATEGY_MODE = "mode"
+IMPUTER_STRATEGY_PASSTHROUGH = "passthrough"
+IMPUTER_STRATEGIES = (IMPUTER_STRATEGY_KNN, IMPUTER_STRATEGY_KNN_APPROX, IMPUTER_STRATEGY_MODE, IMPUTER_STRATEGY_PASSTHROUGH)
+
+
+
+def _to_float_array(X) -> np.ndarray:
+    if isinstance(X, pd.DataFrame):
+        # Also turns nullable integer columns (pd.NA) into float NaN.
+        X = X.to_numpy(dtype=np.float64, na_value=np.nan)
+    return check_array(X, dtype=np.float64, ensure_all_finite="allow-nan", copy=True)
+
+
+
+def _donor_index(donors:np.ndarray) -> tuple:
+    donors = donors.astype(np.float32)
+    donors_squared = donors * donors
+    return donors, donors_squared, donors_squared.sum(axis=1)
+
+
+def _impute_from_donors(X:np.ndarray, rows:np.ndarray, index:tuple, donor_values:np.ndarray, n_neighbors:int,
+                        chunk_max_bytes:int) -> None:
+    """
+    Imputes X[rows] in place with the mean of their `n_neighbors` nearest donors (complete rows, see
+    `_donor_index`) by nan-euclidean distance. Every row has at least one present and one missing value.
+    """
+    fit_X, fit_X_squared, fit_X_sq_norms = index
+    n_train, n_features = fit_X.shape
+    chunk_rows = max(1, chunk_max_bytes // (n_train * 16))
+
+    for start in range(0, rows.size, chunk_rows):
+        chunk = rows[start:start + chunk_rows]
+        queries = X[chunk]
+        missing = np.isnan(queries)
+        queries_zeroed = np.where(missing, 0, queries).astype(np.float32)
+
+        # Squared distance over the present columns, as exact integers (for integer-valued data):
+        # |x|^2 + |t|^2 - 2 x.t - (|t|^2 over the columns missing in x)
+        squared = queries_zeroed @ fit_X.T
+        squared *= -2
+        squared += (queries_zeroed * queries_zeroed).sum(axis=1)[:, None]
+        squared += fit_X_sq_norms[None, :]
+        squared -= missing.astype(np.float32) @ fit_X_squared.T
+        distances = squared.astype(np.float64)
+        del squared
+
+        # Same float64 operations, in the same order, as sklearn's nan_euclidean_distances.
+        distances /= (~missing).sum(axis=1)[:, None]
+        distances *= n_features
+        np.sqrt(distances, out=distances)
+
+        donors = np.argpartition(distances, n_neighbors - 1, axis=1)[:, :n_neighbors]
+        donor_means = donor_values[donors].sum(axis=1, dtype=np.float64) / n_neighbors
+        X[chunk] = np.where(missing, donor_means, queries)
+
+
+
+class FastPathKNNImputer:
+    """
+    Inference-time wrapper around a fitted KNNImputer (or a Pipeline holding only one) that
+    returns exactly what `knn_imputer.transform` would, at a fraction of the cost:
+
+    - Rows with no missing values are returned as they are (KNNImputer leaves them untouched).
+    - Rows with missing values are matched against a neighbour index prebuilt from the training
+      matrix (a float32 copy and its squares), so their nan-euclidean distances come from two
+      BLAS products instead of sklearn's float64 and integer products and per-column copies,
+      and donors are selected once per row instead of once per missing column.
+
+    For complete, integer-valued training data (our ternary features) and uniform weights, every
+    intermediate value is an exact integer, so the distance array is bit-identical to sklearn's
+    and `np.argpartition` picks the same donors, ties included. Anything else goes to the
+    wrapped imputer.
+    """
+    def __init__(self, preprocessor, chunk_max_bytes:int=IMPUTER_CHUNK_MAX_BYTES):
+        try:
+            self.preprocessor = preprocessor
+            self.chunk_max_bytes = chunk_max_bytes
+            self.knn_imputer = self._find_knn_imputer(preprocessor)
+            self._index = None
+
+            self._index_enabled = False
+            if self.knn_imputer is not None:
+                imputer = self.knn_imputer
+                fit_X = imputer._fit_X
+                self._index_enabled = (
+                    imputer.weights == "uniform"
+                    and imputer.metric == "nan_euclidean"
+                    and not imputer.add_indicator
+                    and pd.isna(imputer.missing_values)
+                    and bool(imputer._valid_mask.all())
+                    and not bool(imputer._mask_fit_X.any())
+                    and bool(np.all(fit_X == np.round(fit_X)))
+                    # Sums of squares must stay exact in float32.
+                    and bool(np.abs(fit_X).max(initial=0) ** 2 * fit_X.shape[1] < 2 ** 22)
+                )
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
+    @staticmethod
+    def _find_knn_imputer(preprocessor):
+        if isinstance(preprocessor, KNNImputer):
+            return preprocessor
+        if isinstance(preprocessor, Pipeline) and len(preprocessor.steps) == 1 \
+                and isinstance(preprocessor.steps[0][1], KNNImputer):
+            return preprocessor.steps[0][1]
+        return None
+
+
+    def __getstate__(self):
+        # The index is derived from the imputer: rebuild it lazily instead of pickling it.
+        state = self.__dict__.copy()
+        state["_index"] = None
+        return state
+
+
+    def _get_index(self):
+        if self._index is None:
+            self._index = _donor_index(self.knn_imputer._fit_X)
+        return self._index
+
+
+    def _to_array(self, X):
+        if isinstance(X, pd.DataFrame):
+            feature_names = getattr(self.knn_imputer, "feature_names_in_", None)
+            if feature_names is not None and list(X.columns) != list(feature_names):
+                return None
+            # Also turns nullable integer columns (pd.NA) into float NaN.
+            X = X.to_numpy(dtype=np.float64, na_value=np.nan)
+        X = np.array(X, copy=True)
+        if X.ndim != 2 or X.shape[1] != self.knn_imputer.n_features_in_:
+            return None
+        if X.dtype != np.float64:
+            X = X.astype(np.float64)
+        return X
+
+
+    def _impute_with_index(self, X:np.ndarray, rows:np.ndarray) -> None:
+        """
+        Imputes X[rows] in place. Every row has at least one present and one missing value.
+        """
+        # sklearn averages with float64 weights, whatever the dtype the imputer was fitted on.
+        _impute_from_donors(X, rows, self._get_index(), self.knn_imputer._fit_X,
+                            min(self.knn_imputer.n_neighbors, self.knn_imputer._fit_X.shape[0]), self.chunk_max_bytes)
+
+
+    def transform(self, X):
+        try:
+            if self.knn_imputer is None:
+                return self.preprocessor.transform(X)
+
+            X_array = self._to_array(X)
+            if X_array is None:
+                # Let sklearn raise its usual error for unexpected columns / shapes.
+                return self.preprocessor.transform(X)
+
+            mask = np.isnan(X_array)
+            rows_with_missing = np.flatnonzero(mask.any(axis=1))
+            if rows_with_missing.size == 0:
+                return X_array
+
+            exact_rows = rows_with_missing
+            if self._index_enabled:
+                # Rows with nothing present get the column means from sklearn.
+                all_missing = mask[rows_with_missing].all(axis=1)
+                self._impute_with_index(X_array, rows_with_missing[~all_missing])
+                exact_rows = rows_with_missing[all_missing]
+
+            if exact_rows.size:
+                exact_input = X_array[exact_rows]
+                feature_names = getattr(self.knn_imputer, "feature_names_in_", None)
+                if feature_names is not None:
+                    exact_input = pd.DataFrame(exact_input, columns=feature_names)
+                X_array[exact_rows] = self.knn_imputer.transform(exact_input)
+            return X_array
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
+
+class ApproximateKNNImputer(TransformerMixin, BaseEstimator):
+    """
+    Approximate KNN imputation: the donors are a random sample of at most `max_donors` complete
+    training rows, matched with the same float32 BLAS distances as FastPathKNNImputer.
+
+    Imputing the training data costs O(n * max_donors * d) instead of KNNImputer's O(n^2 d), and
+    the fitted imputer keeps only the sample. Neighbours come from the sample (and only from
+    complete rows), so imputed values can differ from KNNImputer's. Rows with nothing present
+    get the column means, as with KNNImputer.
+    """
+    def __init__(self, n_neighbors:int=3, max_donors:int=20_000, random_state:int=None,
+                 chunk_max_bytes:int=IMPUTER_CHUNK_MAX_BYTES):
+        self.n_neighbors = n_neighbors
+        self.max_donors = max_donors
+        self.random_state = random_state
+        self.chunk_max_bytes = chunk_max_bytes
+
+
+    def fit(self, X, y=None):
+        if isinstance(X, pd.DataFrame):
+            self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        X = _to_float_array(X)
+        self.n_features_in_ = X.shape[1]
+        self.statistics_ = np.nan_to_num(np.nanmean(X, axis=0)) if len(X) else np.zeros(X.shape[1])
+        complete_rows = np.flatnonzero(~np.isnan(X).any(axis=1))
+        if len(complete_rows) > self.max_donors:
+            rng = np.random.default_rng(self.random_state)
+            complete_rows = np.sort(rng.choice(complete_rows, size=self.max_donors, replace=False))
+        self.donors_ = X[complete_rows]
+        self._index = None
+        return self
+
+
+    def __getstate__(self):
+        # The index is derived from the donors: rebuild it lazily instead of pickling it.
+        state = self.__dict__.copy()
+        state["_index"] = None
+        return state
+
+
+    def transform(self, X):
+        check_is_fitted(self, "donors_")
+        X = _to_float_array(X)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[1]} features, but ApproximateKNNImputer is expecting {self.n_features_in_} features as input.")
+        mask = np.isnan(X)
+        rows_with_missing = np.flatnonzero(mask.any(axis=1))
+        if rows_with_missing.size == 0:
+            return X
+
+        all_missing = mask[rows_with_missing].all(axis=1)
+        if len(self.donors_) == 0:
+            all_missing[:] = True
+        mean_rows = rows_with_missing[all_missing]
+        X[mean_rows] = np.where(mask[mean_rows], self.statistics_, X[mean_rows])
+        if getattr(self, "_index", None) is None:
+            self._index = _donor_index(self.donors_)
+        _impute_from_donors(X, rows_with_missing[~all_missing], self._index, self.donors_,
+                            min(self.n_neighbors, len(self.donors_)), self.chunk_max_bytes)
+        return X
+
+
+
+class MissingValuePassthrough(TransformerMixin, BaseEstimator):
+    """
+    No imputation: returns the features as a float array with NaN for missing values, for models
+    that handle missing values natively (see `allows_missing_values`).
+    """
+    def fit(self, X, y=None):
+        if isinstance(X, pd.DataFrame):
+            self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        self.n_features_in_ = _to_float_array(X).shape[1]
+        return self
+
+
+    def transform(self, X):
+        check_is_fitted(self, "n_features_in_")
+        X = _to_float_array(X)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[1]} features, but MissingValuePassthrough is expecting {self.n_features_in_} features as input.")
+        return X
+
+
+
+def make_imputer(strategy:str) -> Pipeline:
+    """
+    The (unfitted) pre-processor of an imputation strategy:
+    - knn:          exact KNNImputer, O(n^2 d) to impute the training data,
+    - knn_approx:   approximate KNN over a sample of the complete training rows (ApproximateKNNImputer),
+    - mode:         most frequent value of each feature, O(n d),
+    - passthrough:  no imputation, for models that handle missing values (MissingValuePassthrough).
+    """
+    if strategy == IMPUTER_STRATEGY_KNN:
+        return Pipeline(steps=[("KNNImputer", KNNImputer(**DATA_TRANSFORMATION_IMPUTER_PARAMS))])
+    if strategy == IMPUTER_STRATEGY_KNN_APPROX:
+        return Pipeline(steps=[("ApproximateKNNImputer", ApproximateKNNImputer(**DATA_TRANSFORMATION_APPROX_IMPUTER_PARAMS))])
+    if strategy == IMPUTER_STRATEGY_MODE:
+        return Pipeline(steps=[("SimpleImputer", SimpleImputer(strategy="most_frequent"))])
+    if strategy == IMPUTER_STRATEGY_PASSTHROUGH:
+        return Pipeline(steps=[("MissingValuePassthrough", MissingValuePassthrough())])
+    raise ValueError(f"Unknown imputer strategy {strategy!r}, expected one of {IMPUTER_STRATEGIES}")
+
+
+def passes_missing_values(preprocessor) -> bool:
+    """
+    Whether the pre-processor leaves missing values in, so only models that allow them can be trained on its output.
+    """
+    if isinstance(preprocessor, Pipeline):
+        return any(passes_missing_values(step) for _, step in preprocessor.steps)
+    return isinstance(preprocessor, MissingValuePassthrough)
+
+
+def allows_missing_values(model) -> bool:
+    if get_tags is not None:
+        return bool(get_tags(model).input_tags.allow_nan)
+    return bool(model._get_tags().get("allow_nan", False))
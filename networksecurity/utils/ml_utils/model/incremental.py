@@ -0,0 +1,111 @@
+import os
+import sys
+import math
+import numpy as np
+from scipy.stats import ks_2samp
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.logging.logger import logging
+from networksecurity.constants.training_pipeline import FEATURE_MISSING_SENTINEL
+
+
+
+TRAINING_MODE_FULL = "full"
+TRAINING_MODE_INCREMENTAL = "incremental"
+
+# Ensembles that `warm_start` can grow with more trees / boosting stages.
+WARM_START_MODELS = (RandomForestClassifier, GradientBoostingClassifier)
+
+
+
+def save_training_snapshot(file_path:str, X:np.ndarray, y:np.ndarray) -> None:
+    """
+    Saves the rows (int8 features, with FEATURE_MISSING_SENTINEL for missing values, and labels)
+    a published model was built from, so the next run can tell which rows are new.
+    """
+    try:
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        temp_file_path = f"{file_path}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(temp_file_path, X=X.astype(np.int8), y=y.astype(np.int8))
+        os.replace(temp_file_path, file_path)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def load_training_snapshot(file_path:str):
+    """
+    Returns (X, y) saved by `save_training_snapshot`, or (None, None) when there is none.
+    """
+    try:
+        if not os.path.exists(file_path):
+            return None, None
+        with np.load(file_path) as snapshot:
+            return snapshot["X"], snapshot["y"]
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def new_row_mask(X:np.ndarray, y:np.ndarray, snapshot_X:np.ndarray, snapshot_y:np.ndarray) -> np.ndarray:
+    """
+    Marks the rows of (X, y) that are not in the snapshot, as a multiset: if a row appears 3 times
+    now and twice in the snapshot, one of its occurrences is new (the first one, so callers can
+    put the rows they would train on first).
+    """
+    try:
+        def as_rows(features, labels):
+            rows = np.ascontiguousarray(np.column_stack([features.astype(np.int8), labels.astype(np.int8)]))
+            return rows.view(np.dtype((np.void, rows.shape[1]))).ravel()
+
+        _, row_ids = np.unique(np.concatenate([as_rows(snapshot_X, snapshot_y), as_rows(X, y)]), return_inverse=True)
+        row_ids = row_ids.ravel()
+        snapshot_counts = np.bincount(row_ids[:len(snapshot_y)], minlength=row_ids.max(initial=0) + 1)
+        current_ids = row_ids[len(snapshot_y):]
+
+        # Occurrence number of each row among identical rows, counted from the last one: the last
+        # `snapshot_counts` occurrences are old.
+        order = np.argsort(current_ids, kind="stable")
+        sorted_ids = current_ids[order]
+        occurrence_from_end = np.searchsorted(sorted_ids, sorted_ids, side="right") - 1 - np.arange(sorted_ids.size)
+        mask = np.empty(sorted_ids.size, dtype=bool)
+        mask[order] = occurrence_from_end >= snapshot_counts[sorted_ids]
+        return mask
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def has_feature_drift(base_X:np.ndarray, new_X:np.ndarray, threshold:float) -> bool:
+    """
+    Two-sample KS test per feature (as in DataValidation.detect_data_drift) on the present values
+    of two int8 feature arrays. Bonferroni-corrected: drift when any p-value <= threshold / n_features.
+    """
+    try:
+        corrected_threshold = threshold / base_X.shape[1]
+        for column in range(base_X.shape[1]):
+            base_values = base_X[:, column][base_X[:, column] != FEATURE_MISSING_SENTINEL]
+            new_values = new_X[:, column][new_X[:, column] != FEATURE_MISSING_SENTINEL]
+            if base_values.size == 0 or new_values.size == 0:
+                continue
+            if ks_2samp(base_values, new_values).pvalue <= corrected_threshold:
+                logging.info(f"Feature {column} drifted in the new rows.")
+                return True
+        return False
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def grow_ensemble(model, X_new:np.ndarray, y_new:np.ndarray, growth:float):
+    """
+    Adds ceil(growth * current size) trees / boosting stages to a fitted RandomForest or
+    GradientBoosting model, fitted on the new rows only (`warm_start`), and returns it.
+    """
+    try:
+        n_estimators = len(model.estimators_)
+        n_new_estimators = max(1, math.ceil(growth * n_estimators))
+        model.set_params(warm_start=True, n_estimators=n_estimators + n_new_estimators)
+        model.fit(X_new, y_new)
+        model.set_params(warm_start=False)
+        logging.info(f"Grew {type(model).__name__} from {n_estimators} to {len(model.estimators_)} estimators "
+                     f"on {len(y_new)} new rows.")
+        return model
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
@@ -0,0 +1,77 @@
+import os
+import sys
+import numpy as np
+from sklearn import config_context
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.logging.logger import logging
+from networksecurity.utils.main_utils.utils import from_int8_features
+
+
+
+TRAINING_MODE_OUT_OF_CORE = "out_of_core"
+
+
+
+def impute_to_memmap(preprocessor, X:np.ndarray, file_path:str, chunk_rows:int, working_memory_mb:int) -> np.memmap:
+    """
+    Imputes an int8 feature array (FEATURE_MISSING_SENTINEL for missing values, usually memory-mapped)
+    chunk by chunk into a float32 .npy file, and returns that file memory-mapped read-only.
+    The neighbour distances of each chunk are computed within `working_memory_mb`.
+    """
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        imputed = np.lib.format.open_memmap(file_path, mode="w+", dtype=np.float32, shape=X.shape)
+        # FastPathKNNImputer's own chunks and sklearn's (which default to 1GB) both within the budget:
+        preprocessor.chunk_max_bytes = working_memory_mb * 1024 * 1024
+        with config_context(working_memory=working_memory_mb):
+            for start in range(0, len(X), chunk_rows):
+                imputed[start:start + chunk_rows] = preprocessor.transform(from_int8_features(np.asarray(X[start:start + chunk_rows])))
+        imputed.flush()
+        del imputed
+        return np.load(file_path, mmap_mode="r")
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def fit_in_chunks(model, X:np.ndarray, y:np.ndarray, chunk_rows:int, epochs:int, random_state:int=0):
+    """
+    Trains a `partial_fit` estimator over (memory-mapped) X, y: `epochs` passes over the chunks, in a
+    different random order each pass, with the rows of each chunk shuffled.
+    """
+    try:
+        rng = np.random.default_rng(random_state)
+        classes = np.unique(y)
+        starts = np.arange(0, len(X), chunk_rows)
+        for _ in range(epochs):
+            for start in rng.permutation(starts):
+                order = rng.permutation(min(chunk_rows, len(X) - start))
+                model.partial_fit(np.asarray(X[start:start + chunk_rows])[order],
+                                  np.asarray(y[start:start + chunk_rows])[order], classes=classes)
+        logging.info(f"Trained {type(model).__name__} with {epochs} passes over {len(starts)} chunks.")
+        return model
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def fit_on_sample(model, X:np.ndarray, y:np.ndarray, max_rows:int, random_state:int=0):
+    """
+    Fits an in-memory estimator (e.g. histogram-based boosting) on a random sample of at most
+    `max_rows` rows of (memory-mapped) X, y.
+    """
+    try:
+        rows = slice(None)
+        if len(X) > max_rows:
+            rows = np.sort(np.random.default_rng(random_state).choice(len(X), size=max_rows, replace=False))
+        model.fit(np.asarray(X[rows]), np.asarray(y[rows]))
+        logging.info(f"Trained {type(model).__name__} on {min(len(X), max_rows)} of {len(X)} rows.")
+        return model
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def predict_in_chunks(model, X:np.ndarray, chunk_rows:int) -> np.ndarray:
+    try:
+        return np.concatenate([model.predict(np.asarray(X[start:start + chunk_rows]))
+                               for start in range(0, len(X), chunk_rows)])
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
@@ -0,0 +1,142 @@
+import sys
+import contextlib
+import collections
+import numpy as np
+import pandas as pd
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.logging.logger import logging
+from networksecurity.constants.training_pipeline import PREDICTION_CACHE_MAX_ENTRIES
+
+
+
+BITS_PER_FEATURE = 2
+MISSING_CODE = 3
+COUNTER_NAMES = ("hits", "misses", "uncacheable_rows", "evictions", "invalidations", "entries")
+
+
+
+class PredictionCache:
+    """
+    LRU memo of predicted labels in front of `NetworkModel.predict`.
+
+    Every feature is -1, 0, 1 (or missing), so a row packs into one 64-bit key, 2 bits per feature
+    (-1 -> 0, 0 -> 1, 1 -> 2, NaN -> 3). A batch is deduplicated, served from the cache where
+    possible, and only the missing keys (plus rows with out-of-range values, which are never
+    cached) are predicted, in one call. The cache empties itself when the model version changes.
+    Entries are scoped by the DataFrame's columns (names and order): a label is only reused for
+    the columns it was predicted with, so a request with renamed or reordered columns reaches the
+    model (and its feature-name check) instead of getting another row's label.
+
+    `counters` may be a shared `multiprocessing.Array` so several worker processes report into
+    the same numbers (see COUNTER_NAMES); "entries" is the total across them.
+    """
+    def __init__(self, max_entries:int=PREDICTION_CACHE_MAX_ENTRIES, counters=None):
+        self.max_entries = max_entries
+        self.counters = counters if counters is not None else [0] * len(COUNTER_NAMES)
+        self._entries = collections.OrderedDict()
+        self._model_version = None
+
+
+    @staticmethod
+    def pack_keys(X:np.ndarray):
+        """
+        Returns (keys, cacheable): one uint64 key per row, and whether the row only holds -1/0/1/NaN.
+        Returns (None, None) when rows don't fit in 64 bits.
+        """
+        if X.ndim != 2 or X.shape[1] * BITS_PER_FEATURE > 64:
+            return None, None
+        missing = np.isnan(X)
+        ternary = (X == -1) | (X == 0) | (X == 1)
+        cacheable = (ternary | missing).all(axis=1)
+
+        codes = np.where(missing, MISSING_CODE, np.where(ternary, X + 1, 0)).astype(np.uint64)
+        shifts = np.arange(X.shape[1], dtype=np.uint64) * np.uint64(BITS_PER_FEATURE)
+        keys = np.bitwise_or.reduce(codes << shifts, axis=1)
+        return keys, cacheable
+
+
+    def _count(self, **deltas) -> None:
+        lock = self.counters.get_lock() if hasattr(self.counters, "get_lock") else contextlib.nullcontext()
+        with lock:
+            for name, delta in deltas.items():
+                self.counters[COUNTER_NAMES.index(name)] += delta
+
+
+    def invalidate(self, model_version=None) -> None:
+        self._count(invalidations=1, entries=-len(self._entries))
+        self._entries.clear()
+        self._model_version = model_version
+        logging.info(f"Prediction cache cleared for model version {model_version}.")
+
+
+    def predict(self, model, X, model_version):
+        try:
+            if model_version != self._model_version:
+                if self._model_version is None:
+                    self._model_version = model_version
+                else:
+                    self.invalidate(model_version)
+
+            try:
+                X_values = (X.to_numpy(dtype=np.float64, na_value=np.nan) if isinstance(X, pd.DataFrame)
+                            else np.asarray(X, dtype=np.float64))
+                keys, cacheable = self.pack_keys(X_values)
+            except (TypeError, ValueError):
+                keys = None
+            if self.max_entries <= 0 or keys is None:
+                # Not numeric or too wide: let the model handle (or reject) it.
+                self._count(uncacheable_rows=len(X))
+                return model.predict(X)
+
+            cacheable_rows = np.flatnonzero(cacheable)
+            uncacheable_rows = np.flatnonzero(~cacheable)
+            unique_keys, first_rows, inverse = np.unique(keys[cacheable_rows], return_index=True, return_inverse=True)
+            scope = tuple(X.columns) if isinstance(X, pd.DataFrame) else None
+            unique_keys = [(scope, key) for key in unique_keys.tolist()]
+
+            cached = [self._entries.get(key) for key in unique_keys]
+            hit = np.array([label is not None for label in cached], dtype=bool)
+            for key, is_hit in zip(unique_keys, hit):
+                if is_hit:
+                    self._entries.move_to_end(key)
+
+            # One model call for every key we haven't seen plus the rows we can't cache:
+            miss_positions = np.flatnonzero(~hit)
+            rows_to_predict = np.concatenate([cacheable_rows[first_rows[miss_positions]], uncacheable_rows])
+            predictions = np.asarray([])
+            if rows_to_predict.size:
+                X_to_predict = X.iloc[rows_to_predict] if isinstance(X, pd.DataFrame) else X_values[rows_to_predict]
+                predictions = np.asarray(model.predict(X_to_predict))
+
+            for position, label in zip(miss_positions, predictions):
+                cached[position] = label
+                self._entries[unique_keys[position]] = label
+            evictions = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evictions += 1
+
+            unique_labels = np.asarray(cached)
+            dtype = unique_labels.dtype if rows_to_predict.size == 0 else predictions.dtype
+            y_pred = np.empty(len(X_values), dtype=dtype)
+            y_pred[cacheable_rows] = unique_labels[inverse.ravel()] if unique_keys else []
+            y_pred[uncacheable_rows] = predictions[miss_positions.size:]
+
+            hit_rows = int(hit[inverse.ravel()].sum()) if unique_keys else 0
+            self._count(hits=hit_rows, misses=cacheable_rows.size - hit_rows, uncacheable_rows=uncacheable_rows.size,
+                        evictions=evictions, entries=miss_positions.size - evictions)
+            return y_pred
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
+    def stats(self) -> dict:
+        return counters_to_stats(self.counters)
+
+
+
+def counters_to_stats(counters) -> dict:
+    stats = dict(zip(COUNTER_NAMES, list(counters)))
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    return stats
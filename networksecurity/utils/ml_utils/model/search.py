@@ -0,0 +1,382 @@
+import os
+import sys
+import math
+import time
+import tempfile
+import multiprocessing
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor, wait
+import numpy as np
+from sklearn.base import clone
+from sklearn.model_selection import ParameterGrid, ParameterSampler, StratifiedKFold, train_test_split
+from threadpoolctl import threadpool_limits
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.logging.logger import logging
+from networksecurity.utils.ml_utils.model.search_cache import SearchCache
+from networksecurity.constants.training_pipeline import (MODEL_TRAINER_SEARCH_N_JOBS, MODEL_TRAINER_SEARCH_CV_FOLDS,
+                                                         MODEL_TRAINER_HALVING_FACTOR, MODEL_TRAINER_HALVING_MIN_SAMPLES)
+
+
+
+SEARCH_STRATEGIES = ("grid", "random", "halving")
+
+
+@dataclass
+class SearchResult:
+    model_name: str
+    best_params: dict
+    best_score: float
+    # One entry per evaluated (round, parameter combination):
+    # {"round": ..., "resource": ..., "params": ..., "fold_scores": [...], "mean_score": ...}
+    cv_results: list = field(default_factory=list)
+    # Cost of the search, summed over this model's fits (worker time; cached fits cost nothing):
+    n_fits: int = 0
+    n_cached_fits: int = 0
+    fit_seconds: float = 0.0
+    fit_cpu_seconds: float = 0.0
+    rows_fitted: int = 0
+    refit_seconds: float = 0.0
+
+
+
+# Per-process state of the search workers: read-only memory maps of the training data and the CV splits.
+_X = None
+_y = None
+_splits = None
+
+
+def _init_search_worker(X_file_path:str, y_file_path:str, cv_folds:int, limit_threads:bool=True) -> None:
+    global _X, _y, _splits
+    if limit_threads:
+        # One fit per core: keep BLAS / OpenMP from oversubscribing the box.
+        threadpool_limits(1)
+    _X = np.load(X_file_path, mmap_mode="r")
+    _y = np.load(y_file_path, mmap_mode="r")
+    _splits = list(StratifiedKFold(n_splits=cv_folds).split(np.zeros(len(_y)), _y))
+
+
+def _init_search_worker_cleanup() -> None:
+    # Drops the in-process maps once the shared files are gone (n_jobs == 1).
+    global _X, _y, _splits
+    _X = _y = _splits = None
+
+
+def _fit_and_score(model_name:str, estimator, param_index:int, params:dict, fold:int, sample_fraction:float=1.0):
+    train_idx, test_idx = _splits[fold]
+    start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        if sample_fraction < 1.0:
+            # Stratified subset of the fold's training rows, the same one for every candidate.
+            n_samples = max(1, math.ceil(sample_fraction * len(train_idx)))
+            train_idx = np.sort(train_test_split(train_idx, train_size=n_samples, stratify=_y[train_idx],
+                                                 random_state=fold)[0])
+        fitted = clone(estimator).set_params(**params).fit(_X[train_idx], _y[train_idx])
+        score = fitted.score(_X[test_idx], _y[test_idx])
+    except Exception as e:
+        # Same as GridSearchCV(error_score=np.nan): a failing combination just ranks last.
+        logging.info(f"{model_name} {params} failed on fold {fold}: {e}")
+        score = np.nan
+    fit_stats = (time.perf_counter() - start, time.process_time() - cpu_start, len(train_idx))
+    return model_name, param_index, fold, score, fit_stats
+
+
+def _refit(model_name:str, estimator, params:dict):
+    start = time.perf_counter()
+    model = clone(estimator).set_params(**params).fit(_X, _y)
+    return model_name, model, time.perf_counter() - start
+
+
+
+class _ModelSearch:
+    """
+    The candidates of one model and how they are narrowed down, round by round.
+
+    Strategy config (one entry of the `search.strategies` section of params.yaml):
+        strategy: grid | random | halving       (default grid)
+        n_iter: 10                              (random: number of sampled combinations)
+        random_state: 0                         (random)
+        resource: n_samples | <estimator param> (halving, e.g. n_estimators; default n_samples)
+        factor: 3                               (halving: keep the best 1/factor each round)
+        min_resources: ...                      (halving: resource of the first round)
+        max_resources: ...                      (halving: resource of the last round)
+        early_stopping: {n_iter_no_change: 10}  (estimator params set on every fit, e.g. for boosting)
+    """
+    def __init__(self, model_name:str, estimator, param_grid:dict, config:dict, n_train_rows:int):
+        config = dict(config or {})
+        self.model_name = model_name
+        self.strategy = config.get("strategy", "grid")
+        if self.strategy not in SEARCH_STRATEGIES:
+            raise ValueError(f"Unknown search strategy {self.strategy!r} for {model_name}, "
+                             f"expected one of {SEARCH_STRATEGIES}.")
+        self.estimator = clone(estimator).set_params(**(config.get("early_stopping") or {}))
+        self.n_train_rows = n_train_rows
+        grid = dict(param_grid or {})
+
+        self.resource = None
+        self.resources = [None]
+        if self.strategy == "halving":
+            self.resource = config.get("resource", "n_samples")
+            self.factor = config.get("factor", MODEL_TRAINER_HALVING_FACTOR)
+            if self.resource == "n_samples":
+                max_resources = min(config.get("max_resources") or n_train_rows, n_train_rows)
+                min_resources = config.get("min_resources") or MODEL_TRAINER_HALVING_MIN_SAMPLES
+            else:
+                # The resource is set by the schedule, not searched over.
+                values = grid.pop(self.resource, None)
+                max_resources = config.get("max_resources") or (max(values) if values
+                                                                else self.estimator.get_params()[self.resource])
+                min_resources = config.get("min_resources") or (min(values) if values else 1)
+
+        if self.strategy == "random" and grid:
+            n_combinations = len(ParameterGrid(grid))
+            self.candidates = list(ParameterSampler(grid, n_iter=min(config.get("n_iter", 10), n_combinations),
+                                                    random_state=config.get("random_state", 0)))
+        else:
+            self.candidates = list(ParameterGrid(grid))
+
+        if self.strategy == "halving":
+            # As HalvingGridSearchCV(min_resources="exhaust"): as many rounds as it takes to get down to
+            # about one candidate (and as the resources allow), the last round using max_resources.
+            n_required = 1 + int(math.floor(math.log(len(self.candidates), self.factor)))
+            n_possible = 1 + int(math.floor(math.log(max(max_resources / min_resources, 1), self.factor)))
+            n_rounds = min(n_required, n_possible)
+            self.resources = [max(int(max_resources // self.factor ** (n_rounds - 1 - i)), 1) for i in range(n_rounds)]
+        self.alive = list(range(len(self.candidates)))
+        self.round = 0
+        self.best_index = None
+        self.best_score = np.nan
+        self.cv_results = []
+
+
+    def next_round(self) -> list:
+        """
+        Returns [(candidate_index, params, sample_fraction)] for the next round, or [] when done.
+        """
+        if self.round >= len(self.resources) or not self.alive:
+            return []
+        if self.round > 0 and len(self.alive) == 1:
+            # A lone survivor has nothing left to be compared against; its CV score stays the one
+            # from the last round it won.
+            self.alive = []
+            return []
+        resource = self.resources[self.round]
+        batch = []
+        for index in self.alive:
+            params = dict(self.candidates[index])
+            sample_fraction = 1.0
+            if self.resource == "n_samples":
+                sample_fraction = resource / self.n_train_rows
+            elif self.resource is not None:
+                params[self.resource] = resource
+            batch.append((index, params, sample_fraction))
+        return batch
+
+
+    def record(self, batch:list, fold_scores:dict, cv_folds:int) -> None:
+        """
+        fold_scores: {(candidate_index, fold): score} for the fits of `batch` that finished.
+        """
+        resource = self.resources[self.round]
+        mean_scores = {}
+        for index, params, _ in batch:
+            scores = [fold_scores.get((index, fold), np.nan) for fold in range(cv_folds)]
+            mean_scores[index] = float(np.mean(scores))
+            self.cv_results.append({"round": self.round, "resource": resource, "params": params,
+                                    "fold_scores": scores, "mean_score": mean_scores[index]})
+
+        # First highest mean wins, as in GridSearchCV; unfinished / failed candidates rank last.
+        ranked = sorted(self.alive, key=lambda index: -np.nan_to_num(mean_scores[index], nan=-np.inf))
+        if not np.isnan(mean_scores[ranked[0]]):
+            self.best_index, self.best_score = ranked[0], mean_scores[ranked[0]]
+        self.alive = sorted(ranked[:max(1, math.ceil(len(ranked) / self.factor))]) if self.strategy == "halving" else []
+        self.round += 1
+
+
+    def best_params(self) -> dict:
+        if self.best_index is None:
+            # Nothing finished within the time budget: fall back to the first candidate.
+            logging.info(f"{self.model_name}: no candidate finished cross-validation, using the first one.")
+            self.best_index = 0
+        params = dict(self.candidates[self.best_index])
+        if self.resource not in (None, "n_samples"):
+            # Halving only uses smaller resources to screen candidates: the final model gets the full one.
+            params[self.resource] = self.resources[-1]
+        return params
+
+
+
+class ParallelSearchExecutor:
+    """
+    Cross-validated hyperparameter search over several models at once.
+
+    Every (model, parameter combination, fold) fit is an independent task on one process pool,
+    so all cores stay busy across models instead of one GridSearchCV after another. The training
+    data is written once to .npy files that every worker memory-maps read-only, rather than
+    pickling a copy of X and y into each task.
+
+    Each model has a strategy (see `_ModelSearch`): the full grid, a random sample of it, or
+    successive halving over training rows or an estimator parameter such as n_estimators.
+    The rounds of all models run together. `time_budget` (seconds) ends the cross-validation
+    of every model once spent, keeping the best candidates found so far; fits already running
+    are not interrupted, so it can be exceeded by up to one fit per worker.
+
+    With a `cache_dir`, fold scores and refitted estimators are kept across runs (see SearchCache):
+    only fits that were never run on this data are submitted, and an unchanged winner is loaded
+    rather than refitted.
+
+    Folds (StratifiedKFold), scoring (`estimator.score`) and the choice of the best combination
+    (first highest mean score) are the same as GridSearchCV's, which is what "grid" reproduces.
+    """
+    def __init__(self, n_jobs:int=MODEL_TRAINER_SEARCH_N_JOBS, cv_folds:int=MODEL_TRAINER_SEARCH_CV_FOLDS,
+                 shared_dir:str=None, cache_dir:str=None, cache_models:bool=True):
+        self.n_jobs = max(1, n_jobs)
+        self.cv_folds = cv_folds
+        self.shared_dir = shared_dir
+        self.cache_dir = cache_dir
+        self.cache_models = cache_models
+
+
+    def _open_pool(self, X_file_path:str, y_file_path:str):
+        if self.n_jobs == 1:
+            # Run in this process, on the same memory-mapped data.
+            _init_search_worker(X_file_path, y_file_path, self.cv_folds, limit_threads=False)
+            return None
+        return ProcessPoolExecutor(max_workers=self.n_jobs, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_init_search_worker,
+                                   initargs=(X_file_path, y_file_path, self.cv_folds))
+
+
+    @staticmethod
+    def _run(pool, tasks:list, deadline:float=None):
+        """
+        Returns (results of the tasks that finished, whether the deadline cut the others off).
+        """
+        if pool is None:
+            results = []
+            for fn, args in tasks:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return results, True
+                results.append(fn(*args))
+            return results, False
+        futures = [pool.submit(fn, *args) for fn, args in tasks]
+        timeout = None if deadline is None else max(deadline - time.perf_counter(), 0)
+        done, not_done = wait(futures, timeout=timeout)
+        for future in not_done:
+            future.cancel()
+        return [future.result() for future in done], bool(not_done)
+
+
+    def search(self, models:dict, params:dict, X, y, refit:bool=True, strategies:dict=None,
+               time_budget:float=None):
+        """
+        Returns ({model_name: SearchResult}, {model_name: estimator refitted on all of X with its best params}).
+        `strategies` maps model names to a strategy config; models without one get the full grid.
+        """
+        try:
+            strategies = strategies or {}
+            n_train_rows = len(y) * (self.cv_folds - 1) // self.cv_folds
+            searches = {name: _ModelSearch(name, models[name], params.get(name), strategies.get(name), n_train_rows)
+                        for name in models}
+            cache = None
+            if self.cache_dir is not None:
+                cache = SearchCache(self.cache_dir, X, y, self.cv_folds, store_models=self.cache_models)
+            with tempfile.TemporaryDirectory(prefix="model_search_", dir=self.shared_dir) as shared_dir:
+                X_file_path = os.path.join(shared_dir, "X.npy")
+                y_file_path = os.path.join(shared_dir, "y.npy")
+                np.save(X_file_path, np.ascontiguousarray(X))
+                np.save(y_file_path, np.ascontiguousarray(y))
+
+                pool = self._open_pool(X_file_path, y_file_path)
+                try:
+                    results, fitted_models = self._search(pool, searches, refit, time_budget, cache)
+                finally:
+                    if pool is not None:
+                        pool.shutdown(cancel_futures=True)
+                    _init_search_worker_cleanup()
+            return results, fitted_models
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
+    def _search(self, pool, searches:dict, refit:bool, time_budget:float=None, cache:SearchCache=None):
+        start = time.perf_counter()
+        deadline = None if time_budget is None else start + time_budget
+        n_fits = n_cached_fits = 0
+        costs = {name: dict(n_fits=0, n_cached_fits=0, fit_seconds=0.0, fit_cpu_seconds=0.0, rows_fitted=0)
+                 for name in searches}
+        while True:
+            batches = {name: search.next_round() for name, search in searches.items()}
+            batches = {name: batch for name, batch in batches.items() if batch}
+            if not batches:
+                break
+            tasks = [(_fit_and_score, (name, searches[name].estimator, index, candidate_params, fold, sample_fraction))
+                     for name, batch in batches.items()
+                     for index, candidate_params, sample_fraction in batch
+                     for fold in range(self.cv_folds)]
+            # Longest first (roughly, by ensemble size and rows) so big fits don't end up alone at the tail.
+            tasks.sort(key=lambda task: -task[1][3].get("n_estimators", 1) * task[1][5])
+
+            cached, fit_keys = [], {}
+            if cache is not None:
+                tasks_to_run = []
+                for fn, args in tasks:
+                    name, estimator, index, candidate_params, fold, sample_fraction = args
+                    fit_key = cache.fit_key(estimator, candidate_params, fold, sample_fraction)
+                    score = cache.get_score(fit_key)
+                    if score is None:
+                        fit_keys[name, index, fold] = fit_key
+                        tasks_to_run.append((fn, args))
+                    else:
+                        cached.append((name, index, fold, score, None))
+                tasks = tasks_to_run
+            finished, timed_out = self._run(pool, tasks, deadline) if tasks else ([], False)
+            n_fits += len(finished)
+            n_cached_fits += len(cached)
+            if cache is not None:
+                for name, index, fold, score, _ in finished:
+                    cache.set_score(fit_keys[name, index, fold], score)
+                cache.save()
+            for name, _, _, _, (seconds, cpu_seconds, n_rows) in finished:
+                costs[name]["n_fits"] += 1
+                costs[name]["fit_seconds"] += seconds
+                costs[name]["fit_cpu_seconds"] += cpu_seconds
+                costs[name]["rows_fitted"] += n_rows
+            for name, *_ in cached:
+                costs[name]["n_cached_fits"] += 1
+            finished += cached
+
+            fold_scores = {name: {} for name in batches}
+            for name, index, fold, score, _ in finished:
+                fold_scores[name][index, fold] = score
+            for name, batch in batches.items():
+                searches[name].record(batch, fold_scores[name], self.cv_folds)
+            if timed_out:
+                logging.info(f"Search time budget of {time_budget}s spent, keeping the best candidates so far.")
+                break
+        logging.info(f"Cross-validation finished in {time.perf_counter() - start:.1f}s "
+                     f"({n_fits} fits, {n_cached_fits} from the cache).")
+
+        results = {}
+        for name, search in searches.items():
+            results[name] = SearchResult(model_name=name, best_params=search.best_params(),
+                                         best_score=float(search.best_score), cv_results=search.cv_results,
+                                         **costs[name])
+            logging.info(f"{name} ({search.strategy}): best params {results[name].best_params}, "
+                         f"mean CV score {results[name].best_score:.4f}")
+
+        fitted_models = {}
+        if refit:
+            refit_tasks = []
+            for name, search in searches.items():
+                model = cache.load_model(search.estimator, results[name].best_params) if cache is not None else None
+                if model is not None:
+                    logging.info(f"{name}: reusing the cached estimator refitted with {results[name].best_params}.")
+                    fitted_models[name] = model
+                else:
+                    refit_tasks.append((_refit, (name, search.estimator, results[name].best_params)))
+            for name, model, seconds in self._run(pool, refit_tasks)[0] if refit_tasks else []:
+                fitted_models[name] = model
+                results[name].refit_seconds = seconds
+                if cache is not None:
+                    cache.save_model(searches[name].estimator, results[name].best_params, model)
+        return results, fitted_models
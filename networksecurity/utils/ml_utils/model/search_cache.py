@@ -0,0 +1,115 @@
+import os
+import sys
+import json
+import pickle
+import hashlib
+import numpy as np
+from sklearn.base import clone
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.logging.logger import logging
+
+
+
+class SearchCache:
+    """
+    On-disk memo of the model search, shared across training runs.
+
+    Everything lives under `<cache_dir>/<data fingerprint>/`, the fingerprint being a hash of the
+    training arrays and the number of CV folds, so a change of data starts a fresh entry:
+
+    - scores.json: the score of every (estimator class, full estimator params, fold, share of
+      training rows) fit, so a rerun only cross-validates the combinations it hasn't seen.
+    - models/<key>.pkl: the final estimators refitted on all the data, keyed by class and params,
+      so an unchanged winner is loaded instead of fitted again.
+    """
+    def __init__(self, cache_dir:str, X, y, cv_folds:int, store_models:bool=True):
+        try:
+            self.store_models = store_models
+            self.data_fingerprint = self.fingerprint(X, y, cv_folds)
+            self.cache_dir = os.path.join(cache_dir, self.data_fingerprint)
+            self.scores_file_path = os.path.join(self.cache_dir, "scores.json")
+            self.models_dir = os.path.join(self.cache_dir, "models")
+            self._scores = {}
+            if os.path.exists(self.scores_file_path):
+                with open(self.scores_file_path) as file_obj:
+                    self._scores = json.load(file_obj)
+            self._new_scores = 0
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
+    @staticmethod
+    def fingerprint(X, y, cv_folds:int) -> str:
+        digest = hashlib.sha256()
+        for array in (np.ascontiguousarray(X), np.ascontiguousarray(y)):
+            digest.update(f"{array.dtype.str}{array.shape}".encode())
+            digest.update(array.data)
+        digest.update(f"cv={cv_folds}".encode())
+        return digest.hexdigest()[:32]
+
+
+    @staticmethod
+    def estimator_key(estimator, params:dict) -> str:
+        # Full params (not just the searched ones), so editing a default changes the key.
+        fitted_params = clone(estimator).set_params(**params).get_params(deep=False)
+        description = f"{type(estimator).__module__}.{type(estimator).__qualname__}" \
+                      f"{sorted((name, repr(value)) for name, value in fitted_params.items())}"
+        return hashlib.sha256(description.encode()).hexdigest()[:32]
+
+
+    @classmethod
+    def fit_key(cls, estimator, params:dict, fold:int, sample_fraction:float) -> str:
+        return f"{cls.estimator_key(estimator, params)}/{fold}/{sample_fraction!r}"
+
+
+    def get_score(self, key:str):
+        """
+        Returns the cached score (possibly NaN for a fit that failed), or None.
+        """
+        return self._scores.get(key)
+
+
+    def set_score(self, key:str, score:float) -> None:
+        self._scores[key] = float(score)
+        self._new_scores += 1
+
+
+    def save(self) -> None:
+        try:
+            if not self._new_scores:
+                return
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_file_path = f"{self.scores_file_path}.{os.getpid()}.tmp"
+            with open(temp_file_path, "w") as file_obj:
+                json.dump(self._scores, file_obj)
+            os.replace(temp_file_path, self.scores_file_path)
+            logging.info(f"Saved {self._new_scores} new CV scores to {self.scores_file_path}.")
+            self._new_scores = 0
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
+    def _model_file_path(self, estimator, params:dict) -> str:
+        return os.path.join(self.models_dir, f"{self.estimator_key(estimator, params)}.pkl")
+
+
+    def load_model(self, estimator, params:dict):
+        model_file_path = self._model_file_path(estimator, params)
+        if not self.store_models or not os.path.exists(model_file_path):
+            return None
+        with open(model_file_path, "rb") as file_obj:
+            return pickle.load(file_obj)
+
+
+    def save_model(self, estimator, params:dict, model) -> None:
+        try:
+            if not self.store_models:
+                return
+            os.makedirs(self.models_dir, exist_ok=True)
+            model_file_path = self._model_file_path(estimator, params)
+            temp_file_path = f"{model_file_path}.{os.getpid()}.tmp"
+            with open(temp_file_path, "wb") as file_obj:
+                pickle.dump(model, file_obj)
+            os.replace(temp_file_path, model_file_path)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
@@ -0,0 +1,235 @@
+import sys
+import time
+import numpy as np
+from sklearn.dummy import DummyClassifier
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.ensemble import AdaBoostClassifier, GradientBoostingClassifier, RandomForestClassifier
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.logging.logger import logging
+from networksecurity.constants.training_pipeline import TREE_EVALUATOR_CHUNK_SIZE, TREE_EVALUATOR_CALIBRATION_BATCH_SIZES
+
+
+
+TREE_LEAF = -1
+
+
+
+class CompiledTreeEnsemble:
+    """
+    A fitted tree model flattened into contiguous NumPy arrays, evaluated for a whole batch at once.
+
+    The nodes of every tree are laid out one after the other: `children[2 * node]` and
+    `children[2 * node + 1]` are the left and right child (leaves point to themselves), and all
+    (row, tree) pairs go down one level per step. `leaf_values[node]` holds the tree's contribution
+    at that leaf in the form sklearn adds up, and contributions are accumulated in estimator order,
+    so predictions are bit-identical to the original model's `predict`.
+
+    Use `compile_tree_model` to build one.
+    """
+    def __init__(self, kind:str, classes:np.ndarray, n_features:int, roots:np.ndarray, feature:np.ndarray,
+                 threshold:np.ndarray, missing_go_to_left:np.ndarray, children:np.ndarray, leaf_values:np.ndarray,
+                 init_raw_prediction:np.ndarray=None, weight_sum:float=None, chunk_size:int=TREE_EVALUATOR_CHUNK_SIZE):
+        self.kind = kind
+        self.classes = classes
+        self.n_features = n_features
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold
+        self.missing_go_to_left = missing_go_to_left
+        self.children = children
+        self.leaf_values = leaf_values
+        self.is_leaf = children[0::2] == np.arange(feature.size)
+        self.init_raw_prediction = init_raw_prediction
+        self.weight_sum = weight_sum
+        self.chunk_size = chunk_size
+        self.max_batch_rows = None
+
+
+    @property
+    def n_trees(self) -> int:
+        return self.roots.size
+
+
+    def apply(self, X:np.ndarray) -> np.ndarray:
+        """
+        Returns the (global) leaf index reached by every row in every tree, shape (n_rows, n_trees).
+        """
+        # Trees compare float32 features against float64 thresholds, like sklearn.
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"X has {X.shape[-1]} features, but the model expects {self.n_features} features.")
+
+        # One entry per (row, tree); entries that reached a leaf are dropped after every level.
+        nodes = np.tile(self.roots, X.shape[0])
+        active = np.arange(nodes.size)
+        active_nodes = nodes
+        row_offsets = np.repeat(np.arange(X.shape[0]) * self.n_features, self.n_trees)
+        X_flat = X.ravel()
+        while active.size:
+            values = X_flat[row_offsets[active] + self.feature[active_nodes]]
+            go_left = values <= self.threshold[active_nodes]
+            if self.missing_go_to_left is not None:
+                go_left |= np.isnan(values) & self.missing_go_to_left[active_nodes]
+            active_nodes = self.children[2 * active_nodes + ~go_left]
+            nodes[active] = active_nodes
+
+            not_leaf = ~self.is_leaf[active_nodes]
+            if not not_leaf.all():
+                active = active[not_leaf]
+                active_nodes = active_nodes[not_leaf]
+        return nodes.reshape(X.shape[0], self.n_trees)
+
+
+    def _predict_chunk(self, X:np.ndarray) -> np.ndarray:
+        # Contributions are summed with cumsum, which adds strictly in tree order like sklearn does.
+        contributions = self.leaf_values[self.apply(X)]
+
+        if self.kind == "gradient_boosting":
+            n_outputs = self.init_raw_prediction.size
+            contributions = contributions.reshape(X.shape[0], -1, n_outputs)
+            init = np.broadcast_to(self.init_raw_prediction, (X.shape[0], 1, n_outputs))
+            raw_predictions = np.cumsum(np.concatenate([init, contributions], axis=1), axis=1)[:, -1, :]
+            if n_outputs == 1:
+                return self.classes.take((raw_predictions.ravel() >= 0).astype(int), axis=0)
+            return self.classes.take(np.argmax(raw_predictions, axis=1), axis=0)
+
+        scores = np.cumsum(contributions, axis=1)[:, -1, :]
+        if self.kind == "random_forest":
+            scores /= self.n_trees
+        elif self.kind == "ada_boost":
+            scores /= self.weight_sum
+            if self.classes.size == 2:
+                scores[:, 0] *= -1
+                return self.classes.take(scores.sum(axis=1) > 0, axis=0)
+        return self.classes.take(np.argmax(scores, axis=1), axis=0)
+
+
+    def predict(self, X) -> np.ndarray:
+        try:
+            X = np.asarray(X)
+            chunk_rows = max(1, self.chunk_size // self.n_trees)
+            if X.shape[0] <= chunk_rows:
+                return self._predict_chunk(X)
+            return np.concatenate([self._predict_chunk(X[start:start + chunk_rows])
+                                   for start in range(0, X.shape[0], chunk_rows)])
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
+    def calibrate(self, model, X:np.ndarray, batch_sizes:tuple=TREE_EVALUATOR_CALIBRATION_BATCH_SIZES,
+                  repeats:int=3) -> int:
+        """
+        Sets `max_batch_rows` to the largest of the (increasing) `batch_sizes` up to which this
+        evaluator is faster than `model.predict`: it wins on per-call overhead, sklearn's compiled
+        traversal wins on large batches. Batches are made by repeating the rows of X.
+        """
+        try:
+            self.max_batch_rows = 0
+            for batch_size in batch_sizes:
+                batch = np.resize(X, (batch_size, X.shape[1]))
+                compiled_seconds = _best_time(self.predict, batch, repeats)
+                sklearn_seconds = _best_time(model.predict, batch, repeats)
+                logging.info(f"Compiled {self.kind} at {batch_size} rows: {compiled_seconds * 1000:.2f}ms "
+                             f"vs {sklearn_seconds * 1000:.2f}ms for sklearn.")
+                if compiled_seconds >= sklearn_seconds:
+                    break
+                self.max_batch_rows = batch_size
+            return self.max_batch_rows
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
+
+def _best_time(fn, X, repeats:int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(X)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _flatten_trees(trees:list, leaf_values:list, model_n_features:int, use_missing_go_to_left:bool=True) -> dict:
+    roots, features, thresholds, missing_left, children, values = [], [], [], [], [], []
+    offset = 0
+    for tree, tree_leaf_values in zip(trees, leaf_values):
+        node_count = tree.node_count
+        nodes = np.arange(offset, offset + node_count)
+        is_leaf = tree.children_left == TREE_LEAF
+
+        tree_children = np.empty((node_count, 2), dtype=np.intp)
+        tree_children[:, 0] = np.where(is_leaf, nodes, tree.children_left + offset)
+        tree_children[:, 1] = np.where(is_leaf, nodes, tree.children_right + offset)
+
+        roots.append(offset)
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(tree.threshold)
+        missing_left.append(tree.missing_go_to_left.astype(bool) & ~is_leaf)
+        children.append(tree_children.ravel())
+        values.append(tree_leaf_values)
+        offset += node_count
+
+    missing_go_to_left = np.concatenate(missing_left)
+    return {
+        "n_features": model_n_features,
+        "roots": np.asarray(roots, dtype=np.intp),
+        "feature": np.concatenate(features).astype(np.intp),
+        "threshold": np.concatenate(thresholds).astype(np.float64),
+        # Gradient boosting ignores it (NaN goes right); other trees only need it if some node sends NaN left.
+        "missing_go_to_left": missing_go_to_left if use_missing_go_to_left and missing_go_to_left.any() else None,
+        "children": np.concatenate(children),
+        "leaf_values": np.concatenate(values),
+    }
+
+
+def compile_tree_model(model):
+    """
+    Compiles a fitted DecisionTree, RandomForest, GradientBoosting or AdaBoost classifier.
+    Returns None for anything it can't reproduce exactly (other models, multi-output targets,
+    custom init / base estimators), in which case the model should be used as is.
+    """
+    try:
+        if getattr(model, "n_outputs_", 1) != 1 or not hasattr(model, "classes_"):
+            return None
+
+        if type(model) is DecisionTreeClassifier:
+            tree = model.tree_
+            return CompiledTreeEnsemble("decision_tree", model.classes_,
+                                        **_flatten_trees([tree], [tree.value[:, 0, :]], model.n_features_in_))
+
+        if type(model) is RandomForestClassifier:
+            trees = [estimator.tree_ for estimator in model.estimators_]
+            # Each tree's predict_proba is its leaf's class fractions.
+            leaf_values = [tree.value[:, 0, :model.n_classes_] for tree in trees]
+            return CompiledTreeEnsemble("random_forest", model.classes_,
+                                        **_flatten_trees(trees, leaf_values, model.n_features_in_))
+
+        if type(model) is GradientBoostingClassifier:
+            if not (model.init_ == "zero" or type(model.init_) is DummyClassifier):
+                return None
+            # The default init estimator predicts the same raw score for every row.
+            init_raw_prediction = model._raw_predict_init(np.zeros((1, model.n_features_in_)))[0]
+            # Stage by stage, one tree per output: the order predict_stages adds them in.
+            trees = [estimator.tree_ for stage in model.estimators_ for estimator in stage]
+            leaf_values = [model.learning_rate * tree.value[:, 0, 0] for tree in trees]
+            return CompiledTreeEnsemble("gradient_boosting", model.classes_, init_raw_prediction=init_raw_prediction,
+                                        **_flatten_trees(trees, leaf_values, model.n_features_in_,
+                                                         use_missing_go_to_left=False))
+
+        if type(model) is AdaBoostClassifier:
+            if model.n_classes_ < 2 or not all(type(estimator) is DecisionTreeClassifier for estimator in model.estimators_):
+                return None
+            n_classes = model.n_classes_
+            trees, leaf_values = [], []
+            for estimator, weight in zip(model.estimators_, model.estimator_weights_):
+                tree = estimator.tree_
+                leaf_class = estimator.classes_.take(np.argmax(tree.value[:, 0, :], axis=1), axis=0)
+                # Same expression as AdaBoostClassifier.decision_function, per leaf instead of per row.
+                leaf_values.append(np.where(leaf_class[:, None] == model.classes_[None, :],
+                                            weight, -1 / (n_classes - 1) * weight))
+                trees.append(tree)
+            return CompiledTreeEnsemble("ada_boost", model.classes_, weight_sum=model.estimator_weights_.sum(),
+                                        **_flatten_trees(trees, leaf_values, model.n_features_in_))
+        return None
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
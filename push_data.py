@@ -2,12 +2,20 @@ import pandas as pd
 import json
 import os
 import sys
+import time
+import hashlib
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from dotenv import load_dotenv
 import certifi
 import numpy as np
 import pymongo
+from pymongo.errors import BulkWriteError
 from networksecurity.logging import logger
 from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.constants.training_pipeline import (SCHEMA_FILE_PATH, FEATURE_MISSING_SENTINEL,
+                                                         DATA_INGESTION_WATERMARK_FIELD)
+from networksecurity.utils.main_utils.utils import read_data, get_schema_dtypes, to_int8_features
 
 # THis is the test and test
 
@@ -18,35 +26,235 @@ mongo_uri = os.getenv("MONGO_DB_URL")
 
 ca = certifi.where()
 
+# Bulk loading: CSV rows parsed per chunk, documents per unordered insert_many, concurrent writers
+# (each with a pooled connection), and where the progress of a load is saved:
+LOAD_CHUNK_ROWS = 100_000
+LOAD_BATCH_SIZE = 5_000
+LOAD_WRITERS = 4
+LOAD_CHECKPOINT_SUFFIX = ".load_checkpoint.json"
+DUPLICATE_KEY_ERROR = 11000
+
 
 class NetworkDataExtract():
-    def __init__(self):
-        pass
+    def __init__(self, mongo_client=None):
+        # One pooled client for every load (made when first needed, unless given).
+        self.mongo_client = mongo_client
+
+    def csv_to_json_converter(self, file_path, source_id:str=None):
+        try:
+            return [document for chunk in self.iter_documents(file_path, source_id=source_id) for document in chunk]
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
+    @staticmethod
+    def _row_ids(source_id:str, rows:np.ndarray, occurrences:dict) -> list:
+        """
+        Document ids from the source file, the row's content and how many identical rows come before it in
+        the file (counted in `occurrences`, digest -> rows so far). Pushing the file again, even edited (rows
+        inserted, removed or reordered), gives its unchanged rows the same ids, so adds only the new or
+        edited rows; rows of another file, or repeated rows of the same one, are always new records.
+        """
+        ids = []
+        for row in rows:
+            digest = hashlib.blake2b(row.tobytes(), digest_size=8).digest()
+            occurrence = occurrences.get(digest, 0)
+            occurrences[digest] = occurrence + 1
+            ids.append(f"{source_id}:{digest.hex()}-{occurrence}")
+        return ids
+
+
+    def iter_documents(self, file_path, chunk_rows:int=LOAD_CHUNK_ROWS, skip_rows:int=0, source_id:str=None):
+        """
+        Reads the CSV chunk by chunk and yields each chunk's rows as documents: one integer field per
+        schema column, None for missing values, and an `_id` from `source_id` (default: the file's name)
+        and the row's content (see `_row_ids`). The first `skip_rows` rows are skipped (their content still
+        numbers the identical rows after them).
+        """
+        source_id = source_id or os.path.basename(file_path)
+        # Parsed as float32 (NaN for missing values): much faster than nullable Int8 columns, and
+        # to_int8_features checks the values are int8 all the same.
+        float_dtypes = {column: np.float32 for column in get_schema_dtypes(SCHEMA_FILE_PATH)}
+        start, occurrences = 0, {}
+        for chunk in read_data(file_path, dtypes=float_dtypes, chunk_rows=chunk_rows):
+            first = min(max(skip_rows - start, 0), len(chunk))
+            start += len(chunk)
+            rows = to_int8_features(chunk)
+            ids = self._row_ids(source_id, rows, occurrences)[first:]
+            if first == len(chunk):
+                continue
+            keys = ["_id"] + chunk.columns.to_list()
+            rows = rows[first:]
+            values = rows.tolist()
+            for index in np.flatnonzero((rows == FEATURE_MISSING_SENTINEL).any(axis=1)):
+                values[index] = [None if value == FEATURE_MISSING_SENTINEL else value for value in values[index]]
+            for document_id, row in zip(ids, values):
+                row.insert(0, document_id)
+            yield [dict(zip(keys, row)) for row in values]
+
+
+    def _client(self, writers:int):
+        if self.mongo_client is None:
+            self.mongo_client = pymongo.MongoClient(mongo_uri, maxPoolSize=max(writers, 1) * 2)
+        return self.mongo_client
+
+
+    @staticmethod
+    def _insert_batch(collection, documents:list) -> tuple:
+        """
+        Unordered insert of a batch; documents whose id is already in the collection are skipped.
+        Every document is stamped with the time of the insert (the watermark of incremental ingestion).
+        Returns (inserted, already there).
+        """
+        try:
+            inserted_at = datetime.now(timezone.utc)
+            for document in documents:
+                document.setdefault(DATA_INGESTION_WATERMARK_FIELD, inserted_at)
+            return len(collection.insert_many(documents, ordered=False).inserted_ids), 0
+        except BulkWriteError as e:
+            write_errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != DUPLICATE_KEY_ERROR for error in write_errors):
+                raise
+            return e.details.get("nInserted", 0), len(write_errors)
+
+
+    @staticmethod
+    def _file_signature(file_path) -> dict:
+        stat = os.stat(file_path)
+        return {"file_path": os.path.abspath(file_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
 
-    def csv_to_json_converter(self, file_path):
+    @staticmethod
+    def _read_checkpoint(checkpoint_file_path:str, signature:dict) -> dict:
+        # A checkpoint only counts for the same file (unchanged since) and target collection.
+        if not os.path.exists(checkpoint_file_path):
+            return {}
         try:
-            data = pd.read_csv(file_path)
-            data.reset_index(drop=True, inplace=True)
-            records = list(json.loads(data.T.to_json()).values())
-            return records
+            with open(checkpoint_file_path) as file_obj:
+                checkpoint = json.load(file_obj)
+        except (OSError, ValueError):
+            return {}
+        return checkpoint if checkpoint.get("signature") == signature else {}
+
+
+    @staticmethod
+    def _write_checkpoint(checkpoint_file_path:str, checkpoint:dict) -> None:
+        temp_file_path = f"{checkpoint_file_path}.{os.getpid()}.tmp"
+        with open(temp_file_path, "w") as file_obj:
+            json.dump(checkpoint, file_obj, indent=2)
+        os.replace(temp_file_path, checkpoint_file_path)
+
+
+    def load_csv_to_mongodb(self, file_path, database, collection, chunk_rows:int=LOAD_CHUNK_ROWS,
+                            batch_size:int=LOAD_BATCH_SIZE, writers:int=LOAD_WRITERS,
+                            checkpoint_file_path:str=None, source_id:str=None) -> dict:
+        """
+        Streams the CSV into the collection: chunks of rows become documents (see `iter_documents`),
+        written in unordered batches by `writers` concurrent writers over one pooled client.
+
+        Every row's `_id` comes from `source_id` (default: the file's name) and the row's content (see
+        `_row_ids`), so loading the same file again, or an edited version of it, only adds its new rows, and
+        a load can be resumed at any point; give every distinct file its own source_id (the default does as
+        long as their names differ). Rows removed or edited in the file stay in the collection as they were.
+        The checkpoint file records up to which row every batch is written; an interrupted load resumes from
+        there (and a completed one is skipped) as long as the file is unchanged.
+        """
+        try:
+            start_time = time.perf_counter()
+            checkpoint_file_path = checkpoint_file_path or f"{file_path}{LOAD_CHECKPOINT_SUFFIX}"
+            source_id = source_id or os.path.basename(file_path)
+            signature = dict(self._file_signature(file_path), database=database, collection=collection,
+                             source_id=source_id)
+            checkpoint = self._read_checkpoint(checkpoint_file_path, signature)
+            if checkpoint.get("completed"):
+                logger.logging.info(f"{file_path} is already loaded into {database}.{collection}.")
+                return dict(checkpoint["summary"], skipped=True)
+
+            rows_done = checkpoint.get("rows_done", 0)
+            if rows_done:
+                logger.logging.info(f"Resuming the load of {file_path} after row {rows_done}.")
+            target = self._client(writers)[database][collection]
+            summary = {"rows": rows_done, "inserted": 0, "already_loaded": 0}
+            # Batches finish out of order: the checkpoint moves up to the end of the batches all done.
+            pending, finished_batches, next_start = {}, set(), rows_done
+
+            def collect(futures):
+                # Records the written batches (all of them, even if one failed) before raising a failure.
+                nonlocal rows_done
+                error = None
+                for future in futures:
+                    batch_start, batch_end = pending.pop(future)
+                    if future.exception() is not None:
+                        error = error or future.exception()
+                        continue
+                    inserted, already_loaded = future.result()
+                    summary["inserted"] += inserted
+                    summary["already_loaded"] += already_loaded
+                    finished_batches.add((batch_start, batch_end))
+                advanced = False
+                for batch_start, batch_end in sorted(finished_batches):
+                    if batch_start != rows_done:
+                        break
+                    rows_done = batch_end
+                    finished_batches.discard((batch_start, batch_end))
+                    advanced = True
+                if advanced:
+                    self._write_checkpoint(checkpoint_file_path, {"signature": signature, "rows_done": rows_done,
+                                                                  "completed": False})
+                if error is not None:
+                    raise error
+
+            with ThreadPoolExecutor(max_workers=max(writers, 1)) as executor:
+                try:
+                    for documents in self.iter_documents(file_path, chunk_rows=chunk_rows, skip_rows=rows_done,
+                                                             source_id=source_id):
+                        for batch_start in range(0, len(documents), batch_size):
+                            batch = documents[batch_start:batch_start + batch_size]
+                            future = executor.submit(self._insert_batch, target, batch)
+                            pending[future] = (next_start, next_start + len(batch))
+                            next_start += len(batch)
+                            summary["rows"] += len(batch)
+                            # At most two batches per writer in flight (bounded memory).
+                            if len(pending) >= 2 * max(writers, 1):
+                                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                                collect(done)
+                except BaseException:
+                    # Checkpoint the batches still in flight that do get written, then give up.
+                    wait(pending)
+                    try:
+                        collect(list(pending))
+                    except Exception:
+                        pass
+                    raise
+                collect(list(pending))
+
+            seconds = time.perf_counter() - start_time
+            summary.update(seconds=round(seconds, 3),
+                           rows_per_sec=round((summary["rows"] - checkpoint.get("rows_done", 0)) / seconds) if seconds else None)
+            self._write_checkpoint(checkpoint_file_path, {"signature": signature, "rows_done": rows_done,
+                                                          "completed": True, "summary": summary})
+            logger.logging.info(f"Loaded {file_path} into {database}.{collection}: {summary}")
+            return summary
         except Exception as e:
             raise NetworkSecurityException(e, sys)
-        
-    
+
+
     def insert_data_mongodb(self, records, database, collection):
         try:
             self.database = database
             self.records = records
             self.collection = collection
 
-            self.mongo_client = pymongo.MongoClient(mongo_uri)
+            self.mongo_client = self._client(LOAD_WRITERS)
             self.database = self.mongo_client[self.database]
             self.collection = self.database[self.collection]
-            self.collection.insert_many(self.records)
-            return (len(self.records))
+            inserted = 0
+            for start in range(0, len(self.records), LOAD_BATCH_SIZE):
+                inserted += self._insert_batch(self.collection, self.records[start:start + LOAD_BATCH_SIZE])[0]
+            return inserted
         except Exception as e:
             raise NetworkSecurityException(e, sys)
-        
+
 
 
 if __name__ == "__main__":
@@ -54,10 +262,6 @@ if __name__ == "__main__":
     DATABASE = "Nishan-AI-Engineer"
     COLLECTION = "PhisingData"
     network_obj = NetworkDataExtract()
-    records = network_obj.csv_to_json_converter(file_path=FILE_PATH)
-    num_of_records = network_obj.insert_data_mongodb(records=records, database=DATABASE, collection=COLLECTION)
-    print(f"A total number of {num_of_records} were inserted.")
-
-
-
-
+    summary = network_obj.load_csv_to_mongodb(file_path=FILE_PATH, database=DATABASE, collection=COLLECTION)
+    print(f"A total number of {summary['rows']} records were loaded ({summary['inserted']} inserted, "
+          f"{summary['already_loaded']} already there).")
@@ -0,0 +1,97 @@
+import threading
+from datetime import datetime, timezone
+from pymongo.errors import BulkWriteError
+
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+def _to_bson(value):
+    # Datetimes are stored (and compared) as naive UTC with millisecond precision, as by MongoDB.
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.replace(microsecond=value.microsecond // 1000 * 1000)
+    return value
+
+
+def _matches(value, condition) -> bool:
+    # The query operators the loader and the ingestion use; a missing field is None.
+    if not isinstance(condition, dict):
+        return value == _to_bson(condition)
+    for operator, operand in condition.items():
+        operand = _to_bson(operand)
+        if operator == "$exists":
+            if (value is not None) != operand:
+                return False
+        elif operator == "$not":
+            if _matches(value, operand):
+                return False
+        elif value is None:
+            return False
+        elif operator == "$gt" and not value > operand:
+            return False
+        elif operator == "$gte" and not value >= operand:
+            return False
+        elif operator == "$lt" and not value < operand:
+            return False
+    return True
+
+
+class FakeCollection:
+    """
+    An in-memory stand-in for a MongoDB collection: unique `_id`s, unordered inserts, and find /
+    count_documents with the comparison operators the loader and the ingestion use.
+    """
+    def __init__(self):
+        self.documents = {}
+        self.lock = threading.Lock()
+
+    def insert_many(self, documents, ordered=True):
+        inserted_ids, write_errors = [], []
+        with self.lock:
+            for index, document in enumerate(documents):
+                if document["_id"] in self.documents:
+                    write_errors.append({"index": index, "code": DUPLICATE_KEY_ERROR})
+                    if ordered:
+                        break
+                    continue
+                self.documents[document["_id"]] = {field: _to_bson(value) for field, value in document.items()}
+                inserted_ids.append(document["_id"])
+        if write_errors:
+            raise BulkWriteError({"writeErrors": write_errors, "nInserted": len(inserted_ids)})
+        return type("InsertManyResult", (), {"inserted_ids": inserted_ids})()
+
+    def _find(self, query):
+        for document in list(self.documents.values()):
+            if all(_matches(document.get(field), condition) for field, condition in (query or {}).items()):
+                yield document
+
+    def find(self, query=None, projection=None, batch_size=None):
+        for document in self._find(query):
+            if projection is None:
+                yield dict(document)
+                continue
+            keep = {field for field, include in projection.items() if include}
+            if projection.get("_id", 1):
+                keep.add("_id")
+            yield {field: value for field, value in document.items() if field in keep}
+
+    def count_documents(self, query):
+        return sum(1 for _ in self._find(query))
+
+    def estimated_document_count(self):
+        return len(self.documents)
+
+
+class FakeMongoClient:
+    """client[database][collection], one FakeCollection per name."""
+    def __init__(self):
+        self.collections = {}
+
+    def __getitem__(self, database):
+        client = self
+        class Database:
+            def __getitem__(self, collection):
+                return client.collections.setdefault((database, collection), FakeCollection())
+        return Database()
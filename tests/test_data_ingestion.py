@@ -0,0 +1,122 @@
+import os
+import logging
+from datetime import datetime, timedelta, timezone
+import pandas as pd
+import pytest
+from networksecurity.components.data_ingestion import DataIngestion
+from networksecurity.constants.training_pipeline import TARGET_COLUMN
+from networksecurity.entity.config_entity import TrainingPipelineConfig, DataIngestionConfig
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.utils.main_utils.utils import read_data
+from tests.fake_mongo import FakeMongoClient
+
+
+SAMPLE_FILE_PATH = "Network_Data/phisingData.csv"
+
+
+@pytest.fixture
+def client():
+    return FakeMongoClient()
+
+
+@pytest.fixture
+def config(tmp_path):
+    training_pipeline_config = TrainingPipelineConfig()
+    training_pipeline_config.artifact_name = str(tmp_path / "Artifacts")
+    training_pipeline_config.artifact_dir = str(tmp_path / "Artifacts" / "run")
+    config = DataIngestionConfig(training_pipeline_config=training_pipeline_config)
+    config.partitioned_feature_store_dir = str(tmp_path / "Artifacts" / "feature_store")
+    config.feature_store_manifest_file_path = str(tmp_path / "Artifacts" / "feature_store" / "manifest.json")
+    config.watermark_lag_seconds = 0
+    return config
+
+
+def add_documents(client, config, start, n_rows, stamped=True):
+    collection = client[config.database_name][config.collection_name]
+    rows = pd.read_csv(SAMPLE_FILE_PATH, skiprows=range(1, start + 1), nrows=n_rows)
+    # Stamped a moment ago, so before the cutoff of the next ingestion.
+    ingested_at = datetime.now(timezone.utc) - timedelta(milliseconds=10)
+    for index, row in enumerate(rows.to_dict("records")):
+        document = dict(row, _id=f"row{start + index}")
+        if stamped:
+            document[config.watermark_field] = ingested_at
+        collection.insert_many([document])
+    return rows
+
+
+def partition_rows(data_ingestion, partition) -> pd.DataFrame:
+    return read_data(data_ingestion.partition_file_paths([partition])[0])
+
+
+def test_manifest_round_trip(config, client):
+    data_ingestion = DataIngestion(config, mongo_client=client)
+    manifest = data_ingestion.read_feature_store_manifest()
+    assert manifest["watermark"] is None and manifest["partitions"] == []
+
+    # Read back as naive UTC datetimes, as MongoDB returns them.
+    watermark = datetime(2026, 1, 2, 3, 4, 5)
+    manifest["watermark"] = watermark
+    manifest["partitions"].append({"file_name": "part-00000.csv", "rows": 3, "watermark": watermark,
+                                   "ingested_at": watermark})
+    os.makedirs(config.partitioned_feature_store_dir)
+    data_ingestion._write_feature_store_manifest(manifest)
+    assert data_ingestion.read_feature_store_manifest() == manifest
+
+
+def test_manifest_of_another_collection_is_refused(config, client):
+    data_ingestion = DataIngestion(config, mongo_client=client)
+    add_documents(client, config, 0, 20)
+    data_ingestion.ingest_new_partition()
+
+    config.collection_name = "OtherCollection"
+    with pytest.raises(NetworkSecurityException):
+        data_ingestion.read_feature_store_manifest()
+
+
+def test_watermark_query(config, client):
+    data_ingestion = DataIngestion(config, mongo_client=client)
+    query, cutoff = data_ingestion._watermark_query(None)
+    assert query == {config.watermark_field: {"$not": {"$gte": cutoff}}}
+
+    watermark = cutoff - timedelta(hours=1)
+    query, cutoff = data_ingestion._watermark_query(watermark)
+    assert query == {config.watermark_field: {"$gt": watermark, "$lt": cutoff}}
+
+
+def test_each_run_ingests_only_the_new_documents(config, client):
+    data_ingestion = DataIngestion(config, mongo_client=client)
+    unstamped = add_documents(client, config, 0, 30, stamped=False)
+    stamped = add_documents(client, config, 30, 50)
+
+    first = data_ingestion.ingest_new_partition()
+    assert first["rows"] == 80
+    assert len(partition_rows(data_ingestion, first)) == 80
+    assert data_ingestion.ingest_new_partition() is None
+
+    new = add_documents(client, config, 80, 40)
+    second = data_ingestion.ingest_new_partition()
+    assert second["rows"] == 40
+    assert partition_rows(data_ingestion, second)[TARGET_COLUMN].tolist() == new[TARGET_COLUMN].tolist()
+
+    manifest = data_ingestion.read_feature_store_manifest()
+    assert [partition["rows"] for partition in manifest["partitions"]] == [80, 40]
+    assert manifest["watermark"] == second["watermark"]
+    assert manifest["unstamped_documents"] == len(unstamped)
+    assert sum(partition["rows"] for partition in data_ingestion.training_partitions()) == len(unstamped) + len(stamped) + len(new)
+
+    config.training_window_partitions = 1
+    assert [partition["file_name"] for partition in data_ingestion.training_partitions()] == [second["file_name"]]
+
+
+def test_unstamped_documents_after_the_first_run_are_reported(config, client, caplog):
+    data_ingestion = DataIngestion(config, mongo_client=client)
+    add_documents(client, config, 0, 10, stamped=False)
+    add_documents(client, config, 10, 10)
+    data_ingestion.ingest_new_partition()
+
+    add_documents(client, config, 20, 5, stamped=False)
+    add_documents(client, config, 25, 10)
+    with caplog.at_level(logging.WARNING):
+        partition = data_ingestion.ingest_new_partition()
+    assert partition["rows"] == 10
+    assert "5 documents without the" in caplog.text
@@ -0,0 +1,100 @@
+import pickle
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.impute import KNNImputer
+from sklearn.pipeline import Pipeline
+from networksecurity.utils.ml_utils.model.imputer import (FastPathKNNImputer, ApproximateKNNImputer, make_imputer,
+                                                          passes_missing_values, IMPUTER_STRATEGIES,
+                                                          IMPUTER_STRATEGY_KNN, IMPUTER_STRATEGY_PASSTHROUGH)
+
+
+N_FEATURES = 12
+COLUMNS = [f"feature_{index}" for index in range(N_FEATURES)]
+
+
+def ternary(n_rows, missing_fraction, seed):
+    # Values in {-1, 0, 1} like the dataset's features: many rows at equal distances (ties).
+    rng = np.random.default_rng(seed)
+    X = rng.integers(-1, 2, size=(n_rows, N_FEATURES)).astype(float)
+    X[rng.random(X.shape) < missing_fraction] = np.nan
+    return X
+
+
+@pytest.fixture
+def X_train():
+    return ternary(400, 0.0, seed=0)
+
+
+@pytest.fixture
+def X_test():
+    X = ternary(300, 0.15, seed=1)
+    X[:5] = np.nan  # nothing present: the column means
+    return X
+
+
+def knn_pipeline(X_train, **params):
+    return Pipeline(steps=[("KNNImputer", KNNImputer(**params))]).fit(pd.DataFrame(X_train, columns=COLUMNS))
+
+
+@pytest.mark.parametrize("n_neighbors", [1, 3, 5])
+def test_fast_path_matches_knn_imputer(X_train, X_test, n_neighbors):
+    preprocessor = knn_pipeline(X_train, n_neighbors=n_neighbors)
+    # A small chunk size so the rows are imputed over several chunks.
+    fast_path = FastPathKNNImputer(preprocessor, chunk_max_bytes=64 * 1024)
+    assert fast_path._index_enabled
+
+    X = pd.DataFrame(X_test, columns=COLUMNS)
+    np.testing.assert_array_equal(fast_path.transform(X), preprocessor.transform(X))
+
+
+def test_fast_path_falls_back_to_knn_imputer(X_train, X_test):
+    # Non-integer training values (and missing ones): the wrapped imputer does the work.
+    X_train = X_train + np.random.default_rng(2).normal(scale=0.1, size=X_train.shape)
+    X_train[::7, 3] = np.nan
+    preprocessor = knn_pipeline(X_train)
+    fast_path = FastPathKNNImputer(preprocessor)
+    assert not fast_path._index_enabled
+
+    X = pd.DataFrame(X_test, columns=COLUMNS)
+    np.testing.assert_allclose(fast_path.transform(X), preprocessor.transform(X))
+
+
+def test_fast_path_survives_pickling(X_train, X_test):
+    preprocessor = knn_pipeline(X_train)
+    fast_path = FastPathKNNImputer(preprocessor)
+    X = pd.DataFrame(X_test, columns=COLUMNS)
+    expected = fast_path.transform(X)
+
+    restored = pickle.loads(pickle.dumps(fast_path))
+    assert restored._index is None
+    np.testing.assert_array_equal(restored.transform(X), expected)
+
+
+def test_approximate_imputer_with_every_donor_matches_knn_imputer(X_train, X_test):
+    preprocessor = knn_pipeline(X_train, n_neighbors=3)
+    approximate = ApproximateKNNImputer(n_neighbors=3, max_donors=len(X_train), random_state=0,
+                                        chunk_max_bytes=64 * 1024).fit(X_train)
+    np.testing.assert_array_equal(approximate.transform(X_test), preprocessor.transform(pd.DataFrame(X_test, columns=COLUMNS)))
+
+
+def test_approximate_imputer_keeps_a_sample_of_complete_rows(X_test):
+    X_train = ternary(1_000, 0.02, seed=3)
+    approximate = ApproximateKNNImputer(n_neighbors=3, max_donors=100, random_state=0).fit(X_train)
+    assert approximate.donors_.shape == (100, N_FEATURES)
+    assert not np.isnan(approximate.donors_).any()
+
+    imputed = approximate.transform(X_test)
+    assert not np.isnan(imputed).any()
+    present = ~np.isnan(X_test)
+    np.testing.assert_array_equal(imputed[present], X_test[present])
+    assert imputed.min() >= -1 and imputed.max() <= 1
+
+
+def test_make_imputer(X_train):
+    for strategy in IMPUTER_STRATEGIES:
+        preprocessor = make_imputer(strategy).fit(X_train)
+        assert passes_missing_values(preprocessor) == (strategy == IMPUTER_STRATEGY_PASSTHROUGH)
+    assert isinstance(make_imputer(IMPUTER_STRATEGY_KNN).steps[0][1], KNNImputer)
+    with pytest.raises(ValueError):
+        make_imputer("unknown")
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.tree import DecisionTreeClassifier
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.utils.ml_utils.model.prediction_cache import PredictionCache
+
+
+COLUMNS = ["a", "b", "c"]
+
+
+class CountingModel:
+    """A fitted tree that records the rows it is asked to predict."""
+    def __init__(self, model):
+        self.model = model
+        self.predicted_rows = 0
+
+    def predict(self, X):
+        self.predicted_rows += len(X)
+        return self.model.predict(X)
+
+
+@pytest.fixture
+def model():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.integers(-1, 2, size=(200, 3)), columns=COLUMNS).astype(float)
+    y = (X["a"] + 2 * X["b"] - X["c"] > 0).astype(int)
+    return CountingModel(DecisionTreeClassifier(random_state=0).fit(X, y))
+
+
+def frame(rows, columns=COLUMNS):
+    return pd.DataFrame(rows, columns=columns, dtype=float)
+
+
+def test_hits_return_the_model_labels_without_predicting_again(model):
+    cache = PredictionCache(max_entries=100)
+    X = frame([[1, 0, -1], [0, 1, np.nan], [1, 0, -1], [-1, -1, 1]])
+    expected = model.model.predict(X)
+
+    np.testing.assert_array_equal(cache.predict(model, X, model_version="v1"), expected)
+    assert model.predicted_rows == 3  # the duplicate row is predicted once
+
+    np.testing.assert_array_equal(cache.predict(model, X.iloc[::-1], model_version="v1"), expected[::-1])
+    assert model.predicted_rows == 3
+    assert cache.stats()["hits"] == 4
+
+
+def test_uncacheable_rows_are_predicted_with_the_cached_ones(model):
+    cache = PredictionCache(max_entries=100)
+    cache.predict(model, frame([[1, 0, -1]]), model_version="v1")
+    X = frame([[1, 0, -1], [5, 0, 0]])
+    np.testing.assert_array_equal(cache.predict(model, X, model_version="v1"), model.model.predict(X))
+    assert cache.stats()["uncacheable_rows"] == 1
+
+
+def test_permuted_columns_never_get_a_cached_label(model):
+    cache = PredictionCache(max_entries=100)
+    values = [[1, 0, -1], [0, 1, 1]]
+    cache.predict(model, frame(values), model_version="v1")
+
+    # Same values, columns in another order: the model's feature-name check must run and reject it.
+    with pytest.raises(NetworkSecurityException):
+        cache.predict(model, frame(values, columns=["c", "b", "a"]), model_version="v1")
+    with pytest.raises(NetworkSecurityException):
+        cache.predict(model, frame(values, columns=["x", "y", "z"]), model_version="v1")
+
+
+@pytest.mark.filterwarnings("ignore:X has feature names")
+def test_entries_are_scoped_by_columns():
+    # Fitted without feature names, the model accepts arrays and any columns alike,
+    # but a label is only reused for the columns it was predicted with.
+    model = CountingModel(DecisionTreeClassifier(random_state=0).fit(np.array([[1, 0, -1], [-1, 0, 1]]), [0, 1]))
+    cache = PredictionCache(max_entries=100)
+    cache.predict(model, np.array([[1.0, 0.0, -1.0]]), model_version="v1")
+    cache.predict(model, frame([[1, 0, -1]]), model_version="v1")
+    cache.predict(model, frame([[1, 0, -1]], columns=["c", "b", "a"]), model_version="v1")
+    assert model.predicted_rows == 3
+    cache.predict(model, frame([[1, 0, -1]]), model_version="v1")
+    assert model.predicted_rows == 3
+
+
+def test_new_model_version_clears_the_cache(model):
+    cache = PredictionCache(max_entries=100)
+    X = frame([[1, 0, -1]])
+    cache.predict(model, X, model_version="v1")
+    cache.predict(model, X, model_version="v2")
+    assert model.predicted_rows == 2
+    assert cache.stats()["invalidations"] == 1
@@ -0,0 +1,81 @@
+import pandas as pd
+import pytest
+from push_data import NetworkDataExtract
+from networksecurity.constants.training_pipeline import DATA_INGESTION_WATERMARK_FIELD
+from tests.fake_mongo import FakeMongoClient
+
+
+SAMPLE_FILE_PATH = "Network_Data/phisingData.csv"
+DATABASE, COLLECTION = "database", "collection"
+
+
+@pytest.fixture
+def sample():
+    return pd.read_csv(SAMPLE_FILE_PATH, nrows=500)
+
+
+@pytest.fixture
+def client():
+    return FakeMongoClient()
+
+
+def load(client, dataframe, file_path, **kwargs):
+    dataframe.to_csv(file_path, index=False)
+    loader = NetworkDataExtract(client)
+    return loader.load_csv_to_mongodb(str(file_path), DATABASE, COLLECTION, chunk_rows=64, batch_size=50,
+                                      checkpoint_file_path=f"{file_path}.checkpoint.json", **kwargs)
+
+
+def documents(client) -> dict:
+    return client[DATABASE][COLLECTION].documents
+
+
+def test_pushing_a_file_again_adds_nothing(tmp_path, client, sample):
+    first = load(client, sample, tmp_path / "data.csv")
+    assert first["inserted"] == len(sample)
+    stamps = {document_id: document[DATA_INGESTION_WATERMARK_FIELD] for document_id, document in documents(client).items()}
+
+    # Without the checkpoint, every row is written again and skipped as already there.
+    (tmp_path / "data.csv.checkpoint.json").unlink()
+    again = load(client, sample, tmp_path / "data.csv")
+    assert (again["inserted"], again["already_loaded"]) == (0, len(sample))
+    assert {document_id: document[DATA_INGESTION_WATERMARK_FIELD]
+            for document_id, document in documents(client).items()} == stamps
+
+
+def test_repeated_rows_are_all_loaded(tmp_path, client, sample):
+    repeated = pd.concat([sample.iloc[:100]] * 3, ignore_index=True)
+    summary = load(client, repeated, tmp_path / "data.csv")
+    assert summary["inserted"] == len(repeated) == len(documents(client))
+
+
+def test_pushing_an_edited_file_adds_only_its_new_rows(tmp_path, client, sample):
+    load(client, sample, tmp_path / "data.csv")
+    new_rows = pd.concat([sample.iloc[:3]] * 2, ignore_index=True)
+    # Rows inserted mid-file (copies of existing rows among them), and a row removed.
+    edited = pd.concat([sample.iloc[:200], new_rows, sample.iloc[201:]], ignore_index=True)
+
+    summary = load(client, edited, tmp_path / "data.csv")
+    assert summary["inserted"] == len(new_rows)
+    assert summary["already_loaded"] == len(sample) - 1
+    assert len(documents(client)) == len(sample) + len(new_rows)
+
+
+def test_other_files_are_new_records(tmp_path, client, sample):
+    load(client, sample, tmp_path / "a.csv")
+    summary = load(client, sample, tmp_path / "b.csv")
+    assert summary["inserted"] == len(sample)
+    assert len(documents(client)) == 2 * len(sample)
+
+
+def test_resumed_load_numbers_repeated_rows_as_a_full_load(tmp_path, client, sample):
+    repeated = pd.concat([sample.iloc[:100]] * 2, ignore_index=True)
+    repeated.to_csv(tmp_path / "data.csv", index=False)
+    loader = NetworkDataExtract(client)
+    full_ids = [document["_id"] for chunk in loader.iter_documents(str(tmp_path / "data.csv"), chunk_rows=64)
+                for document in chunk]
+    resumed_ids = [document["_id"] for chunk in loader.iter_documents(str(tmp_path / "data.csv"), chunk_rows=64,
+                                                                         skip_rows=130)
+                   for document in chunk]
+    assert len(set(full_ids)) == len(repeated)
+    assert resumed_ids == full_ids[130:]
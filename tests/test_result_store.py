@@ -0,0 +1,77 @@
+import io
+import numpy as np
+import pandas as pd
+import pytest
+from networksecurity.constants.training_pipeline import PREDICTION_COLUMN_NAME
+from networksecurity.serving import result_store as result_store_module
+from networksecurity.serving.result_store import PredictionResultStore
+
+
+ROW_GROUP_SIZE = 50
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    # Small row groups, so pages span several of them.
+    monkeypatch.setattr(result_store_module, "PREDICTION_RESULT_ROW_GROUP_SIZE", ROW_GROUP_SIZE)
+    return PredictionResultStore(root_dir=str(tmp_path / "prediction_output"))
+
+
+@pytest.fixture
+def results():
+    rng = np.random.default_rng(0)
+    dataframe = pd.DataFrame(rng.integers(-1, 2, size=(333, 4)), columns=["a", "b", "c", "d"])
+    dataframe[PREDICTION_COLUMN_NAME] = rng.integers(0, 2, size=len(dataframe))
+    return dataframe
+
+
+@pytest.fixture
+def job_id(store, results):
+    job_id = store.new_job_id()
+    store.save(job_id, results)
+    return job_id
+
+
+def test_pages_cover_every_row_in_order(store, results, job_id):
+    pages = []
+    for page in range(1, 9):
+        page_df, total_rows = store.read_page(job_id, page=page, page_size=45)
+        assert total_rows == len(results)
+        pages.append(page_df)
+    assert [len(page_df) for page_df in pages] == [45] * 7 + [18]
+    pd.testing.assert_frame_equal(pd.concat(pages), results, check_dtype=False)
+
+
+@pytest.mark.parametrize("prediction", [0, 1])
+def test_pages_of_one_prediction(store, results, job_id, prediction):
+    expected = results[results[PREDICTION_COLUMN_NAME] == prediction]
+    page_df, total_rows = store.read_page(job_id, page=2, page_size=30, prediction=prediction)
+    assert total_rows == len(expected)
+    # Rows keep their index in the job's results.
+    pd.testing.assert_frame_equal(page_df, expected.iloc[30:60], check_dtype=False)
+
+
+def test_page_past_the_end_is_empty(store, results, job_id):
+    page_df, total_rows = store.read_page(job_id, page=100, page_size=30)
+    assert page_df.empty and total_rows == len(results)
+    assert page_df.columns.to_list() == results.columns.to_list()
+
+
+@pytest.mark.parametrize("prediction", [None, 1])
+def test_csv_download(store, results, job_id, prediction):
+    expected = results if prediction is None else results[results[PREDICTION_COLUMN_NAME] == prediction]
+    downloaded = pd.read_csv(io.BytesIO(b"".join(store.iter_csv(job_id, prediction=prediction))))
+    pd.testing.assert_frame_equal(downloaded, expected.reset_index(drop=True), check_dtype=False)
+
+
+def test_results_are_stored_compactly(store, job_id):
+    page_df, _ = store.read_page(job_id, page=1, page_size=10)
+    assert (page_df.dtypes == np.int8).all()
+
+
+def test_job_ids_are_checked(store, job_id):
+    assert store.exists(job_id)
+    assert not store.exists(store.new_job_id())
+    assert not store.exists("../../etc")
+    with pytest.raises(ValueError):
+        store.result_file_path("../../etc")
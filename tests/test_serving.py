@@ -0,0 +1,122 @@
+import time
+import asyncio
+import numpy as np
+import pandas as pd
+import pytest
+from networksecurity.serving.batcher import PredictionBatcher
+from networksecurity.serving.executor import ExecutionLayer, ExecutorSaturatedError
+
+
+class RecordingPredictor:
+    """predict_fn returning column "a" as the labels (a ValueError for non-numeric cells), recording its calls."""
+    def __init__(self):
+        self.batch_rows = []
+
+    async def __call__(self, frame:pd.DataFrame):
+        self.batch_rows.append(len(frame))
+        return frame["a"].astype(float).to_numpy()
+
+
+def frame(values, columns=("a", "b")):
+    return pd.DataFrame({column: list(values) for column in columns})
+
+
+async def predict_all(batcher, frames):
+    try:
+        return await asyncio.gather(*(batcher.predict(frame) for frame in frames), return_exceptions=True)
+    finally:
+        await batcher.stop()
+
+
+def test_concurrent_requests_are_predicted_in_one_batch():
+    predictor = RecordingPredictor()
+    batcher = PredictionBatcher(predictor, window_ms=50, max_batch_rows=1_000)
+    frames = [frame(range(start, start + 3)) for start in range(0, 15, 3)]
+
+    results = asyncio.run(predict_all(batcher, frames))
+    assert predictor.batch_rows == [15]
+    for result, request in zip(results, frames):
+        np.testing.assert_array_equal(result, request["a"].to_numpy(dtype=float))
+    assert batcher.stats()["mean_requests_per_batch"] == len(frames)
+
+
+def test_batches_are_flushed_at_max_batch_rows():
+    predictor = RecordingPredictor()
+    batcher = PredictionBatcher(predictor, window_ms=1_000, max_batch_rows=6)
+    frames = [frame(range(start, start + 3)) for start in range(0, 12, 3)]
+
+    start = time.perf_counter()
+    results = asyncio.run(predict_all(batcher, frames))
+    assert predictor.batch_rows == [6, 6]
+    assert time.perf_counter() - start < 1
+    np.testing.assert_array_equal(np.concatenate(results), np.arange(12, dtype=float))
+
+
+def test_requests_with_other_columns_are_predicted_apart():
+    predictor = RecordingPredictor()
+    batcher = PredictionBatcher(predictor, window_ms=50)
+    frames = [frame([1, 2]), frame([3], columns=("a", "c")), frame([4, 5])]
+
+    results = asyncio.run(predict_all(batcher, frames))
+    assert sorted(predictor.batch_rows) == [1, 4]
+    np.testing.assert_array_equal(results[1], [3.0])
+    np.testing.assert_array_equal(results[2], [4.0, 5.0])
+
+
+def test_a_failing_request_does_not_fail_its_batch():
+    predictor = RecordingPredictor()
+    batcher = PredictionBatcher(predictor, window_ms=50)
+    frames = [frame([1, 2]), frame(["not a number"]), frame([3])]
+
+    results = asyncio.run(predict_all(batcher, frames))
+    # The batch, then each request on its own.
+    assert predictor.batch_rows == [4, 2, 1, 1]
+    np.testing.assert_array_equal(results[0], [1.0, 2.0])
+    assert isinstance(results[1], ValueError)
+    np.testing.assert_array_equal(results[2], [3.0])
+
+
+def test_a_failing_single_request_gets_its_error():
+    predictor = RecordingPredictor()
+    batcher = PredictionBatcher(predictor, window_ms=10)
+
+    results = asyncio.run(predict_all(batcher, [frame(["not a number"])]))
+    assert predictor.batch_rows == [1]
+    assert isinstance(results[0], ValueError)
+
+
+@pytest.fixture
+def execution_layer(tmp_path):
+    # Workers start without a model: the tasks here don't need one.
+    layer = ExecutionLayer(model_file_path=str(tmp_path / "model.pkl"), cpu_workers=1, io_workers=1,
+                           max_pending_cpu_tasks=1, queue_timeout=0.2)
+    yield layer
+    layer.shutdown()
+
+
+def test_saturated_executor_rejects_cpu_tasks(execution_layer):
+    async def run():
+        execution_layer.start()
+        busy = asyncio.create_task(execution_layer.run_cpu(time.sleep, 1))
+        await asyncio.sleep(0.05)
+        with pytest.raises(ExecutorSaturatedError):
+            await execution_layer.run_cpu(time.sleep, 0)
+        # Work that can no longer be rejected waits for the slot instead.
+        await execution_layer.run_cpu_when_free(time.sleep, 0)
+        assert busy.done()
+        assert execution_layer.stats()["pending_cpu_tasks"] == 0
+
+    asyncio.run(run())
+
+
+def test_predict_route_answers_503_when_saturated(monkeypatch):
+    app = pytest.importorskip("app", exc_type=ImportError)
+    from fastapi.testclient import TestClient
+
+    async def saturated(fn, *args, **kwargs):
+        raise ExecutorSaturatedError("All 1 CPU slots are busy, retry later.")
+    monkeypatch.setattr(app.execution_layer, "run_cpu", saturated)
+
+    response = TestClient(app.app).post("/predict", files={"file": ("data.csv", b"a,b\n1,2\n")})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
@@ -0,0 +1,76 @@
+import sys
+import importlib
+import textwrap
+import pytest
+from networksecurity.entity.artifact_entity import DataIngestionArtifact
+from networksecurity.pipeline.stage_cache import StageCache, package_source_digest
+
+
+class Config:
+    def __init__(self, run_dir, value=1):
+        self.output_file_path = f"{run_dir}/stage/output.csv"
+        self.value = value
+
+
+@pytest.fixture
+def stage_package(tmp_path, monkeypatch):
+    """A package with a component module and a helper module it calls."""
+    package_dir = tmp_path / "stagepkg"
+    (package_dir / "helpers").mkdir(parents=True)
+    (package_dir / "__init__.py").write_text("")
+    (package_dir / "helpers" / "__init__.py").write_text("")
+    (package_dir / "helpers" / "convert.py").write_text("def convert(x):\n    return x\n")
+    (package_dir / "component.py").write_text(textwrap.dedent("""
+        from stagepkg.helpers.convert import convert
+        class Component:
+            pass
+    """))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    package_source_digest.cache_clear()
+    yield package_dir, importlib.import_module("stagepkg.component").Component
+    package_source_digest.cache_clear()
+    for module_name in [name for name in sys.modules if name.split(".")[0] == "stagepkg"]:
+        del sys.modules[module_name]
+
+
+def fingerprint(cache, component_cls, config):
+    package_source_digest.cache_clear()
+    return cache.fingerprint("stage", component_cls, config)
+
+
+def test_fingerprint_covers_helper_modules(tmp_path, stage_package):
+    package_dir, component_cls = stage_package
+    cache = StageCache(index_dir=str(tmp_path / "index"), run_artifact_dir=str(tmp_path / "run_1"))
+    config = Config(cache.run_artifact_dir)
+    before = fingerprint(cache, component_cls, config)
+    assert fingerprint(cache, component_cls, config) == before
+
+    (package_dir / "helpers" / "convert.py").write_text("def convert(x):\n    return -x\n")
+    assert fingerprint(cache, component_cls, config) != before
+
+
+def test_fingerprint_ignores_the_run_dir_but_not_the_config(tmp_path, stage_package):
+    _, component_cls = stage_package
+    cache_1 = StageCache(index_dir=str(tmp_path / "index"), run_artifact_dir=str(tmp_path / "run_1"))
+    cache_2 = StageCache(index_dir=str(tmp_path / "index"), run_artifact_dir=str(tmp_path / "run_2"))
+    assert fingerprint(cache_1, component_cls, Config(cache_1.run_artifact_dir)) == \
+        fingerprint(cache_2, component_cls, Config(cache_2.run_artifact_dir))
+    assert fingerprint(cache_1, component_cls, Config(cache_1.run_artifact_dir, value=2)) != \
+        fingerprint(cache_2, component_cls, Config(cache_2.run_artifact_dir))
+
+
+def test_recorded_artifact_is_reused_while_its_outputs_are_intact(tmp_path):
+    cache = StageCache(index_dir=str(tmp_path / "index"), run_artifact_dir=str(tmp_path / "run_1"))
+    stage_dir = tmp_path / "run_1" / "data_ingestion"
+    stage_dir.mkdir(parents=True)
+    train_file_path, test_file_path = stage_dir / "train.csv", stage_dir / "test.csv"
+    train_file_path.write_text("a\n1\n")
+    test_file_path.write_text("a\n2\n")
+    artifact = DataIngestionArtifact(trained_file_path=str(train_file_path), test_file_path=str(test_file_path))
+
+    cache.record("data_ingestion", "f1", artifact, str(stage_dir))
+    assert cache.lookup("data_ingestion", "f1", DataIngestionArtifact, str(stage_dir)) == artifact
+    assert cache.lookup("data_ingestion", "f2", DataIngestionArtifact, str(stage_dir)) is None
+
+    test_file_path.write_text("a\n2\n3\n")
+    assert cache.lookup("data_ingestion", "f1", DataIngestionArtifact, str(stage_dir)) is None
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.ensemble import AdaBoostClassifier, GradientBoostingClassifier, RandomForestClassifier
+from networksecurity.exception.exception import NetworkSecurityException
+from networksecurity.utils.ml_utils.model.tree_compiler import compile_tree_model
+
+
+N_FEATURES = 10
+
+
+def dataset(n_classes, missing_fraction=0.0, seed=0):
+    # Ternary features like the dataset's; labels -1 / 1 (or more classes) from a noisy rule.
+    rng = np.random.default_rng(seed)
+    X = rng.integers(-1, 2, size=(600, N_FEATURES)).astype(np.float32)
+    score = X[:, 0] + 2 * X[:, 1] - X[:, 2] + rng.normal(scale=0.8, size=len(X))
+    y = np.digitize(score, np.quantile(score, np.linspace(0, 1, n_classes + 1)[1:-1])) if n_classes > 2 \
+        else np.where(score > 0, 1, -1)
+    X[rng.random(X.shape) < missing_fraction] = np.nan
+    return X, y
+
+
+MODELS = {
+    "decision_tree": lambda: DecisionTreeClassifier(random_state=0),
+    "random_forest": lambda: RandomForestClassifier(n_estimators=15, random_state=0),
+    "gradient_boosting": lambda: GradientBoostingClassifier(n_estimators=20, random_state=0),
+    "ada_boost": lambda: AdaBoostClassifier(n_estimators=20, random_state=0),
+}
+
+
+@pytest.mark.parametrize("n_classes", [2, 3])
+@pytest.mark.parametrize("model_name", list(MODELS))
+def test_compiled_model_predicts_the_same_labels(model_name, n_classes):
+    X, y = dataset(n_classes)
+    model = MODELS[model_name]().fit(X[:400], y[:400])
+    compiled = compile_tree_model(model)
+    assert compiled is not None
+
+    X_test = X[400:]
+    np.testing.assert_array_equal(compiled.predict(X_test), model.predict(X_test))
+    # Over several chunks as well.
+    compiled.chunk_size = 16
+    np.testing.assert_array_equal(compiled.predict(X_test), model.predict(X_test))
+
+
+@pytest.mark.parametrize("model_name", ["decision_tree", "random_forest"])
+def test_compiled_model_sends_missing_values_the_same_way(model_name):
+    X, y = dataset(2, missing_fraction=0.1)
+    model = MODELS[model_name]().fit(X[:400], y[:400])
+    compiled = compile_tree_model(model)
+    np.testing.assert_array_equal(compiled.predict(X[400:]), model.predict(X[400:]))
+
+
+def test_other_models_are_not_compiled():
+    X, y = dataset(2)
+    assert compile_tree_model(LogisticRegression().fit(X, y)) is None
+
+
+def test_compiled_model_checks_the_features():
+    X, y = dataset(2)
+    compiled = compile_tree_model(MODELS["decision_tree"]().fit(X, y))
+    with pytest.raises(NetworkSecurityException):
+        compiled.predict(X[:, :-1])